@@ -4,10 +4,12 @@ import cv2
 import json
 import time
 import traceback
-import numpy as np
 from pathlib import Path
 from PyQt5.QtCore import QThread, pyqtSignal
 
+from app.frame_store import FrameStore
+from app.payload import build_ui_payload
+
 
 def resource_path(relative_path):
     """
@@ -56,16 +58,32 @@ except ImportError:
         print("Warning: ConfigManager import failed, using default config.")
         ConfigManager = None
 
-# 导入 AI 模块
-try:
-    from modules.posture.detector import PostureDetector
-    from modules.attention.monitor import AttentionMonitor
-    from modules.behavior.behavior_detector import BehaviorDetector
-except ImportError:
-    print("Warning: AI modules not found, AI features will be limited.")
-    PostureDetector = None
-    AttentionMonitor = None
-    BehaviorDetector = None
+from modules.runtime.thresholds import current_thresholds, get_store
+from modules.runtime.watcher import ConfigWatcher
+from modules.runtime.quality import QualityController
+from modules.runtime.probe import apply_thread_settings, ensure_profile
+from modules.runtime.presence import PRESENT, PresenceMonitor
+from modules.runtime.filters import FACE, HANDS, POSE, LandmarkFilters, LandmarkView
+from modules.runtime.events import SUMMARY, EventDetector
+from modules.runtime.alerts import AlertEngine
+from modules.runtime.recording import SessionRecorder, recording_requested
+from modules.behavior.hand_gate import HandGate
+from modules.behavior.proximity import landmarks_to_array
+
+def _import_ai_modules():
+    """
+    导入 AI 模块。
+    mediapipe / ultralytics 等重型依赖只在工作线程启动时才加载，
+    这样 UI 窗口可以先于任何 CV/ML 库显示出来。
+    """
+    try:
+        from modules.posture.detector import PostureDetector
+        from modules.attention.monitor import AttentionMonitor
+        from modules.behavior.behavior_detector import BehaviorDetector
+    except ImportError:
+        print("Warning: AI modules not found, AI features will be limited.")
+        return None, None, None
+    return PostureDetector, AttentionMonitor, BehaviorDetector
 
 
 class DetectionResultsWrapper:
@@ -73,9 +91,11 @@ class DetectionResultsWrapper:
     数据包装类，用于在不同模块间传递 MediaPipe 检测结果。
     """
 
-    def __init__(self, pose_landmarks, hand_landmarks):
+    def __init__(self, pose_landmarks, hand_landmarks, hand_array=None):
         self.pose_landmarks = pose_landmarks
         self.multi_hand_landmarks = hand_landmarks
+        # (H, 21, 3) float32，行为检测与 UI 载荷共用
+        self.hand_array = hand_array
 
 
 def normalize_angle(angle):
@@ -96,44 +116,96 @@ class AIWorker(QThread):
     AI 工作线程。
     负责在后台运行视频帧读取和 AI 模型推理，避免阻塞 UI 主线程。
     """
-    change_pixmap_signal = pyqtSignal(np.ndarray)
+    # 画面通过共享的 FrameStore 传递，信号里只有 (缓冲索引, 帧序号)
+    frame_ready_signal = pyqtSignal(int, int)
+    # 完整载荷只在出错或开启叠加层时发送；检测结果走事件通道
     update_data_signal = pyqtSignal(dict)
+    event_signal = pyqtSignal(list)
+    # 提醒规则在本线程求值，UI 只收到需要执行的提醒动作
+    alert_signal = pyqtSignal(dict)
 
     def __init__(self):
         super().__init__()
         self._run_flag = True
         self.cam_id = 0
+        self.frame_store = FrameStore(num_buffers=3)
+        # 叠加层开启时才随载荷附带打包后的关键点
+        self.overlay_enabled = False
 
-        # 初始化配置
+        # 初始化配置（所有模块共享同一份不可变快照）
         self.config_mgr = ConfigManager() if ConfigManager else None
-        if self.config_mgr:
-            self.shoulder_thresh = self.config_mgr.get("shoulder_tilt", 10.0)
-            self.neck_thresh = self.config_mgr.get("neck_tilt", 15.0)
-        else:
-            self.shoulder_thresh = 10.0
-            self.neck_thresh = 15.0
+        self.thresholds = current_thresholds()
+
+        # 热更新：监听线程只登记新快照，真正应用在两帧之间由工作线程完成
+        self._pending_thresholds = None
+        self.config_watcher = ConfigWatcher()
+
+        # 自适应档位：按帧耗时/CPU 升降各模型参数（起始档由性能档案决定）
+        self.profile = None
+        self.quality = QualityController(self.thresholds.quality)
+
+        # 在座/空座状态机：持续离席后进入低功耗，只做廉价的在座探测
+        self._presence_pose = None
+        self.presence = PresenceMonitor(self.thresholds.presence, pose_probe=self._presence_pose_probe)
+
+        # 关键点滤波：抑制抖动，并让重模型可以隔帧运行（跳过的帧用预测值）
+        self.filters = LandmarkFilters(self.thresholds.filter)
+
+        # 事件通道：只在状态变化时通知 UI / 写日志，数值按固定间隔发送摘要
+        self.events = EventDetector(self.thresholds.events)
+        self._last_log_summary = None
+
+        # 提醒规则（config/alert_rules.yaml），开关由 UI 通过 set_alert_toggles 下发
+        self.alerts = AlertEngine()
+
+        # 关键点会话记录（--record 或 SMARTSTUDY_RECORD=1），供离线回放调阈值
+        self.recorder = None
 
         # 初始化日志路径
         self.log_dir = get_log_dir()
         self.log_file = self.log_dir / "monitor_data.jsonl"
         self.reset_log_file()
 
-        # 初始化模型
-        self.init_models()
+        # 模型在 run() 中（工作线程内）初始化，避免阻塞 UI 线程
+        self._models_ready = False
+        self.module_a = None
+        self.module_b = None
+        self.module_c = None
 
     def init_models(self):
         """初始化所有 AI 模型组件。"""
+        self._models_ready = True
+
+        # 性能档案：首次启动或硬件/依赖变化后会先跑一次探测（约数秒），之后直接读缓存
+        try:
+            self.profile = ensure_profile()
+            apply_thread_settings(self.profile)
+            self.quality = QualityController(
+                self.thresholds.quality,
+                start=self.profile.start_level,
+                floor=self.profile.floor,
+            )
+        except Exception as e:
+            print(f"Warning: performance probe failed: {e}")
+
+        PostureDetector, AttentionMonitor, BehaviorDetector = _import_ai_modules()
+        level = self.quality.level
         try:
             # 1. 姿态检测
-            self.module_a = PostureDetector() if PostureDetector else None
+            self.module_a = PostureDetector(
+                self.thresholds, model_complexity=level.pose_complexity
+            ) if PostureDetector else None
 
             # 2. 注意力检测
-            self.module_b = AttentionMonitor(fps=30) if AttentionMonitor else None
+            self.module_b = AttentionMonitor(
+                fps=30, thresholds=self.thresholds, refine_landmarks=level.face_refine
+            ) if AttentionMonitor else None
             # 让 AttentionMonitor 自己在运行时去跑 calibrate() 逻辑
 
             # 3. 行为检测
-            config_data = self.config_mgr.data if self.config_mgr else {}
-            self.module_c = BehaviorDetector(config_data) if BehaviorDetector else None
+            self.module_c = BehaviorDetector(self.thresholds) if BehaviorDetector else None
+            if self.module_c:
+                self.module_c.set_quality(level)
 
             # 4. MediaPipe 手部模型
             import mediapipe as mp
@@ -142,11 +214,10 @@ class AIWorker(QThread):
             except AttributeError:
                 from mediapipe.python import solutions as mp_solutions
 
-            self.mp_hands = mp_solutions.hands.Hands(
-                max_num_hands=2,
-                min_detection_confidence=0.5,
-                min_tracking_confidence=0.5
-            )
+            self._mp_hands_solution = mp_solutions.hands
+            self.max_num_hands = level.max_hands
+            self.mp_hands = self._create_hands(level.max_hands)
+            self.hand_gate = HandGate(self.thresholds.hand)
             self.mp_drawing = mp_solutions.drawing_utils
             self.mp_pose_conn = mp_solutions.pose.POSE_CONNECTIONS
 
@@ -156,6 +227,65 @@ class AIWorker(QThread):
             print(f"Error: Model initialization failed: {e}")
             traceback.print_exc()
 
+    def _create_hands(self, max_num_hands):
+        return self._mp_hands_solution.Hands(
+            max_num_hands=max_num_hands,
+            min_detection_confidence=0.5,
+            min_tracking_confidence=0.5
+        )
+
+    def apply_quality(self, level):
+        """在帧间切换档位：只重建参数发生变化的模型"""
+        try:
+            if self.module_a and hasattr(self.module_a, "set_model_complexity"):
+                self.module_a.set_model_complexity(level.pose_complexity)
+            if self.module_b and hasattr(self.module_b, "set_refine_landmarks"):
+                self.module_b.set_refine_landmarks(level.face_refine)
+            if self.module_c and hasattr(self.module_c, "set_quality"):
+                self.module_c.set_quality(level)
+            if hasattr(self, "mp_hands") and level.max_hands != self.max_num_hands:
+                old = self.mp_hands
+                self.mp_hands = self._create_hands(level.max_hands)
+                self.max_num_hands = level.max_hands
+                old.close()
+        except Exception as e:
+            print(f"Warning: apply quality level {level.index} failed: {e}")
+
+    def _on_thresholds_changed(self, snapshot):
+        # 可能在监听线程中被调用，这里只做一次引用赋值
+        self._pending_thresholds = snapshot
+
+    def apply_pending_thresholds(self):
+        """
+        在帧间应用新的配置快照。
+        只替换各检测器持有的快照引用，模型实例与校准基线全部保留。
+        """
+        # 不清空槽位：读取与清空之间监听线程发布的新快照会丢失；按版本号判断是否已应用
+        snap = self._pending_thresholds
+        if snap is None or snap.version <= self.thresholds.version:
+            return
+
+        self.thresholds = snap
+        self.quality.set_config(snap.quality)
+        self.presence.set_config(snap.presence)
+        self.filters.set_config(snap.filter)
+        self.events.set_config(snap.events)
+        if hasattr(self, "hand_gate"):
+            self.hand_gate.set_config(snap.hand)
+        for module in (self.module_a, self.module_b, self.module_c):
+            if module is not None and hasattr(module, "set_thresholds"):
+                try:
+                    module.set_thresholds(snap)
+                except Exception as e:
+                    print(f"Warning: apply thresholds to {type(module).__name__} failed: {e}")
+        print(f"Info: thresholds.yaml reloaded (version {snap.version}).")
+
+    def set_overlay_enabled(self, on: bool):
+        self.overlay_enabled = bool(on)
+
+    def set_alert_toggles(self, toggles: dict):
+        self.alerts.set_toggles(toggles)
+
     def reset_log_file(self):
         """启动时重置日志文件。"""
         try:
@@ -166,90 +296,223 @@ class AIWorker(QThread):
         except Exception:
             pass
 
-    def save_log(self, data_a, data_b, data_c):
-        """将检测数据保存到本地日志文件。"""
+    @staticmethod
+    def _summary_entry(ts, data_a, data_b, data_c, presence=PRESENT):
+        return {
+            "ts": round(ts, 3),
+            "event": SUMMARY,
+            "posture": {
+                "hunch": bool(data_a.get("is_hunchback")),
+                "lean": bool(data_a.get("is_shoulder_tilted")),
+                "neck": data_a.get("neck_tilt", 0)
+            },
+            "attention": {
+                "score": int(data_b.get("attention_score", 0)),
+                "fatigue": float(data_b.get("perclos", 0))
+            },
+            "behavior": {
+                "phone": bool(data_c.get("手机使用", {}).get("使用手机"))
+            },
+            "presence": presence
+        }
+
+    def save_log(self, events):
+        """
+        将事件保存到本地日志文件。
+        状态事件逐条写入；摘要按 log_interval 间隔写入一行。
+        """
+        rows = []
+        for ev in events:
+            if ev.kind != SUMMARY:
+                rows.append(ev.to_dict())
+                continue
+            last = self._last_log_summary
+            if last is not None and ev.ts - last < self.thresholds.events.log_interval:
+                continue
+            self._last_log_summary = ev.ts
+            data = ev.data
+            presence = (data.get("presence") or {}).get("mode", PRESENT)
+            rows.append(self._summary_entry(ev.ts, data["A"], data["B"], data["C"], presence))
+        if not rows:
+            return
         try:
-            log_entry = {
-                "ts": round(time.time(), 3),
-                "posture": {
-                    "hunch": bool(data_a.get("is_hunchback")),
-                    "lean": bool(data_a.get("is_shoulder_tilted")),
-                    "neck": data_a.get("neck_tilt", 0)
-                },
-                "attention": {
-                    "score": int(data_b.get("attention_score", 0)),
-                    "fatigue": float(data_b.get("perclos", 0))
-                },
-                "behavior": {
-                    "phone": bool(data_c.get("手机使用", {}).get("使用手机"))
-                }
-            }
             with open(self.log_file, "a", encoding="utf-8") as f:
-                f.write(json.dumps(log_entry, ensure_ascii=False) + "\n")
+                f.write("".join(json.dumps(row, ensure_ascii=False) + "\n" for row in rows))
         except Exception:
             pass
 
+    def process_full(self, frame, frame_rgb):
+        """
+        完整检测管线（坐姿 + 手部 + 注意力 + 行为）。
+        返回 (data_a, data_b, data_c, pose_landmarks, hand_array)。
+        """
+        # 各路模型按滤波器调度运行：该跑的帧跑模型并滤波，其余帧直接取预测值
+        now = time.monotonic()
+        self.filters.step()
+
+        # A: 坐姿检测
+        data_a = {}
+        pose_landmarks = None
+        if self.module_a:
+            pose_landmarks = self.filters.run(POSE, lambda: self.module_a.detect(frame), now)
+            data_a = self.module_a.analyze(frame, pose_landmarks)
+
+            s_ang = normalize_angle(data_a.get("shoulder_tilt_angle"))
+            n_ang = normalize_angle(data_a.get("neck_tilt"))
+
+            data_a["shoulder_tilt_angle"] = s_ang
+            data_a["neck_tilt"] = n_ang
+            posture_cfg = self.thresholds.posture
+            data_a["is_shoulder_tilted"] = abs(s_ang) > posture_cfg.shoulder_tilt
+            data_a["is_neck_tilted"] = abs(n_ang) > posture_cfg.neck_tilt
+
+        # 手部关键点：只在手腕靠近头部时，在头部裁剪区域上运行
+        hand_array = landmarks_to_array(None)
+        if hasattr(self, 'mp_hands'):
+            hand_array = self.filters.run(
+                HANDS,
+                lambda: landmarks_to_array(self.hand_gate.run(self.mp_hands, frame_rgb, pose_landmarks)),
+                now,
+            )
+        hand_landmarks = [LandmarkView(h) for h in hand_array] or None
+
+        # B: 注意力检测
+        data_b = {}
+        face_landmarks = None
+        if self.module_b:
+            try:
+                face_landmarks = self.filters.run(FACE, lambda: self.module_b.detect(frame), now)
+                data_b = self.module_b.process_landmarks(frame, face_landmarks)
+            except Exception:
+                pass
+
+        # C: 行为检测
+        data_c = {}
+        if self.module_c:
+            wrapper = DetectionResultsWrapper(pose_landmarks, hand_landmarks, hand_array)
+            data_c = self.module_c.process(wrapper, frame=frame)
+
+        if self.recorder is not None:
+            phone = self.module_c.phone_detector.last_observation if self.module_c else None
+            self.recorder.write(now, pose_landmarks, face_landmarks, hand_array, phone)
+
+        return data_a, data_b, data_c, pose_landmarks, hand_array
+
+    def _presence_pose_probe(self, frame):
+        """空座时的在座确认：复杂度 0 的 Pose，单张图模式（探测间隔大，跟踪没有意义）"""
+        if self._presence_pose is None:
+            import mediapipe as mp
+            self._presence_pose = mp.solutions.pose.Pose(
+                static_image_mode=True,
+                model_complexity=0,
+                min_detection_confidence=0.5,
+            )
+        res = self._presence_pose.process(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+        if not res.pose_landmarks:
+            return False
+        lm = res.pose_landmarks.landmark
+        if min(lm[11].visibility, lm[12].visibility) < 0.5:
+            return False
+        # 与离席判断用同一个偏移条件：画面里有人但偏离座位（邻座、换了位置）不算回座，
+        # 否则恢复完整管线后又会判离席，在两种模式间来回切换
+        if self.module_c is not None:
+            return self.module_c.seat_detector.within_seat(res.pose_landmarks)
+        return True
+
+    def presence_info(self):
+        info = {"mode": self.presence.mode}
+        info.update(self.presence.mode_times())
+        return info
+
     def run(self):
         """线程主循环。"""
-        print("Info: AIWorker thread started, opening camera...")
+        print("Info: AIWorker thread started, loading models...")
+        if not self._models_ready:
+            self.init_models()
+
+        print("Info: Opening camera...")
         cap = cv2.VideoCapture(self.cam_id)
         if not cap.isOpened():
             print("Error: Could not open camera.")
             self.update_data_signal.emit({"Error": "Camera Fail"})
             return
+        if self.profile is not None and self.profile.capture_width > 0:
+            cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.profile.capture_width)
+            cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.profile.capture_height)
+
+        if recording_requested():
+            path = self.log_dir / "sessions" / time.strftime("session_%Y%m%d_%H%M%S.lmrec")
+            self.recorder = SessionRecorder(
+                path,
+                int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+                fps=self.module_b.fps if self.module_b else 30,
+                meta={"thresholds_version": self.thresholds.version},
+            )
+            print(f"Info: recording landmarks to {path}")
+
+        store = get_store()
+        store.subscribe(self._on_thresholds_changed)
+        # 模型加载期间若配置已更新，补上这一版
+        self._on_thresholds_changed(store.current())
+        self.config_watcher.start()
 
         while self._run_flag:
+            self.apply_pending_thresholds()
+
             ret, frame = cap.read()
             if not ret:
                 print("Warning: Could not read video frame.")
                 break
+            t_start = time.perf_counter()
 
             # 镜像翻转并转RGB
             frame = cv2.flip(frame, 1)
-            frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+
+            # RGB 画面直接写入预分配的共享缓冲，手部模型与 UI 共用这一份
+            buf_idx = self.frame_store.acquire_write(frame.shape)
+            frame_rgb = self.frame_store.buffers[buf_idx]
+            cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=frame_rgb)
 
             try:
-                # A: 坐姿检测
-                data_a = {}
-                pose_landmarks = None
-                if self.module_a:
-                    data_a = self.module_a.process_frame(frame)
-                    pose_landmarks = data_a.get("landmarks")
-
-                    s_ang = normalize_angle(data_a.get("shoulder_tilt_angle"))
-                    n_ang = normalize_angle(data_a.get("neck_tilt"))
-
-                    data_a["shoulder_tilt_angle"] = s_ang
-                    data_a["neck_tilt"] = n_ang
-                    data_a["is_shoulder_tilted"] = abs(s_ang) > self.shoulder_thresh
-                    data_a["is_neck_tilted"] = abs(n_ang) > self.neck_thresh
-
-                # 手部关键点
-                hands_results = None
-                if hasattr(self, 'mp_hands'):
-                    hands_results = self.mp_hands.process(frame_rgb)
-
-                # B: 注意力检测
-                data_b = {}
-                if self.module_b:
-                    try:
-                        res = self.module_b.process(frame)
-                        data_b = json.loads(res) if isinstance(res, str) else res
-                    except Exception:
-                        pass
-
-                # C: 行为检测
-                data_c = {}
-                if self.module_c:
-                    hand_landmarks = hands_results.multi_hand_landmarks if hands_results else None
-                    wrapper = DetectionResultsWrapper(pose_landmarks, hand_landmarks)
-                    data_c = self.module_c.process(wrapper, frame=frame)
-
-                # 写日志并且发送数据给 UI
-                self.save_log(data_a, data_b, data_c)
-                self.update_data_signal.emit({"A": data_a, "B": data_b, "C": data_c})
-
-                self.change_pixmap_signal.emit(frame_rgb)
+                self.presence.tick()
+                if self.presence.mode == PRESENT:
+                    data_a, data_b, data_c, pose_landmarks, hand_array = self.process_full(frame, frame_rgb)
+                    away = bool(data_c.get("离席检测", {}).get("离席"))
+                    self.presence.report_away(away)
+                else:
+                    # 空座低功耗：只做廉价的在座探测，不跑完整管线
+                    self.presence.probe(frame)
+                    away = True
+                    data_a, data_b, data_c = {}, {}, {"离席检测": {"离席": away}}
+                    pose_landmarks, hand_array = None, None
+
+                # 精简载荷：只含标量/标志，关键点按需打包
+                payload = build_ui_payload(
+                    data_a, data_b, data_c,
+                    pose_landmarks=pose_landmarks,
+                    hand_landmarks=hand_array,
+                    overlay=self.overlay_enabled,
+                    presence=self.presence_info(),
+                )
+
+                # 变化检测：没有状态变化且未到摘要间隔时本帧不发送、不写日志
+                events = self.events.update(payload)
+                if events:
+                    self.save_log(events)
+                    self.event_signal.emit(events)
+                for action in self.alerts.evaluate(self.events.states, time.time()):
+                    self.alert_signal.emit(action)
+                if self.overlay_enabled:
+                    self.update_data_signal.emit(payload)
+
+                seq = self.frame_store.publish(buf_idx)
+                self.frame_ready_signal.emit(buf_idx, seq)
+
+                # 按本帧处理耗时（不含取帧与休眠）调整档位；低功耗模式的耗时不计
+                if self.presence.mode == PRESENT and not away:
+                    new_level = self.quality.record((time.perf_counter() - t_start) * 1000.0)
+                    if new_level is not None:
+                        self.apply_quality(new_level)
 
             except Exception as e:
                 # 打印一次错误后静默
@@ -258,9 +521,23 @@ class AIWorker(QThread):
                     traceback.print_exc()
                     self._has_printed_error = True
 
-            time.sleep(0.03)
+            if self.presence.mode == PRESENT:
+                time.sleep(0.03)
+            else:
+                time.sleep(1.0 / self.thresholds.presence.empty_fps)
 
+        self.config_watcher.stop()
+        store.unsubscribe(self._on_thresholds_changed)
         cap.release()
+        if self.recorder is not None:
+            self.recorder.close()
+            print(f"Info: session recorded to {self.recorder.path} ({self.recorder.frames} frames)")
+            self.recorder = None
+        if self._presence_pose is not None:
+            self._presence_pose.close()
+            self._presence_pose = None
+        print(f"Info: presence summary {self.presence.mode_times()}")
+        print(f"Info: event channel {self.events.frames} frames -> {self.events.events} state events")
         print("Info: AIWorker thread stopped.")
 
     def stop(self):
@@ -3,6 +3,8 @@ import os
 import yaml
 from pathlib import Path
 
+from modules.runtime.thresholds import get_store
+
 
 def resource_path(relative_path):
     """
@@ -62,22 +64,23 @@ class ConfigManager:
                 print("Warning: Configuration file not found, using defaults.")
                 return self.defaults.copy()
 
-        try:
-            with open(self.config_path, 'r', encoding='utf-8') as f:
-                user_config = yaml.safe_load(f)
-                # 合并用户配置和默认配置 
-                config = self.defaults.copy()
-                if user_config:
-                    # 递归更新字典
-                    for k, v in user_config.items():
-                        if isinstance(v, dict) and k in config and isinstance(config[k], dict):
-                            config[k].update(v)
-                        else:
-                            config[k] = v
-                return config
-        except Exception as e:
-            print(f"配置文件加载失败: {e}，使用默认配置。")
-            return self.defaults.copy()
+        # yaml 由配置服务统一解析一次，这里复用其结果
+        get_store().ensure_loaded(self.config_path)
+        user_config = get_store().raw()
+
+        # 合并用户配置和默认配置
+        config = {k: (dict(v) if isinstance(v, dict) else v) for k, v in self.defaults.items()}
+        for k, v in user_config.items():
+            if isinstance(v, dict) and k in config and isinstance(config[k], dict):
+                config[k].update(v)
+            else:
+                config[k] = v
+        return config
+
+    @property
+    def thresholds(self):
+        """当前的不可变配置快照 (Thresholds)"""
+        return get_store().current()
 
     def get(self, key, default=None):
         # 获取某项配置，如果不存在返回默认值
@@ -93,4 +96,8 @@ class ConfigManager:
             with open(self.config_path, 'w', encoding='utf-8') as f:
                 yaml.dump(self.data, f, allow_unicode=True)
         except Exception as e:
-            print(f"配置文件保存失败: {e}")
\ No newline at end of file
+            print(f"配置文件保存失败: {e}")
+            return
+
+        # 立即发布新快照，运行中的检测器在下一帧之前生效
+        get_store().load(self.config_path)
\ No newline at end of file
@@ -0,0 +1,80 @@
+import threading
+import numpy as np
+
+
+class FrameStore:
+    """
+    多缓冲帧仓库（默认三缓冲），用于 AIWorker → UI 的零拷贝画面传递。
+
+    - 工作线程：acquire_write() 拿到一块空闲缓冲，直接把画面写进去，再 publish()。
+    - UI 线程：收到 (index, seq) 信号后 acquire_read() 取最新一帧，上传成 QPixmap 后 release_read()。
+
+    跨线程信号里只有两个整数，不再复制/序列化整帧 ndarray。
+    写端永远不会选中“最新帧”或“正在被读取”的缓冲，所以三块缓冲足以保证读写互不覆盖。
+    """
+
+    def __init__(self, num_buffers: int = 3):
+        if num_buffers < 3:
+            raise ValueError("FrameStore 至少需要 3 块缓冲")
+        self._n = int(num_buffers)
+        self._lock = threading.Lock()
+        self.buffers = []
+        self._shape = None
+        self._seqs = [0] * self._n
+
+        self._latest = -1   # 最新发布的缓冲索引
+        self._reading = -1  # UI 正在读取的缓冲索引
+        self._writing = -1  # 工作线程正在写入的缓冲索引
+        self._seq = 0
+
+    @property
+    def shape(self):
+        return self._shape
+
+    def _ensure_buffers(self, shape):
+        # 分辨率变化时重新分配；读端手里的旧 ndarray 仍由其引用保活，不受影响
+        if self._shape != tuple(shape):
+            self._shape = tuple(shape)
+            self.buffers = [np.empty(self._shape, dtype=np.uint8) for _ in range(self._n)]
+            self._seqs = [0] * self._n
+            self._latest = -1
+
+    def acquire_write(self, shape) -> int:
+        """获取一块可写缓冲的索引（按 shape 预分配）"""
+        with self._lock:
+            self._ensure_buffers(shape)
+            for i in range(self._n):
+                if i != self._latest and i != self._reading:
+                    self._writing = i
+                    return i
+        raise RuntimeError("FrameStore: 没有空闲缓冲")
+
+    def publish(self, index: int) -> int:
+        """发布写好的缓冲，返回该帧的序列号"""
+        with self._lock:
+            self._seq += 1
+            self._seqs[index] = self._seq
+            self._latest = index
+            self._writing = -1
+            return self._seq
+
+    def acquire_read(self):
+        """
+        取最新发布的帧。
+        返回 (index, seq, ndarray)；还没有任何帧时返回 None。
+        调用方用完后必须 release_read()。
+        """
+        with self._lock:
+            if self._latest < 0:
+                return None
+            idx = self._latest
+            self._reading = idx
+            return idx, self._seqs[idx], self.buffers[idx]
+
+    def release_read(self):
+        with self._lock:
+            self._reading = -1
+
+    @property
+    def latest_seq(self) -> int:
+        return self._seq
@@ -0,0 +1,238 @@
+"""
+推理子进程模式
+把整条感知/检测管线（取帧 + MediaPipe + YOLO + 各检测器）放到独立的子进程里运行，
+UI 进程只负责绘制：检测代码里的 Python 逻辑不再与界面绘制、动画争抢 GIL。
+
+- 画面与事件（及叠加层载荷）经 shared_memory 环形缓冲传回（见 shm_ring.py）；
+- 控制通道是一条 Pipe（叠加层开关、提醒开关、停止）；
+- UI 进程定时轮询缓冲的序号，有新数据时发出与 AIWorker 相同的信号；
+- 子进程崩溃或卡死时自动重启（指数退避）。
+
+ProcessWorker 的接口与 AIWorker 一致（frame_store / 各信号 / start / stop / isRunning），
+MainWindow 只需替换实例。启用方式：命令行参数 --inference-process，
+或环境变量 SMARTSTUDY_INFERENCE_PROCESS=1。
+"""
+import multiprocessing as mp
+import os
+import sys
+import threading
+import time
+
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+
+from app.shm_ring import ResultRing, SharedFrameRing
+
+PROCESS_FLAG = "--inference-process"
+PROCESS_ENV = "SMARTSTUDY_INFERENCE_PROCESS"
+
+# UI 侧轮询间隔（毫秒），远小于 60fps 的帧间隔
+_POLL_MS = 8
+# 子进程开始产出结果后，超过该时间（秒）没有新结果视为卡死
+_HANG_TIMEOUT = 15.0
+# 重启退避（秒）
+_RESTART_BACKOFF = (1.0, 2.0, 5.0, 10.0, 30.0)
+# 连续稳定运行超过该时间（秒）后退避计数清零
+_STABLE_AFTER = 60.0
+
+
+def process_mode_requested() -> bool:
+    """是否请求以子进程模式运行推理"""
+    return PROCESS_FLAG in sys.argv or os.environ.get(PROCESS_ENV, "") == "1"
+
+
+# ---------------- 子进程 ----------------
+
+def _control_loop(conn, worker):
+    """读取 UI 进程发来的命令；管道断开（UI 进程退出）时停止推理"""
+    while True:
+        try:
+            cmd, arg = conn.recv()
+        except (EOFError, OSError):
+            worker.stop()
+            return
+        if cmd == "overlay":
+            worker.set_overlay_enabled(arg)
+        elif cmd == "toggles":
+            worker.set_alert_toggles(arg)
+        elif cmd == "stop":
+            worker.stop()
+            return
+
+
+def _child_main(frame_names, frame_lock, result_names, result_lock, conn, cam_id):
+    """子进程入口：挂载共享内存，在主线程里直接运行 AIWorker 的主循环"""
+    frames = SharedFrameRing(names=frame_names, lock=frame_lock)
+    results = ResultRing(names=result_names, lock=result_lock)
+
+    from app.ai_worker import AIWorker
+    worker = AIWorker()
+    worker.cam_id = cam_id
+    # 画面直接写进共享缓冲，载荷写进结果环；两个信号在同一线程内直接调用
+    worker.frame_store = frames
+    worker.update_data_signal.connect(results.write)
+    worker.event_signal.connect(results.write)
+    worker.alert_signal.connect(lambda action: results.write(("alert", action)))
+
+    threading.Thread(target=_control_loop, args=(conn, worker), daemon=True).start()
+    try:
+        worker.run()
+    finally:
+        frames.close()
+        results.close()
+
+
+# ---------------- UI 进程 ----------------
+
+class ProcessWorker(QObject):
+    """
+    UI 进程中的推理子进程代理与看护者。
+    """
+    frame_ready_signal = pyqtSignal(int, int)
+    update_data_signal = pyqtSignal(dict)
+    event_signal = pyqtSignal(list)
+    alert_signal = pyqtSignal(dict)
+
+    def __init__(self, cam_id=0):
+        super().__init__()
+        self.cam_id = cam_id
+        self.overlay_enabled = False
+        self.alert_toggles = None
+
+        # spawn：不继承 UI 进程的 Qt 状态，各平台行为一致
+        self._ctx = mp.get_context("spawn")
+        self.frame_store = SharedFrameRing(lock=self._ctx.Lock())
+        self.results = ResultRing(lock=self._ctx.Lock())
+
+        self._proc = None
+        self._conn = None
+        self._stopping = False
+        self._restart_pending = False
+        self._restarts = 0
+        self._started_at = 0.0
+        self._last_result_seq = 0
+        self._last_result_time = None
+        self._last_frame_seq = 0
+
+        self._timer = QTimer(self)
+        self._timer.setInterval(_POLL_MS)
+        self._timer.timeout.connect(self._poll)
+
+    # ---------- 生命周期 ----------
+
+    def start(self):
+        self._stopping = False
+        self._spawn()
+        self._timer.start()
+
+    def _spawn(self):
+        self._restart_pending = False
+        # 每次启动换新锁：被强制结束的子进程可能死在临界区里
+        self.frame_store.lock = self._ctx.Lock()
+        self.results.lock = self._ctx.Lock()
+        parent_conn, child_conn = self._ctx.Pipe()
+        self._proc = self._ctx.Process(
+            target=_child_main,
+            args=(self.frame_store.names, self.frame_store.lock,
+                  self.results.names, self.results.lock,
+                  child_conn, self.cam_id),
+            name="smartstudy-inference",
+            daemon=True,
+        )
+        self._proc.start()
+        child_conn.close()
+        self._conn = parent_conn
+        self._started_at = time.monotonic()
+        self._last_result_time = None
+        if self.overlay_enabled:
+            self._send("overlay", True)
+        if self.alert_toggles is not None:
+            self._send("toggles", self.alert_toggles)
+        print(f"Info: inference process started (pid {self._proc.pid}).")
+
+    def _send(self, cmd, arg=None):
+        if self._conn is None:
+            return
+        try:
+            self._conn.send((cmd, arg))
+        except (OSError, ValueError):
+            pass
+
+    def stop(self):
+        self._stopping = True
+        self._timer.stop()
+        proc = self._proc
+        if proc is not None:
+            self._send("stop")
+            proc.join(timeout=3.0)
+            if proc.is_alive():
+                proc.terminate()
+                proc.join(timeout=2.0)
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+        self._proc = None
+        self.frame_store.close()
+        self.results.close()
+        print("Info: inference process stopped.")
+
+    def isRunning(self) -> bool:
+        return not self._stopping and (self._restart_pending or
+                                       (self._proc is not None and self._proc.is_alive()))
+
+    def set_overlay_enabled(self, on: bool):
+        self.overlay_enabled = bool(on)
+        self._send("overlay", self.overlay_enabled)
+
+    def set_alert_toggles(self, toggles: dict):
+        self.alert_toggles = dict(toggles)
+        self._send("toggles", self.alert_toggles)
+
+    # ---------- 轮询与看护 ----------
+
+    def _poll(self):
+        now = time.monotonic()
+        for seq, payload in self.results.read_since(self._last_result_seq):
+            self._last_result_seq = seq
+            self._last_result_time = now
+            # 结果环里混有三种条目：事件列表、("alert", 动作) 与完整载荷（出错/叠加层）
+            if isinstance(payload, list):
+                self.event_signal.emit(payload)
+            elif isinstance(payload, tuple):
+                self.alert_signal.emit(payload[1])
+            else:
+                self.update_data_signal.emit(payload)
+
+        frame_seq = self.frame_store.latest_seq
+        if frame_seq > self._last_frame_seq:
+            self._last_frame_seq = frame_seq
+            self.frame_ready_signal.emit(-1, frame_seq)
+
+        self._supervise(now)
+
+    def _supervise(self, now):
+        if self._stopping or self._restart_pending or self._proc is None:
+            return
+        if self._proc.is_alive():
+            if now - self._started_at > _STABLE_AFTER:
+                self._restarts = 0
+            hung = self._last_result_time is not None and now - self._last_result_time > _HANG_TIMEOUT
+            if not hung:
+                return
+            print(f"Warning: inference process unresponsive for {_HANG_TIMEOUT:.0f}s, restarting")
+            self._proc.terminate()
+            self._proc.join(timeout=2.0)
+        else:
+            print(f"Warning: inference process exited (code {self._proc.exitcode}), restarting")
+
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+        delay = _RESTART_BACKOFF[min(self._restarts, len(_RESTART_BACKOFF) - 1)]
+        self._restarts += 1
+        self._restart_pending = True
+        QTimer.singleShot(int(delay * 1000), self._restart)
+
+    def _restart(self):
+        if self._stopping:
+            return
+        self._spawn()
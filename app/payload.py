@@ -0,0 +1,119 @@
+"""
+AIWorker → UI 的数据载荷定义。
+
+每帧组装的载荷只有标量和布尔标志，不再携带 MediaPipe 的 protobuf 对象；
+AIWorker 用 EventDetector 对它做变化检测，UI 收到的是事件和周期摘要
+（见 modules/runtime/events.py）。关键点仅在开启叠加层 (overlay) 时
+以 float32 紧凑字节串的形式附带，整份载荷经 update_data_signal 发送。
+
+载荷结构:
+    {
+        "A": {坐姿标量...},              # 见 POSTURE_FIELDS
+        "B": {专注度标量...},            # 见 ATTENTION_FIELDS
+        "C": {"手部行为": {...}, "手机使用": {...}, "离席检测": {...}},  # 只含 bool
+        "presence": {"mode": "present"/"empty", "present_sec": float, "empty_sec": float},  # 可选
+        "overlay": {                      # 可选，仅 overlay 开启时存在
+            "pose": bytes,                # (33, 3) float32，x/y 为归一化坐标
+            "hands": bytes,               # (H, 21, 3) float32
+            "n_hands": int,
+        },
+    }
+"""
+import numpy as np
+
+# 坐姿 (A)
+POSTURE_FIELDS = (
+    "is_shoulder_tilted", "is_head_forward", "is_hunchback", "is_neck_tilted",
+    "dist_screen", "body_lean",
+    "shoulder_tilt_angle", "head_forward_degree", "hunchback_degree", "neck_tilt",
+    "shoulder_screen_ratio", "lean_degree", "stability_score",
+    "stability_score_long", "hunchback_avg", "head_forward_avg", "bad_posture_ratio",
+)
+
+# 专注度 (B)
+ATTENTION_FIELDS = (
+    "ear", "blink_state", "yaw_angle", "pitch_angle",
+    "gaze_x", "gaze_y", "gaze_off", "attention_score",
+    "perclos", "away_ratio", "down_ratio", "up_ratio",
+    "noface_ratio", "gaze_ratio", "unstable",
+)
+
+POSE_POINTS = 33
+HAND_POINTS = 21
+
+
+def _scalar(v):
+    """numpy 标量转为 Python 内置类型，其余非标量一律丢弃"""
+    # 注意 np.float64 是 float 的子类，需先判断 numpy 类型
+    if isinstance(v, np.bool_):
+        return bool(v)
+    if isinstance(v, np.integer):
+        return int(v)
+    if isinstance(v, np.floating):
+        return float(v)
+    if v is None or isinstance(v, (bool, int, float, str)):
+        return v
+    return None
+
+
+def _pick(data, keys):
+    data = data or {}
+    return {k: _scalar(data.get(k)) for k in keys if k in data}
+
+
+def _flags(c_data):
+    out = {}
+    for group, content in (c_data or {}).items():
+        if isinstance(content, dict):
+            out[group] = {k: bool(v) for k, v in content.items()}
+    return out
+
+
+def pack_landmarks(landmark_list, n_points):
+    """MediaPipe NormalizedLandmarkList → (n_points, 3) float32 字节串"""
+    arr = np.zeros((n_points, 3), dtype=np.float32)
+    for i, lm in enumerate(landmark_list.landmark[:n_points]):
+        arr[i] = (lm.x, lm.y, lm.z)
+    return arr.tobytes()
+
+
+def unpack_landmarks(buf, n_points):
+    """字节串 → (N, n_points, 3) float32 只读视图（不复制）"""
+    if not buf:
+        return np.zeros((0, n_points, 3), dtype=np.float32)
+    return np.frombuffer(buf, dtype=np.float32).reshape(-1, n_points, 3)
+
+
+def build_ui_payload(data_a, data_b, data_c, pose_landmarks=None, hand_landmarks=None, overlay=False,
+                     presence=None):
+    """
+    组装发给 UI 的精简载荷。
+
+    Args:
+        data_a / data_b / data_c (dict): 各检测模块的原始输出。
+        pose_landmarks: MediaPipe 姿态关键点，仅 overlay=True 时打包。
+        hand_landmarks: MediaPipe 手部关键点列表或 (H, 21, 3) 数组，仅 overlay=True 时打包。
+        overlay (bool): 是否附带关键点用于画骨架。
+        presence (dict): 在座/空座模式与各模式累计时长。
+    """
+    payload = {
+        "A": _pick(data_a, POSTURE_FIELDS),
+        "B": _pick(data_b, ATTENTION_FIELDS),
+        "C": _flags(data_c),
+    }
+    if presence:
+        payload["presence"] = {k: _scalar(v) for k, v in presence.items()}
+    if overlay:
+        if isinstance(hand_landmarks, np.ndarray):
+            hands_buf = np.ascontiguousarray(hand_landmarks, dtype=np.float32).tobytes()
+            n_hands = len(hand_landmarks)
+        else:
+            hands = list(hand_landmarks or [])
+            hands_buf = b"".join(pack_landmarks(h, HAND_POINTS) for h in hands)
+            n_hands = len(hands)
+        payload["overlay"] = {
+            "pose": pack_landmarks(pose_landmarks, POSE_POINTS) if pose_landmarks else b"",
+            "hands": hands_buf,
+            "n_hands": n_hands,
+        }
+    return payload
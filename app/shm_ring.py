@@ -0,0 +1,236 @@
+"""
+跨进程共享内存环形缓冲（multiprocessing.shared_memory）
+推理子进程 → UI 进程的数据通道：
+
+- SharedFrameRing：画面缓冲，接口与 FrameStore 一致（acquire_write/publish/acquire_read/release_read），
+  AIWorker 与 MainWindow 无需改动即可跨进程使用；
+- ResultRing：每帧载荷（pickle 后写入定长槽位），读端按序号取出新增的条目，来不及读的旧条目直接覆盖。
+
+两块缓冲都由 UI 进程创建（create=True），子进程按名字挂载；子进程重启后重新挂载同一块内存。
+头部与数据分成两块共享内存，头部是 int64 数组，所有读写都在一把跨进程锁内完成。
+"""
+import pickle
+from multiprocessing import shared_memory
+
+import numpy as np
+
+# 画面缓冲按最大分辨率预分配
+MAX_FRAME_SHAPE = (1080, 1920, 3)
+
+# SharedFrameRing 头部布局
+_F_LATEST, _F_READING, _F_SEQ = 0, 1, 2
+_F_SLOTS = 4            # 之后每个槽位 4 个字段：seq, h, w, c
+_F_SLOT_FIELDS = 4
+
+# ResultRing 头部布局
+_R_SEQ = 0
+_R_SLOTS = 2            # 之后每个槽位 2 个字段：seq, length
+_R_SLOT_FIELDS = 2
+
+
+def _create(size):
+    return shared_memory.SharedMemory(create=True, size=int(size))
+
+
+def _attach(name):
+    # 子进程由 multiprocessing 启动，与 UI 进程共用同一个 resource_tracker，
+    # 挂载不会让内存在子进程退出时被回收；真正的 unlink 只由创建方执行
+    return shared_memory.SharedMemory(name=name)
+
+
+class _Ring:
+    def __init__(self, header_fields, data_size, names=None, lock=None):
+        self.lock = lock
+        self._owner = names is None
+        if self._owner:
+            self._hdr_shm = _create(header_fields * 8)
+            self._data_shm = _create(data_size)
+        else:
+            self._hdr_shm = _attach(names[0])
+            self._data_shm = _attach(names[1])
+        self.header = np.ndarray((header_fields,), dtype=np.int64, buffer=self._hdr_shm.buf)
+        if self._owner:
+            self.header[:] = 0
+
+    @property
+    def names(self):
+        return self._hdr_shm.name, self._data_shm.name
+
+    def _locked(self, timeout=None):
+        if timeout is None:
+            return self.lock.acquire()
+        return self.lock.acquire(timeout=timeout)
+
+    def close(self):
+        # 先释放对共享内存的 numpy 视图，否则 close() 会因仍有导出的缓冲而失败
+        self.header = None
+        self._release_views()
+        for shm in (self._hdr_shm, self._data_shm):
+            try:
+                shm.close()
+            except Exception:
+                pass
+        if self._owner:
+            for shm in (self._hdr_shm, self._data_shm):
+                try:
+                    shm.unlink()
+                except Exception:
+                    pass
+
+    def _release_views(self):
+        pass
+
+
+class SharedFrameRing(_Ring):
+    """
+    与 FrameStore 同样的多缓冲策略：写端不会选中“最新帧”或“正在被读取”的槽位。
+
+    Args:
+        num_buffers: 槽位数（至少 3）。
+        max_shape: 单帧最大尺寸 (h, w, c)。
+        names / lock: 子进程挂载时传入 UI 进程给出的名字和锁。
+    """
+
+    def __init__(self, num_buffers=3, max_shape=MAX_FRAME_SHAPE, names=None, lock=None):
+        if num_buffers < 3:
+            raise ValueError("SharedFrameRing 至少需要 3 块缓冲")
+        self._n = int(num_buffers)
+        self.max_shape = tuple(max_shape)
+        self._slot_bytes = int(np.prod(self.max_shape))
+        super().__init__(_F_SLOTS + _F_SLOT_FIELDS * self._n, self._slot_bytes * self._n, names, lock)
+        if self._owner:
+            self.header[_F_LATEST] = -1
+            self.header[_F_READING] = -1
+        self._shape = None
+        self._views = []
+
+    def _slot_view(self, i, shape):
+        offset = i * self._slot_bytes
+        return np.ndarray(shape, dtype=np.uint8, buffer=self._data_shm.buf, offset=offset)
+
+    def _release_views(self):
+        self._views = []
+
+    # ---------- 写端（子进程）----------
+
+    @property
+    def buffers(self):
+        return self._views
+
+    @property
+    def shape(self):
+        return self._shape
+
+    def acquire_write(self, shape) -> int:
+        shape = tuple(shape)
+        if int(np.prod(shape)) > self._slot_bytes:
+            raise ValueError(f"SharedFrameRing: 画面 {shape} 超过预分配的 {self.max_shape}")
+        if shape != self._shape:
+            self._shape = shape
+            self._views = [self._slot_view(i, shape) for i in range(self._n)]
+        with self.lock:
+            hdr = self.header
+            for i in range(self._n):
+                if i != hdr[_F_LATEST] and i != hdr[_F_READING]:
+                    return i
+        raise RuntimeError("SharedFrameRing: 没有空闲缓冲")
+
+    def publish(self, index: int) -> int:
+        with self.lock:
+            hdr = self.header
+            seq = int(hdr[_F_SEQ]) + 1
+            hdr[_F_SEQ] = seq
+            base = _F_SLOTS + _F_SLOT_FIELDS * index
+            hdr[base:base + 4] = (seq,) + self._shape
+            hdr[_F_LATEST] = index
+            return seq
+
+    # ---------- 读端（UI 进程）----------
+
+    def acquire_read(self, timeout=0.05):
+        """
+        取最新发布的帧，返回 (index, seq, ndarray)；没有帧或锁等待超时时返回 None。
+        调用方用完后必须 release_read()。
+        """
+        if not self._locked(timeout):
+            return None
+        try:
+            hdr = self.header
+            idx = int(hdr[_F_LATEST])
+            if idx < 0:
+                return None
+            hdr[_F_READING] = idx
+            base = _F_SLOTS + _F_SLOT_FIELDS * idx
+            seq, h, w, c = (int(v) for v in hdr[base:base + 4])
+        finally:
+            self.lock.release()
+        return idx, seq, self._slot_view(idx, (h, w, c))
+
+    def release_read(self):
+        with self.lock:
+            self.header[_F_READING] = -1
+
+    @property
+    def latest_seq(self) -> int:
+        return int(self.header[_F_SEQ])
+
+
+class ResultRing(_Ring):
+    """
+    定长槽位的载荷环：write(obj) 由子进程调用，read_since(seq) 由 UI 进程调用。
+
+    Args:
+        slots: 槽位数，读端落后超过该数量时最旧的条目被丢弃。
+        slot_size: 每个槽位的字节数，序列化后超出的载荷丢弃并打印警告。
+    """
+
+    def __init__(self, slots=16, slot_size=64 * 1024, names=None, lock=None):
+        self._n = int(slots)
+        self.slot_size = int(slot_size)
+        super().__init__(_R_SLOTS + _R_SLOT_FIELDS * self._n, self.slot_size * self._n, names, lock)
+        self._warned = False
+
+    def write(self, obj):
+        data = pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL)
+        if len(data) > self.slot_size:
+            if not self._warned:
+                print(f"Warning: result payload {len(data)} bytes exceeds slot size {self.slot_size}, dropped")
+                self._warned = True
+            return
+        with self.lock:
+            hdr = self.header
+            seq = int(hdr[_R_SEQ]) + 1
+            i = seq % self._n
+            off = i * self.slot_size
+            self._data_shm.buf[off:off + len(data)] = data
+            base = _R_SLOTS + _R_SLOT_FIELDS * i
+            hdr[base] = seq
+            hdr[base + 1] = len(data)
+            hdr[_R_SEQ] = seq
+
+    @property
+    def latest_seq(self) -> int:
+        return int(self.header[_R_SEQ])
+
+    def read_since(self, last_seq, timeout=0.05):
+        """返回序号大于 last_seq 的条目 [(seq, obj)]（按序），锁等待超时时返回空列表"""
+        if int(self.header[_R_SEQ]) <= last_seq:
+            return []
+        if not self._locked(timeout):
+            return []
+        raw = []
+        try:
+            hdr = self.header
+            latest = int(hdr[_R_SEQ])
+            first = max(last_seq + 1, latest - self._n + 1)
+            for seq in range(first, latest + 1):
+                i = seq % self._n
+                base = _R_SLOTS + _R_SLOT_FIELDS * i
+                if int(hdr[base]) != seq:
+                    continue
+                off = i * self.slot_size
+                raw.append((seq, bytes(self._data_shm.buf[off:off + int(hdr[base + 1])])))
+        finally:
+            self.lock.release()
+        # 反序列化放在锁外
+        return [(seq, pickle.loads(data)) for seq, data in raw]
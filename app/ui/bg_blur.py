@@ -1,78 +1,343 @@
 import cv2
 import numpy as np
 
-#尝试对包进行导入
-try:
-    import mediapipe as mp
-    _mp_selfie = mp.solutions.selfie_segmentation
-except Exception:
-    _mp_selfie = None
+
+def _load_selfie_segmentation():
+    """首次使用时才导入 mediapipe，导入失败返回 None"""
+    try:
+        import mediapipe as mp
+        return mp.solutions.selfie_segmentation
+    except Exception:
+        return None
+
+
+# 主题参数（核尺寸均按全分辨率给出，实际在缩小后的图上按比例换算）
+_THEME_PARAMS = {
+    "dark": dict(
+        thresh=0.55,
+        feather=17,            # 羽化
+        blur_ks=61,            # 背景更糊
+        tint=(18, 28, 44),
+        tint_alpha=0.18,
+        bg_gamma=0.92,         # 背景略暗
+    ),
+    "light": dict(
+        thresh=0.60,
+        feather=13,
+        blur_ks=45,
+        tint=(235, 245, 255),  # BGR 轻白蓝
+        tint_alpha=0.12,
+        bg_gamma=1.02,         # 背景略提亮
+    ),
+}
+
+# 姿态锚点：鼻尖、左右肩（MediaPipe Pose 索引）
+POSE_ANCHORS = (0, 11, 12)
+
+# 前景混合的定点精度：alpha 取值 0..128（7 位），int16 乘法不会溢出
+_ALPHA_BITS = 7
+_ALPHA_ONE = 1 << _ALPHA_BITS
+
+
+def _odd(k: float, minimum: int = 3) -> int:
+    k = max(minimum, int(round(k)))
+    return k if k % 2 == 1 else k + 1
+
+
+def anchors_from_landmarks(landmark_list, indices=POSE_ANCHORS, min_visibility=0.5):
+    """
+    从 MediaPipe 关键点里取出锚点，返回 (N, 2) 归一化坐标；不可用时返回 None。
+    可直接传入 PostureDetector.last_pose_landmarks。
+    """
+    if landmark_list is None:
+        return None
+    lms = landmark_list.landmark
+    pts = [(lms[i].x, lms[i].y) for i in indices
+           if i < len(lms) and getattr(lms[i], "visibility", 1.0) >= min_visibility]
+    if not pts:
+        return None
+    return np.asarray(pts, dtype=np.float32)
+
+
+def build_grading_lut(tint, tint_alpha, bg_gamma) -> np.ndarray:
+    """
+    背景调色 LUT：把“叠加色调层 + gamma 亮度微调”合并成一次查表。
+    返回 (1, 256, 3) uint8，可直接用于 cv2.LUT 处理 BGR 图像。
+    """
+    v = np.arange(256, dtype=np.float32)[:, None]
+    tint = np.asarray(tint, dtype=np.float32)[None, :]
+    graded = v * (1.0 - tint_alpha) + tint * tint_alpha
+    graded = np.power(graded / 255.0, 1.0 / bg_gamma) * 255.0
+    return np.clip(np.round(graded), 0, 255).astype(np.uint8)[None, :, :]
 
 
 class BackgroundBlur:
     """
     人像背景虚化（带主题差异）
     - theme: "light" / "dark"
+
+    性能要点：
+    - 分割在缩小后的图上运行（seg_width），蒙版羽化也在小图上做，最后线性放大
+    - 背景模糊：缩小 blur_downscale 倍 → 小核高斯 → 调色 LUT → 放大
+    - 色调层与 gamma 预先合成为 256 项 LUT
+    - 前景/背景用 uint8 定点混合，所有中间缓冲按分辨率预分配复用
+
+    蒙版时间复用：
+    - 分割每 seg_interval 帧跑一次；画面运动量（小图灰度与上次分割时的平均差）
+      超过 motion_thresh 时立即重跑
+    - 分割结果与历史蒙版做 EMA（mask_ema 为新结果权重），减少边缘闪烁
+    - 复用期间如果传入姿态锚点，按锚点位移平移缓存蒙版；锚点落在蒙版外则强制重跑
+    - 运动量低于 still_thresh 时连背景模糊也直接复用，静止画面只剩一次混合
+    注意：apply() 返回的是内部输出缓冲，下一次调用前需用完或自行复制。
     """
-    def __init__(self, theme: str = "light"):
+    def __init__(self, theme: str = "light", seg_width: int = 256, blur_downscale: int = 4,
+                 seg_interval: int = 5, motion_thresh: float = 6.0, still_thresh: float = 1.5,
+                 mask_ema: float = 0.6):
         self.theme = theme
         self.enabled = True
+        self.seg_width = int(seg_width)
+        self.blur_downscale = max(1, int(blur_downscale))
+
+        self.seg_interval = max(1, int(seg_interval))
+        self.motion_thresh = float(motion_thresh)
+        self.still_thresh = float(still_thresh)
+        self.mask_ema = min(1.0, max(0.0, float(mask_ema)))
 
+        # 分割模型在第一次 apply 时才创建
         self._segmenter = None
-        if _mp_selfie is not None:
-            self._segmenter = _mp_selfie.SelfieSegmentation(model_selection=1)
+        self._segmenter_loaded = False
+
+        self._luts = {name: build_grading_lut(p["tint"], p["tint_alpha"], p["bg_gamma"])
+                      for name, p in _THEME_PARAMS.items()}
+        self._shape = None
+        self._reset_cache()
+
+    def _reset_cache(self):
+        self._has_mask = False
+        self._fg_roi = None
+        self._alpha_valid = False
+        self._bg_valid = False
+        self._frames_since_seg = 0
+        self._seg_anchor = None   # 上次分割时的锚点中心（小图像素坐标）
+        self._mask_shift = (0.0, 0.0)
 
     def set_theme(self, theme: str):
-        self.theme = theme or "light"
+        theme = theme or "light"
+        if theme != self.theme:
+            # 两种主题的 thresh/feather 不同，蒙版 alpha 也要按新参数重建
+            self._alpha_valid = False
+            self._bg_valid = False
+        self.theme = theme
 
     def set_enabled(self, on: bool):
         self.enabled = bool(on)
 
-    def apply(self, frame_bgr: np.ndarray) -> np.ndarray:
-        if not self.enabled or self._segmenter is None:
-            return frame_bgr
+    def _ensure_segmenter(self):
+        if not self._segmenter_loaded:
+            self._segmenter_loaded = True
+            mp_selfie = _load_selfie_segmentation()
+            if mp_selfie is not None:
+                self._segmenter = mp_selfie.SelfieSegmentation(model_selection=1)
+        return self._segmenter
 
+    def _ensure_buffers(self, frame_bgr):
+        """按分辨率预分配所有中间缓冲"""
         h, w = frame_bgr.shape[:2]
+        if self._shape == (h, w):
+            return
+        self._shape = (h, w)
+
+        sw = min(w, self.seg_width)
+        sh = max(1, int(round(h * sw / float(w))))
+        self._seg_size = (sw, sh)
+        self._seg_bgr = np.empty((sh, sw, 3), dtype=np.uint8)
+        self._seg_rgb = np.empty((sh, sw, 3), dtype=np.uint8)
+        self._seg_gray = np.empty((sh, sw), dtype=np.uint8)
+        self._ref_gray = np.empty((sh, sw), dtype=np.uint8)
+        self._gray_diff = np.empty((sh, sw), dtype=np.uint8)
+        self._mask_ema = np.zeros((sh, sw), dtype=np.float32)
+        self._mask_warp = np.empty((sh, sw), dtype=np.float32)
 
-        # 1) segmentation mask
-        rgb = cv2.cvtColor(frame_bgr, cv2.COLOR_BGR2RGB)
-        res = self._segmenter.process(rgb)
-        if res.segmentation_mask is None:
+        bw = max(1, w // self.blur_downscale)
+        bh = max(1, h // self.blur_downscale)
+        self._blur_size = (bw, bh)
+        self._small = np.empty((bh, bw, 3), dtype=np.uint8)
+
+        self._mask_small = np.empty((sh, sw), dtype=np.uint8)
+        self._mask = np.empty((h, w), dtype=np.uint8)
+        self._alpha = np.empty((h, w, 3), dtype=np.int16)
+        self._bg = np.empty((h, w, 3), dtype=np.uint8)
+        self._diff = np.empty(h * w * 3, dtype=np.int16)   # 按前景区域大小取连续切片
+        self._out = np.empty((h, w, 3), dtype=np.uint8)
+        self._reset_cache()
+
+    def _motion(self):
+        """当前小图与上次分割时的平均灰度差（0..255）"""
+        cv2.cvtColor(self._seg_bgr, cv2.COLOR_BGR2GRAY, dst=self._seg_gray)
+        if not self._has_mask:
+            return float("inf")
+        cv2.absdiff(self._seg_gray, self._ref_gray, dst=self._gray_diff)
+        return float(cv2.mean(self._gray_diff)[0])
+
+    def _anchor_center(self, anchors):
+        if anchors is None or len(anchors) == 0:
+            return None
+        sw, sh = self._seg_size
+        c = np.asarray(anchors, dtype=np.float32).reshape(-1, 2).mean(axis=0)
+        return float(c[0] * sw), float(c[1] * sh)
+
+    def _anchors_outside(self, anchors, mask, thresh):
+        """锚点落在缓存蒙版的背景区域 → 蒙版已失效"""
+        if anchors is None or len(anchors) == 0:
+            return False
+        sw, sh = self._seg_size
+        pts = np.asarray(anchors, dtype=np.float32).reshape(-1, 2)
+        xs = np.clip((pts[:, 0] * sw).astype(np.int32), 0, sw - 1)
+        ys = np.clip((pts[:, 1] * sh).astype(np.int32), 0, sh - 1)
+        return bool(np.any(mask[ys, xs] < thresh))
+
+    def _segment(self):
+        """低分辨率分割并与历史蒙版做 EMA，返回 (sh, sw) float32 蒙版，失败返回 None"""
+        cv2.cvtColor(self._seg_bgr, cv2.COLOR_BGR2RGB, dst=self._seg_rgb)
+        res = self._segmenter.process(self._seg_rgb)
+        mask = res.segmentation_mask
+        if mask is None:
+            return None
+
+        if self._has_mask:
+            cv2.addWeighted(mask, self.mask_ema, self._mask_ema, 1.0 - self.mask_ema, 0.0,
+                            dst=self._mask_ema, dtype=cv2.CV_32F)
+        else:
+            np.copyto(self._mask_ema, mask, casting="unsafe")
+            self._has_mask = True
+
+        np.copyto(self._ref_gray, self._seg_gray)
+        self._frames_since_seg = 0
+        self._mask_shift = (0.0, 0.0)
+        return self._mask_ema
+
+    def _reuse_mask(self, anchors):
+        """复用缓存蒙版；有锚点时按锚点位移平移，位移没变则返回 None 表示 alpha 可直接复用"""
+        center = self._anchor_center(anchors)
+        if center is None or self._seg_anchor is None:
+            return None
+        dx = center[0] - self._seg_anchor[0]
+        dy = center[1] - self._seg_anchor[1]
+        if abs(dx - self._mask_shift[0]) < 0.5 and abs(dy - self._mask_shift[1]) < 0.5:
+            return None
+        self._mask_shift = (dx, dy)
+        m = np.float32([[1, 0, dx], [0, 1, dy]])
+        sw, sh = self._seg_size
+        cv2.warpAffine(self._mask_ema, m, (sw, sh), dst=self._mask_warp,
+                       flags=cv2.INTER_LINEAR, borderMode=cv2.BORDER_REPLICATE)
+        return self._mask_warp
+
+    def _build_alpha(self, mask_small, params):
+        """小图上二值化 + 羽化，放大到全分辨率后转为定点 alpha (0..128)"""
+        h, w = self._shape
+        sw, _ = self._seg_size
+        scale = sw / float(w)
+
+        np.greater(mask_small, params["thresh"], out=self._mask_small, casting="unsafe")
+        self._mask_small *= 255
+        feather = _odd(params["feather"] * scale)
+        cv2.GaussianBlur(self._mask_small, (feather, feather), 0, dst=self._mask_small)
+        cv2.resize(self._mask_small, (w, h), dst=self._mask, interpolation=cv2.INTER_LINEAR)
+
+        # 0..255 → 0..128
+        a = self._alpha[..., 0]
+        np.multiply(self._mask, _ALPHA_ONE, out=a, dtype=np.int16, casting="unsafe")
+        a += 127
+        a //= 255
+        # 展开成三通道，混合时逐元素相乘，避免广播
+        self._alpha[..., 1] = a
+        self._alpha[..., 2] = a
+
+        # 前景所在区域（alpha > 0），区域外直接取背景，不参与混合
+        rows = np.flatnonzero(self._mask_small.any(axis=1))
+        cols = np.flatnonzero(self._mask_small.any(axis=0))
+        if rows.size == 0:
+            self._fg_roi = None
+        else:
+            sh, _ = self._mask_small.shape
+            sy, sx = h / float(sh), w / float(sw)
+            self._fg_roi = (
+                max(0, int((rows[0] - 1) * sy)), min(h, int((rows[-1] + 2) * sy) + 1),
+                max(0, int((cols[0] - 1) * sx)), min(w, int((cols[-1] + 2) * sx) + 1),
+            )
+        return self._alpha
+
+    def _build_background(self, frame_bgr, params):
+        """缩小 → 小核模糊 → LUT 调色 → 放大"""
+        h, w = self._shape
+        cv2.resize(frame_bgr, self._blur_size, dst=self._small, interpolation=cv2.INTER_AREA)
+        k = _odd(params["blur_ks"] / self.blur_downscale)
+        cv2.GaussianBlur(self._small, (k, k), 0, dst=self._small)
+        cv2.LUT(self._small, self._luts.get(self.theme, self._luts["light"]), dst=self._small)
+        cv2.resize(self._small, (w, h), dst=self._bg, interpolation=cv2.INTER_LINEAR)
+        return self._bg
+
+    def _blend(self, fg, bg, alpha):
+        """out = bg + (fg - bg) * alpha / 128，全程整数运算，只在前景区域内计算"""
+        out = self._out
+        np.copyto(out, bg)
+        if self._fg_roi is None:
+            return out
+        y0, y1, x0, x1 = self._fg_roi
+        fg, bg, a = fg[y0:y1, x0:x1], bg[y0:y1, x0:x1], alpha[y0:y1, x0:x1]
+        d = self._diff[:fg.size].reshape(fg.shape)
+        np.subtract(fg, bg, out=d, dtype=np.int16)
+        d *= a
+        d >>= _ALPHA_BITS
+        d += bg
+        np.copyto(out[y0:y1, x0:x1], d, casting="unsafe")
+        return out
+
+    def apply(self, frame_bgr: np.ndarray, anchors=None) -> np.ndarray:
+        """
+        Args:
+            frame_bgr: BGR 原图。
+            anchors: 可选，(N, 2) 归一化坐标的人体锚点（见 anchors_from_landmarks），
+                     用于在复用期间平移/校验缓存蒙版。
+        """
+        if not self.enabled or self._ensure_segmenter() is None:
             return frame_bgr
 
-        mask = res.segmentation_mask  # float32 [0..1]
-        # 根据主题设置阈值和羽化
-        if self.theme == "dark":
-            thresh = 0.55
-            feather = 17   # 羽化
-            blur_ks = 61   # 背景更糊
-            tint = (18, 28, 44)
-            tint_alpha = 0.18
-            bg_gamma = 0.92      # 背景略暗
+        self._ensure_buffers(frame_bgr)
+        params = _THEME_PARAMS["dark" if self.theme == "dark" else "light"]
+
+        # 1) segmentation mask（低分辨率，按节拍/运动触发）
+        cv2.resize(frame_bgr, self._seg_size, dst=self._seg_bgr, interpolation=cv2.INTER_AREA)
+        motion = self._motion()
+        self._frames_since_seg += 1
+
+        need_seg = (
+            not self._has_mask
+            or self._frames_since_seg >= self.seg_interval
+            or motion > self.motion_thresh
+            or self._anchors_outside(anchors, self._mask_ema, params["thresh"])
+        )
+        if need_seg:
+            mask_small = self._segment()
+            if mask_small is None:
+                return frame_bgr
+            self._seg_anchor = self._anchor_center(anchors)
+            self._alpha_valid = False
         else:
-            thresh = 0.60
-            feather = 13
-            blur_ks = 45
-            tint = (235, 245, 255)  # BGR 轻白蓝
-            tint_alpha = 0.12
-            bg_gamma = 1.02         # 背景略提亮
-
-        # 二值化
-        m = (mask > thresh).astype(np.float32)
-        m = cv2.GaussianBlur(m, (feather, feather), 0)
-        m = np.clip(m, 0.0, 1.0)[..., None]  # HxWx1
-
-        # 背景虚化
-        k = blur_ks if blur_ks % 2 == 1 else blur_ks + 1
-        bg_blur = cv2.GaussianBlur(frame_bgr, (k, k), 0)
-
-        # 背景色调玻璃层
-        tint_layer = np.full_like(bg_blur, tint, dtype=np.uint8)
-        bg_styled = cv2.addWeighted(bg_blur, 1.0 - tint_alpha, tint_layer, tint_alpha, 0)
-
-        # 背景亮度微调
-        bg_styled = np.clip(((bg_styled / 255.0) ** (1.0 / bg_gamma)) * 255.0, 0, 255).astype(np.uint8)
-
-        # 合成：前景保持清晰，背景用 styled blur
-        out = frame_bgr.astype(np.float32) * m + bg_styled.astype(np.float32) * (1.0 - m)
-        return out.astype(np.uint8)
+            mask_small = self._reuse_mask(anchors)
+            if mask_small is not None:
+                self._alpha_valid = False
+
+        if not self._alpha_valid:
+            self._build_alpha(mask_small if mask_small is not None else self._mask_ema, params)
+            self._alpha_valid = True
+        alpha = self._alpha
+
+        # 2) 背景虚化 + 调色（画面基本静止时直接复用）
+        if need_seg or not self._bg_valid or motion > self.still_thresh:
+            self._build_background(frame_bgr, params)
+            self._bg_valid = True
+        bg = self._bg
+
+        # 3) 合成：前景保持清晰，背景用 styled blur
+        return self._blend(frame_bgr, bg, alpha)
@@ -1,6 +1,8 @@
 from PyQt5.QtWidgets import QFrame, QGridLayout, QLabel, QSizePolicy
 from PyQt5.QtCore import Qt
 
+from app.ui.dashboard_modules.view_model import behavior_state
+
 def _refresh_style(w):
     w.style().unpolish(w)
     w.style().polish(w)
@@ -15,7 +17,10 @@ class BehaviorLabel(QLabel):
         self.setObjectName("StateInactive")
 
     def set_status(self, is_active: bool):
-        self.setObjectName("StateActive" if is_active else "StateInactive")
+        name = "StateActive" if is_active else "StateInactive"
+        if self.objectName() == name:
+            return
+        self.setObjectName(name)
         _refresh_style(self)
 
 class BehaviorCard(QFrame):
@@ -40,10 +45,18 @@ class BehaviorCard(QFrame):
         layout.addWidget(self.light_away,  1, 1)
 
     def update_data(self, c_data):
-        self.light_phone.set_status(bool(c_data.get("手机使用", {}).get("使用手机", False)))
-
-        h = c_data.get("手部行为", {})
-        self.light_chin.set_status(bool(h.get("托腮", False)))
-        self.light_face.set_status(bool(h.get("频繁摸脸", False)))
-
-        self.light_away.set_status(bool(c_data.get("离席检测", {}).get("离席", False)))
+        # 直接全量刷新（仪表盘栏走 render 的差分路径）
+        self.render(behavior_state(c_data))
+
+    def render(self, changes):
+        """只切换状态真正变化的标签"""
+        lights = {
+            "phone": self.light_phone,
+            "chin": self.light_chin,
+            "face": self.light_face,
+            "away": self.light_away,
+        }
+        for key, active in changes.items():
+            label = lights.get(key)
+            if label is not None:
+                label.set_status(active)
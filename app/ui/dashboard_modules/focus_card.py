@@ -1,6 +1,8 @@
 from PyQt5.QtWidgets import QFrame, QVBoxLayout, QProgressBar, QLabel
 from PyQt5.QtCore import Qt
 
+from app.ui.dashboard_modules.view_model import focus_state
+
 def _refresh_style(w):
     w.style().unpolish(w)
     w.style().polish(w)
@@ -51,45 +53,31 @@ class FocusCard(QFrame):
         _refresh_style(self.score_bar)
 
     def update_data(self, b_data):
-        if not b_data:
-            return
+        # 直接全量刷新（仪表盘栏走 render 的差分路径）
+        state = focus_state(b_data)
+        if state is not None:
+            self.render(state)
 
+    def render(self, changes):
+        """只更新发生变化的字段；样式重刷 (unpolish/polish) 仅在等级切换时执行"""
         # A. 疲劳值
-        # 如果获取到 None，用 or 0.0 强制转为 0.0
-        raw_perclos = float(b_data.get("perclos") or 0.0)
-        perclos_val = int(raw_perclos * 100)
-        self.perclos_bar.setValue(min(perclos_val, 100))
-        self.perclos_bar.setFormat(f"疲劳值: {raw_perclos:.2f}")
-
-        # >0.15 认为疲劳偏高
-        self.perclos_bar.setProperty("barLevel", "bad" if raw_perclos > 0.15 else "good")
-        _refresh_style(self.perclos_bar)
+        if "perclos_value" in changes:
+            self.perclos_bar.setValue(changes["perclos_value"])
+        if "perclos_format" in changes:
+            self.perclos_bar.setFormat(changes["perclos_format"])
+        if "perclos_level" in changes:
+            self.perclos_bar.setProperty("barLevel", changes["perclos_level"])
+            _refresh_style(self.perclos_bar)
 
         # B. 专注分
-        # 如果获取到 None，用 or 100 默认满分
-        score = int(b_data.get("attention_score") or 100)
-        self.score_bar.setValue(score)
-        self.score_bar.setProperty("barLevel", "bad" if score < 60 else "good")
-        _refresh_style(self.score_bar)
-
-        # C. 眼睛状态
-        state = b_data.get("blink_state", "no_face")
-        if state == "open":
-            eye_cn = "睁开"
-        elif state == "closed":
-            eye_cn = "闭合"
-        elif state == "half":
-            eye_cn = "半眯"
-        else:
-            eye_cn = "检测中"
-        
-        self.val_eye.setText(f"眼睛: {eye_cn}")
-
-        # D. 分心率 
-        r_away = float(b_data.get("away_ratio") or 0.0)
-        r_down = float(b_data.get("down_ratio") or 0.0)
-        r_gaze = float(b_data.get("gaze_ratio") or 0.0)
-        
-        # 取最大值显示
-        max_dis = max(r_away, r_down, r_gaze)
-        self.val_distraction.setText(f"分心率: {int(max_dis * 100)}%")
\ No newline at end of file
+        if "score_value" in changes:
+            self.score_bar.setValue(changes["score_value"])
+        if "score_level" in changes:
+            self.score_bar.setProperty("barLevel", changes["score_level"])
+            _refresh_style(self.score_bar)
+
+        # C. 眼睛状态 / D. 分心率
+        if "eye_text" in changes:
+            self.val_eye.setText(changes["eye_text"])
+        if "distraction_text" in changes:
+            self.val_distraction.setText(changes["distraction_text"])
@@ -1,6 +1,8 @@
 from PyQt5.QtWidgets import QFrame, QGridLayout, QLabel
 from PyQt5.QtCore import Qt
 
+from app.ui.dashboard_modules.view_model import posture_state
+
 def _refresh_style(w):
     w.style().unpolish(w)
     w.style().polish(w)
@@ -42,16 +44,20 @@ class PostureCard(QFrame):
         layout.addWidget(self.val_neck,       3, 1)
 
     def update_data(self, a_data):
-        is_bad = bool(a_data.get("is_hunchback")) or bool(a_data.get("is_shoulder_tilted"))
-
-        self.posture_status.setText("姿态异常" if is_bad else "姿态标准")
-        self.posture_status.setProperty("state", "bad" if is_bad else "good")
-        _refresh_style(self.posture_status)
-
-        self.val_shoulder.setText(f"肩斜: {float(a_data.get('shoulder_tilt_angle', 0.0)):.1f}°")
-        self.val_neck.setText(f"颈前: {float(a_data.get('neck_tilt', 0.0)):.1f}°")
-
-        raw_dist = a_data.get("dist_screen", "normal")
-        dist_map = {"normal": "正常", "too_close": "太近", "too_far": "太远"}
-        dist_text = f"{raw_dist:.1f} cm" if isinstance(raw_dist, (int, float)) else dist_map.get(str(raw_dist), "正常")
-        self.val_dist.setText(f"距离: {dist_text}")
+        # 直接全量刷新（仪表盘栏走 render 的差分路径）
+        self.render(posture_state(a_data))
+
+    def render(self, changes):
+        """只更新发生变化的字段；状态颜色切换时才重刷样式"""
+        if "posture_text" in changes:
+            self.posture_status.setText(changes["posture_text"])
+        if "posture_state" in changes:
+            self.posture_status.setProperty("state", changes["posture_state"])
+            _refresh_style(self.posture_status)
+
+        if "shoulder_text" in changes:
+            self.val_shoulder.setText(changes["shoulder_text"])
+        if "neck_text" in changes:
+            self.val_neck.setText(changes["neck_text"])
+        if "dist_text" in changes:
+            self.val_dist.setText(changes["dist_text"])
@@ -0,0 +1,126 @@
+"""
+仪表盘视图模型
+把 AI 线程的原始数据 (A/B/C) 转换为各卡片要显示的文字/状态，
+并与上一次已渲染的状态做差分，只把真正变化的字段交给卡片更新。
+本文件不依赖 Qt，方便单独调试。
+"""
+
+_EYE_TEXT = {"open": "睁开", "closed": "闭合", "half": "半眯"}
+_DIST_TEXT = {"normal": "正常", "too_close": "太近", "too_far": "太远"}
+
+
+def focus_state(b_data):
+    """模块 1.1 注意力监控；无数据时返回 None（保持上一次显示）"""
+    if not b_data:
+        return None
+
+    # 如果获取到 None，用 or 0.0 强制转为 0.0
+    raw_perclos = float(b_data.get("perclos") or 0.0)
+    # 如果获取到 None，用 or 100 默认满分
+    score = int(b_data.get("attention_score") or 100)
+
+    state = b_data.get("blink_state", "no_face")
+    eye_cn = _EYE_TEXT.get(state, "检测中")
+
+    # 分心率取最大值显示
+    max_dis = max(
+        float(b_data.get("away_ratio") or 0.0),
+        float(b_data.get("down_ratio") or 0.0),
+        float(b_data.get("gaze_ratio") or 0.0),
+    )
+
+    return {
+        "perclos_value": min(int(raw_perclos * 100), 100),
+        "perclos_format": f"疲劳值: {raw_perclos:.2f}",
+        # >0.15 认为疲劳偏高
+        "perclos_level": "bad" if raw_perclos > 0.15 else "good",
+        "score_value": score,
+        "score_level": "bad" if score < 60 else "good",
+        "eye_text": f"眼睛: {eye_cn}",
+        "distraction_text": f"分心率: {int(max_dis * 100)}%",
+    }
+
+
+def posture_state(a_data):
+    """模块 1.2 姿态监控"""
+    a_data = a_data or {}
+    is_bad = bool(a_data.get("is_hunchback")) or bool(a_data.get("is_shoulder_tilted"))
+
+    raw_dist = a_data.get("dist_screen", "normal")
+    if isinstance(raw_dist, (int, float)):
+        dist_text = f"{raw_dist:.1f} cm"
+    else:
+        dist_text = _DIST_TEXT.get(str(raw_dist), "正常")
+
+    return {
+        "posture_text": "姿态异常" if is_bad else "姿态标准",
+        "posture_state": "bad" if is_bad else "good",
+        "shoulder_text": f"肩斜: {float(a_data.get('shoulder_tilt_angle', 0.0)):.1f}°",
+        "neck_text": f"颈前: {float(a_data.get('neck_tilt', 0.0)):.1f}°",
+        "dist_text": f"距离: {dist_text}",
+    }
+
+
+def behavior_state(c_data):
+    """模块 1.3 行为监控"""
+    c_data = c_data or {}
+    h = c_data.get("手部行为", {})
+    return {
+        "phone": bool(c_data.get("手机使用", {}).get("使用手机", False)),
+        "chin": bool(h.get("托腮", False)),
+        "face": bool(h.get("频繁摸脸", False)),
+        "away": bool(c_data.get("离席检测", {}).get("离席", False)),
+    }
+
+
+class DashboardViewModel:
+    """
+    合并 + 差分。
+
+    push() 只记录最新一帧数据（可以被 AI 线程高频调用），
+    take_changes() 在 UI 刷新节拍上调用，返回 {section: {key: value}}，
+    只包含与上一次渲染相比发生变化的字段；没有变化时返回空字典。
+    """
+
+    SECTIONS = (
+        ("focus", focus_state),
+        ("posture", posture_state),
+        ("behavior", behavior_state),
+    )
+
+    def __init__(self):
+        self._pending = None
+        self._rendered = {name: {} for name, _ in self.SECTIONS}
+
+    def push(self, a, b, c):
+        # 后来的数据直接覆盖，未渲染的中间帧被合并掉
+        self._pending = {"focus": b, "posture": a, "behavior": c}
+
+    @property
+    def dirty(self) -> bool:
+        return self._pending is not None
+
+    def take_changes(self) -> dict:
+        pending, self._pending = self._pending, None
+        if pending is None:
+            return {}
+
+        changes = {}
+        for name, builder in self.SECTIONS:
+            state = builder(pending[name])
+            if state is None:
+                continue
+            last = self._rendered[name]
+            diff = {k: v for k, v in state.items() if last.get(k, _MISSING) != v}
+            if diff:
+                last.update(diff)
+                changes[name] = diff
+        return changes
+
+    def reset(self):
+        """主题切换等场景下强制下一次全量渲染"""
+        for last in self._rendered.values():
+            last.clear()
+
+
+_MISSING = object()
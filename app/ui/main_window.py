@@ -8,7 +8,6 @@ from PyQt5.QtCore import Qt, QRect
 from PyQt5.QtGui import QImage, QPixmap
 
 from app.audio_manager import SoundMgr
-from app.ai_worker import AIWorker
 
 # 导入路径指向分类文件夹
 from app.ui.styles import (
@@ -40,10 +39,8 @@ class MainWindow(QMainWindow):
         self._theme_name = "light"
         self._theme = theme_by_name(self._theme_name)
 
-        # 状态监控相关变量（用于去抖动和冷却）
-        self.pending_issue = None
-        self.issue_start_time = 0
-        self.last_beep_time = 0
+        # 事件通道的状态镜像（提醒规则在 AI 线程求值，这里只用于刷新仪表盘）
+        self.live_state = None
 
         # Type1 (轻度提示) 冷却机制
         self._toast_last_time_by_msg = {}
@@ -223,70 +220,28 @@ class MainWindow(QMainWindow):
         self._type2_open = False
         self._type2_last_close_time = time.time()
 
-        self.pending_issue = None
-        self.issue_start_time = 0
-
-    def update_dashboard(self, data):
+    def update_dashboard(self, events):
         """
-        处理 AI 线程返回的数据。
-
-        功能：
-        1. 更新底部仪表盘显示。
-        2. 执行业务逻辑判断（如疲劳检测、姿态检测）。
-        3. 触发相应的视觉和声音警报。
+        处理 AI 线程发来的事件：更新状态镜像，收到摘要时刷新底部仪表盘。
+        违规判断由 AI 线程的提醒规则完成（见 on_alert）。
         """
-        if "Error" in data:
-            return
+        state = self.live_state
+        last_summary_ts = state.summary_ts
+        state.apply(events)
 
-        a, b, c = data.get("A", {}), data.get("B", {}), data.get("C", {})
-        config = self.controls_panel.get_config()
-        now = time.time()
+        # 更新仪表盘数据（摘要里是完整的精简载荷）
+        if state.summary_ts != last_summary_ts:
+            summary = state.summary
+            self.bottom_monitor.update_data(summary.get("A", {}), summary.get("B", {}), summary.get("C", {}))
 
-        # 更新仪表盘数据
-        self.bottom_monitor.update_data(a, b, c)
-
-        issue_msg = None
-        issue_level = 0
-
-        # 检测 重度 违规
-        if config["phone"] and c.get("手机使用", {}).get("使用手机"):
-            issue_msg, issue_level = "禁止使用手机", 2
-        elif config["away"] and c.get("离席检测", {}).get("离席"):
-            issue_msg, issue_level = "检测到离席", 2
-
-        # 检测 轻度 违规，仅在无重度违规时检测
-        if not issue_msg:
-            if config["dist"] and str(a.get("dist_screen")) == "too_close":
-                issue_msg, issue_level = "离屏幕太近了", 1
-            elif config["sleep"] and b.get("blink_state") == "close":
-                issue_msg, issue_level = "请勿闭眼", 1
-            elif config["chin"] and c.get("手部行为", {}).get("托腮"):
-                issue_msg, issue_level = "请勿托腮", 1
-            elif config["face"] and c.get("手部行为", {}).get("频繁摸脸"):
-                issue_msg, issue_level = "不要摸脸", 1
-            elif config["posture"]:
-                if a.get("neck_tilt", 0) > 25:
-                    issue_msg, issue_level = "脖子前伸", 1
-                elif a.get("is_hunchback") or abs(a.get("shoulder_tilt_angle", 0)) > 5:
-                    issue_msg, issue_level = "坐姿不正", 1
-
-        # 违规报警逻辑 (2秒持续时间确认)
-        if issue_msg:
-            if issue_msg != self.pending_issue:
-                self.pending_issue = issue_msg
-                self.issue_start_time = now
-
-            if now - self.issue_start_time >= 2.0:
-                self.show_alert(issue_msg, issue_level)
-
-                # 声音提示 (4秒冷却)
-                if now - self.last_beep_time > 4.0 and config["volume"] > 0:
-                    sound_name = "alarm" if issue_level == 2 else "alert"
-                    SoundMgr.play(sound_name)
-                    self.last_beep_time = now
-        else:
-            self.pending_issue = None
-            self.issue_start_time = 0
+    def on_alert(self, action):
+        """
+        执行提醒规则产生的动作：视觉提示 + 提示音。
+        持续时间确认与冷却已由规则引擎处理。
+        """
+        self.show_alert(action["message"], action["level"])
+        if action.get("sound") and self.controls_panel.slider_vol.value() > 0:
+            SoundMgr.play(action["sound"])
 
     def show_alert(self, msg, level):
         """显示视觉提示 (气泡或模态弹窗)。"""
@@ -319,16 +274,51 @@ class MainWindow(QMainWindow):
 
     def start_worker(self):
         """启动 AI 处理线程。"""
-        self.thread = AIWorker()
-        self.thread.change_pixmap_signal.connect(self.update_image)
-        self.thread.update_data_signal.connect(self.update_dashboard)
+        # 延迟导入：ai_worker 会牵引 cv2 等重型依赖，窗口显示之后再加载
+        from app.inference_process import ProcessWorker, process_mode_requested
+        from modules.runtime.events import EventState
+
+        if process_mode_requested():
+            # 推理放到子进程，UI 进程只负责绘制
+            self.thread = ProcessWorker()
+        else:
+            from app.ai_worker import AIWorker
+            self.thread = AIWorker()
+        self._frame_store = self.thread.frame_store
+        self._last_frame_seq = 0
+        self.thread.frame_ready_signal.connect(self.update_image)
+        # 检测结果只走事件通道；完整载荷（update_data_signal）仅在出错/叠加层时才有
+        self.thread.event_signal.connect(self.update_dashboard)
+        self.thread.alert_signal.connect(self.on_alert)
+        self.live_state = EventState()
+        # 控制面板开关下发给规则引擎（只在变化时发送）
+        self.thread.set_alert_toggles(self.controls_panel.get_toggles())
+        self.controls_panel.toggles_changed.connect(self.thread.set_alert_toggles)
         self.thread.start()
 
-    def update_image(self, cv_img):
-        """刷新视频帧显示。"""
-        h, w, ch = cv_img.shape
-        qt_img = QImage(cv_img.data, w, h, ch * w, QImage.Format_RGB888)
-        self.video_label.setPixmap(QPixmap.fromImage(qt_img))
+    def update_image(self, index, seq):
+        """
+        刷新视频帧显示。
+
+        Args:
+            index (int): 共享缓冲索引（仅作提示，实际总是读取最新一帧）。
+            seq (int): 帧序号，用于丢弃排队中已过期的信号。
+        """
+        if seq <= self._last_frame_seq:
+            return
+
+        item = self._frame_store.acquire_read()
+        if item is None:
+            return
+        try:
+            _, latest_seq, buf = item
+            # QImage 直接引用共享缓冲，QPixmap.fromImage 是每帧唯一的一次上传
+            h, w, ch = buf.shape
+            qt_img = QImage(buf.data, w, h, ch * w, QImage.Format_RGB888)
+            self.video_label.setPixmap(QPixmap.fromImage(qt_img))
+            self._last_frame_seq = latest_seq
+        finally:
+            self._frame_store.release_read()
 
         # 保持 Overlay 层在视频上方
         self.overlay.raise_()
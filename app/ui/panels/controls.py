@@ -2,10 +2,13 @@ from PyQt5.QtWidgets import (
     QFrame, QVBoxLayout, QCheckBox, QLabel,
     QSlider, QHBoxLayout, QGroupBox
 )
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import Qt, pyqtSignal
 
 
 class ControlsPanel(QFrame):
+    # 任一检测开关变化时发出全部开关状态（提醒规则的 toggle）
+    toggles_changed = pyqtSignal(dict)
+
     def __init__(self, parent=None):
         super().__init__(parent)
 
@@ -97,9 +100,10 @@ class ControlsPanel(QFrame):
         chk.setChecked(True)
         chk.setCursor(Qt.PointingHandCursor)
         chk.setLayoutDirection(Qt.RightToLeft)  # 文字左，对号右
+        chk.toggled.connect(lambda _: self.toggles_changed.emit(self.get_toggles()))
         return chk
 
-    def get_config(self):
+    def get_toggles(self):
         return {
             "phone": self.chk_phone.isChecked(),
             "away": self.chk_away.isChecked(),
@@ -108,5 +112,9 @@ class ControlsPanel(QFrame):
             "dist": self.chk_dist.isChecked(),
             "chin": self.chk_chin.isChecked(),
             "face": self.chk_face.isChecked(),
-            "volume": self.slider_vol.value(),
         }
+
+    def get_config(self):
+        config = self.get_toggles()
+        config["volume"] = self.slider_vol.value()
+        return config
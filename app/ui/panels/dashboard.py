@@ -1,15 +1,24 @@
 from PyQt5.QtWidgets import QWidget, QHBoxLayout
+from PyQt5.QtCore import QTimer
 
 from app.ui.dashboard_modules.focus_card import FocusCard
 from app.ui.dashboard_modules.posture_card import PostureCard
 from app.ui.dashboard_modules.behavior_card import BehaviorCard
+from app.ui.dashboard_modules.view_model import DashboardViewModel
 
 #主要用于控制横向模块
 class HorizontalMonitorBar(QWidget):
     def __init__(self, parent=None):
         super().__init__(parent)
+        self.view_model = DashboardViewModel()
         self.init_ui()
 
+        # 按屏幕刷新率合并刷新：AI 线程每帧只记录数据，真正改控件在定时器节拍上
+        self._flush_timer = QTimer(self)
+        self._flush_timer.setInterval(self._refresh_interval_ms())
+        self._flush_timer.timeout.connect(self.flush)
+        self._flush_timer.start()
+
     def init_ui(self):
         self.main_layout = QHBoxLayout(self)
         self.main_layout.setContentsMargins(5, 5, 5, 5)
@@ -25,8 +34,23 @@ class HorizontalMonitorBar(QWidget):
         self.main_layout.addWidget(self.card_posture, stretch=1)
         self.main_layout.addWidget(self.card_behavior, stretch=1)
 
+    def _refresh_interval_ms(self) -> int:
+        screen = self.screen() if hasattr(self, "screen") else None
+        hz = screen.refreshRate() if screen is not None else 60.0
+        return max(8, int(1000.0 / max(1.0, hz)))
+
     def update_data(self, a, b, c):
-        # 将数据分发给各个子模块
-        self.card_focus.update_data(b)      # B数据 专注模块
-        self.card_posture.update_data(a)    # A数据 坐姿模块
-        self.card_behavior.update_data(c)   # C数据 行为模块
\ No newline at end of file
+        # 只记录最新数据，不直接触碰控件
+        self.view_model.push(a, b, c)
+
+    def flush(self):
+        # 将差分结果分发给各个子模块
+        if not self.view_model.dirty:
+            return
+        changes = self.view_model.take_changes()
+        if "focus" in changes:
+            self.card_focus.render(changes["focus"])        # B数据 专注模块
+        if "posture" in changes:
+            self.card_posture.render(changes["posture"])    # A数据 坐姿模块
+        if "behavior" in changes:
+            self.card_behavior.render(changes["behavior"])  # C数据 行为模块
@@ -0,0 +1,69 @@
+from PyQt5.QtCore import Qt, QRectF
+from PyQt5.QtGui import QPixmap, QPainter, QPainterPath
+
+
+class RenderCache:
+    """
+    单槽渲染缓存：把“等比铺满 + 居中裁剪 + 圆角”的结果缓存成一张与控件同尺寸的 QPixmap。
+
+    缓存键为 (源图 cacheKey, 控件尺寸, 圆角, 缩放模式, 设备像素比)，
+    只有窗口缩放或换图时才会重新渲染；Toast 动画、视频叠层等引起的普通重绘直接贴图即可。
+    """
+
+    def __init__(self):
+        self._key = None
+        self._pix = None
+        self._path_key = None
+        self._path = None
+
+    def invalidate(self):
+        self._key = None
+        self._pix = None
+
+    def clip_path(self, w: int, h: int, radius: float) -> QPainterPath:
+        """圆角裁剪路径（按尺寸/圆角缓存）"""
+        key = (w, h, radius)
+        if key != self._path_key:
+            path = QPainterPath()
+            path.addRoundedRect(QRectF(0, 0, w, h), radius, radius)
+            self._path_key = key
+            self._path = path
+        return self._path
+
+    def cover(self, src: QPixmap, size, radius: float = 0,
+              transform=Qt.SmoothTransformation, dpr: float = 1.0) -> QPixmap:
+        """
+        返回铺满 size 的渲染结果（命中缓存时不做任何缩放）。
+
+        Args:
+            src (QPixmap): 源图。
+            size (QSize): 目标控件尺寸（逻辑像素）。
+            radius (float): 圆角半径，0 表示不裁圆角。
+            transform: Qt.SmoothTransformation / Qt.FastTransformation。
+            dpr (float): 设备像素比，高分屏下按物理像素渲染以保持清晰。
+        """
+        w, h = size.width(), size.height()
+        key = (src.cacheKey(), w, h, radius, int(transform), dpr)
+        if key == self._key:
+            return self._pix
+
+        pw, ph = max(1, int(round(w * dpr))), max(1, int(round(h * dpr)))
+        scaled = src.scaled(pw, ph, Qt.KeepAspectRatioByExpanding, transform)
+        x = (scaled.width() - pw) // 2
+        y = (scaled.height() - ph) // 2
+        out = scaled.copy(x, y, pw, ph)
+
+        if radius > 0:
+            rounded = QPixmap(pw, ph)
+            rounded.fill(Qt.transparent)
+            p = QPainter(rounded)
+            p.setRenderHint(QPainter.Antialiasing, True)
+            p.setClipPath(self.clip_path(pw, ph, radius * dpr))
+            p.drawPixmap(0, 0, out)
+            p.end()
+            out = rounded
+
+        out.setDevicePixelRatio(dpr)
+        self._key = key
+        self._pix = out
+        return out
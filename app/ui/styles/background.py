@@ -1,19 +1,23 @@
 from PyQt5.QtWidgets import QWidget
 from PyQt5.QtGui import QPainter, QPixmap, QColor
-from PyQt5.QtCore import Qt
+
+from app.ui.render_cache import RenderCache
 
 #设置了标签背景
 class BackgroundWidget(QWidget):
     def __init__(self, parent=None):
         super().__init__(parent)
-        self._bg_color = QColor("#000000") 
+        self._bg_color = QColor("#000000")
         self._bg_pix = None
+        # 缩放后的背景图缓存，只在换主题或窗口尺寸变化时重建
+        self._cache = RenderCache()
 
     def set_background(self, color: str, image_path: str):
         self._bg_color = QColor(color) if not isinstance(color, QColor) else color
 
         pix = QPixmap(image_path) if image_path else QPixmap()
         self._bg_pix = pix if not pix.isNull() else None
+        self._cache.invalidate()
         self.update()
 
     def paintEvent(self, event):
@@ -21,11 +25,5 @@ class BackgroundWidget(QWidget):
         p.fillRect(self.rect(), self._bg_color)
 
         if self._bg_pix:
-            scaled = self._bg_pix.scaled(
-                self.size(),
-                Qt.KeepAspectRatioByExpanding,
-                Qt.SmoothTransformation
-            )
-            x = (scaled.width() - self.width()) // 2
-            y = (scaled.height() - self.height()) // 2
-            p.drawPixmap(-x, -y, scaled)
\ No newline at end of file
+            scaled = self._cache.cover(self._bg_pix, self.size(), dpr=self.devicePixelRatioF())
+            p.drawPixmap(0, 0, scaled)
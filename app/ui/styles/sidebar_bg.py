@@ -1,6 +1,8 @@
 from PyQt5.QtWidgets import QFrame
-from PyQt5.QtGui import QPainter, QPixmap, QPainterPath
-from PyQt5.QtCore import Qt, QRectF
+from PyQt5.QtGui import QPainter, QPixmap
+from PyQt5.QtCore import Qt
+
+from app.ui.render_cache import RenderCache
 
 # 横向部分背景
 class SidebarBackgroundFrame(QFrame):
@@ -8,11 +10,14 @@ class SidebarBackgroundFrame(QFrame):
         super().__init__(parent)
         self._pix = None
         self._radius = radius
+        # 缩放 + 圆角裁剪后的背景图缓存
+        self._cache = RenderCache()
         self.setAttribute(Qt.WA_StyledBackground, True)
 
     def set_bg_image(self, image_path: str):
         pix = QPixmap(image_path) if image_path else QPixmap()
         self._pix = pix if not pix.isNull() else None
+        self._cache.invalidate()
         self.update()
 
     def paintEvent(self, event):
@@ -21,21 +26,7 @@ class SidebarBackgroundFrame(QFrame):
         if not self._pix:
             return
 
+        # 背景图铺满 + 圆角（已预先渲染进缓存）
         p = QPainter(self)
-        p.setRenderHint(QPainter.Antialiasing)
-
-        # 圆角裁剪
-        path = QPainterPath()
-        path.addRoundedRect(QRectF(self.rect()), self._radius, self._radius)
-        p.setClipPath(path)
-
-        # 背景图铺满
-        scaled = self._pix.scaled(
-            self.size(),
-            Qt.KeepAspectRatioByExpanding,
-            Qt.SmoothTransformation
-        )
-
-        x = (scaled.width() - self.width()) // 2
-        y = (scaled.height() - self.height()) // 2
-        p.drawPixmap(-x, -y, scaled)
+        bg = self._cache.cover(self._pix, self.size(), self._radius, dpr=self.devicePixelRatioF())
+        p.drawPixmap(0, 0, bg)
@@ -1,14 +1,24 @@
+import time
+
 from PyQt5.QtWidgets import QLabel
-from PyQt5.QtCore import Qt, QRectF
-from PyQt5.QtGui import QPixmap, QPainter, QPainterPath
+from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QPixmap, QPainter
+
+from app.ui.render_cache import RenderCache
 
 #把显示的 pixmap 裁成圆角，为避免冲突选择在 paintEvent 内裁剪绘制
+#缩放 + 圆角结果缓存在 RenderCache 中，只有换帧/缩放窗口时才重新渲染
 class RoundedImageLabel(QLabel):
 
     def __init__(self, radius: int = 18, parent=None):
         super().__init__(parent)
         self._radius = int(radius)
         self._raw_pixmap = None
+        self._cache = RenderCache()
+
+        # 帧间隔的滑动估计，用于选择缩放算法
+        self._last_set_time = 0.0
+        self._frame_interval = 1.0
 
         self.setAlignment(Qt.AlignCenter)
         self.setScaledContents(False)  # 缩放裁剪
@@ -18,42 +28,47 @@ class RoundedImageLabel(QLabel):
 
     def setRadius(self, r: int):
         self._radius = int(r)
+        self._cache.invalidate()
         self.update()
 
     def setPixmap(self, pm: QPixmap):
         # 只缓存原始图，不在这里做 QPainter + super().setPixmap(out)
+        now = time.perf_counter()
+        if self._last_set_time > 0:
+            dt = now - self._last_set_time
+            self._frame_interval = 0.8 * self._frame_interval + 0.2 * dt
+        self._last_set_time = now
+
         self._raw_pixmap = pm
         self.update()
 
+    def _refresh_period(self) -> float:
+        screen = self.screen() if hasattr(self, "screen") else None
+        hz = screen.refreshRate() if screen is not None else 60.0
+        return 1.0 / max(1.0, hz)
+
+    def _transform_mode(self):
+        # 帧率高于屏幕刷新率时，平滑缩放的结果大多看不到，改用快速缩放
+        if self._frame_interval < self._refresh_period():
+            return Qt.FastTransformation
+        return Qt.SmoothTransformation
+
     def resizeEvent(self, e):
         super().resizeEvent(e)
         self.update()
 
     def paintEvent(self, event):
         p = QPainter(self)
-        p.setRenderHint(QPainter.Antialiasing, True)
-        p.setRenderHint(QPainter.SmoothPixmapTransform, True)
-
-        rect = QRectF(self.rect())
-
-        # 圆角裁剪
-        path = QPainterPath()
-        path.addRoundedRect(rect, self._radius, self._radius)
-        p.setClipPath(path)
 
         if self._raw_pixmap and not self._raw_pixmap.isNull():
-            # 等比放大填充
-            scaled = self._raw_pixmap.scaled(
-                self.size(),
-                Qt.KeepAspectRatioByExpanding,
-                Qt.SmoothTransformation
+            # 等比放大填充 + 圆角，命中缓存时只是一次贴图
+            pix = self._cache.cover(
+                self._raw_pixmap, self.size(), self._radius,
+                self._transform_mode(), self.devicePixelRatioF()
             )
-            x = (scaled.width() - self.width()) // 2
-            y = (scaled.height() - self.height()) // 2
-            p.drawPixmap(-x, -y, scaled)
+            p.drawPixmap(0, 0, pix)
         else:
             # 没有画面时显示文字
-            p.setClipping(False)
             p.drawText(self.rect(), Qt.AlignCenter, self.text())
 
         p.end()
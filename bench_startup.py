@@ -0,0 +1,166 @@
+# 此程序用于测量冷启动耗时：从进程启动到主窗口第一次绘制 (first paint)
+# 同时解析 `python -X importtime` 的输出，检查首帧之前是否导入了重型 CV/ML 库
+#
+# 用法:
+#   python bench_startup.py                 # 跑 3 次取中位数
+#   python bench_startup.py --runs 5 --top 15
+#   python bench_startup.py --offscreen     # 无显示器环境 (CI/服务器)
+#   python bench_startup.py --out bench_output.txt   # 追加结果，便于跟踪趋势
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+from pathlib import Path
+
+project_root = Path(__file__).resolve().parent
+if str(project_root) not in sys.path:
+    sys.path.append(str(project_root))
+
+# 首帧之前不允许出现的重型依赖（顶层包名）
+HEAVY_PACKAGES = ("mediapipe", "ultralytics", "torch", "tensorflow", "cv2")
+
+PAINT_MARKER = "BENCH_FIRST_PAINT"
+T0_ENV = "SMARTSTUDY_BENCH_T0"
+
+
+def run_child():
+    """子进程：创建窗口，首次绘制时打印耗时后立即退出（不启动 AIWorker）"""
+    t0 = float(os.environ.get(T0_ENV, time.time()))
+
+    from PyQt5.QtWidgets import QApplication
+    from PyQt5.QtCore import QObject, QEvent, QTimer
+
+    app = QApplication(sys.argv)
+    from app.ui.main_window import MainWindow
+
+    class _FirstPaintFilter(QObject):
+        def __init__(self):
+            super().__init__()
+            self.done = False
+
+        def eventFilter(self, obj, event):
+            if not self.done and event.type() == QEvent.Paint:
+                self.done = True
+                elapsed_ms = (time.time() - t0) * 1000.0
+                # 与 importtime 输出写在同一个流里，父进程据此切分“首帧前/后”的导入
+                sys.stderr.write(f"{PAINT_MARKER} {elapsed_ms:.1f}\n")
+                sys.stderr.flush()
+                QTimer.singleShot(0, app.quit)
+            return False
+
+    win = MainWindow()
+    paint_filter = _FirstPaintFilter()
+    win.installEventFilter(paint_filter)
+    win.show()
+
+    # 兜底：10 秒内没有绘制则退出
+    QTimer.singleShot(10000, app.quit)
+    app.exec_()
+    return 0 if paint_filter.done else 1
+
+
+def parse_importtime(stderr_text):
+    """
+    解析 -X importtime 输出。
+    返回 (首帧耗时 ms 或 None, 首帧前导入列表 [(模块名, self_us, cumulative_us, 层级)])
+    """
+    paint_ms = None
+    imports = []
+    for line in stderr_text.splitlines():
+        if line.startswith(PAINT_MARKER):
+            paint_ms = float(line.split()[1])
+            break
+        if not line.startswith("import time:"):
+            continue
+        body = line[len("import time:"):]
+        parts = body.split("|")
+        if len(parts) != 3:
+            continue
+        try:
+            self_us = int(parts[0].strip())
+            cum_us = int(parts[1].strip())
+        except ValueError:
+            # 表头行 "self [us] | cumulative | imported package"
+            continue
+        raw_name = parts[2].rstrip()
+        name = raw_name.lstrip()
+        depth = (len(raw_name) - len(name)) // 2
+        imports.append((name, self_us, cum_us, depth))
+    return paint_ms, imports
+
+
+def run_once(offscreen):
+    env = dict(os.environ)
+    env[T0_ENV] = repr(time.time())
+    if offscreen:
+        env["QT_QPA_PLATFORM"] = "offscreen"
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", str(Path(__file__).resolve()), "--child"],
+        cwd=str(project_root), env=env,
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+        universal_newlines=True, encoding="utf-8", errors="replace",
+    )
+    return parse_importtime(proc.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SmartStudy 冷启动/导入耗时基准")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--runs", type=int, default=3, help="重复次数，取中位数")
+    parser.add_argument("--top", type=int, default=10, help="显示累计耗时最高的前 N 个顶层导入")
+    parser.add_argument("--offscreen", action="store_true", help="使用 offscreen 平台插件")
+    parser.add_argument("--out", default="", help="将结果以 JSON 行追加到该文件")
+    args = parser.parse_args()
+
+    if args.child:
+        return run_child()
+
+    paint_times = []
+    last_imports = []
+    for i in range(max(1, args.runs)):
+        paint_ms, imports = run_once(args.offscreen)
+        if paint_ms is None:
+            print(f"第 {i + 1} 次运行未检测到窗口绘制，请检查能否正常启动 main.py")
+            return 1
+        paint_times.append(paint_ms)
+        last_imports = imports
+        print(f"run {i + 1}: first paint = {paint_ms:.1f} ms")
+
+    paint_times.sort()
+    median_ms = paint_times[len(paint_times) // 2]
+    total_import_ms = sum(cum for _, _, cum, depth in last_imports if depth == 0) / 1000.0
+
+    print("-" * 48)
+    print(f"冷启动到首帧 (中位数): {median_ms:.1f} ms")
+    print(f"首帧前顶层导入累计:     {total_import_ms:.1f} ms")
+
+    top_level = sorted((item for item in last_imports if item[3] == 0), key=lambda x: -x[2])
+    print(f"\n累计耗时最高的 {args.top} 个顶层导入:")
+    for name, _, cum, _ in top_level[:args.top]:
+        print(f"  {cum / 1000.0:8.1f} ms  {name}")
+
+    heavy = sorted({name.split(".")[0] for name, _, _, _ in last_imports
+                    if name.split(".")[0] in HEAVY_PACKAGES})
+    if heavy:
+        print(f"\n[警告] 首帧之前导入了重型依赖: {', '.join(heavy)}")
+    else:
+        print("\n首帧之前没有导入任何重型 CV/ML 依赖")
+
+    if args.out:
+        record = {
+            "ts": round(time.time(), 3),
+            "first_paint_ms": round(median_ms, 1),
+            "runs": paint_times,
+            "import_ms": round(total_import_ms, 1),
+            "heavy_before_paint": heavy,
+        }
+        with open(args.out, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    return 1 if heavy else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,92 @@
+# 无界面守护进程：只跑检测管线，通过本机接口对外提供实时结果与累计统计
+# 不导入 Qt，不做模糊处理，也不编码预览画面；适合服务器或树莓派等无显示器环境
+#
+# 用法:
+#   python daemon.py --source seat1=0                       # 摄像头 0，HTTP 监听 127.0.0.1:8765
+#   python daemon.py --source seat1=a.mp4 --source seat2=1 --port 9000
+#   python daemon.py --source 0 --unix /tmp/smartstudy.sock # 改用 Unix 域套接字
+#
+# 接口说明见 modules/runtime/api.py，例如:
+#   curl http://127.0.0.1:8765/aggregates
+#   curl -N http://127.0.0.1:8765/events
+import sys
+import time
+import signal
+import argparse
+import threading
+from pathlib import Path
+
+project_root = Path(__file__).resolve().parent
+if str(project_root) not in sys.path:
+    sys.path.append(str(project_root))
+
+from app.payload import build_ui_payload
+from modules.runtime.api import APIServer, ResultsAPI, ResultsHub
+from modules.runtime.engine import DEFAULT_LEVEL, MultiStreamEngine, StreamSource, _parse_source
+
+
+def compact(item):
+    """引擎结果 → 与 UI 相同的精简载荷（只含标量），附带路名、序号与时间戳"""
+    payload = build_ui_payload(item["A"], item["B"], item["C"])
+    payload.update(stream=item["stream"], seq=item["seq"], ts=item["ts"],
+                   latency_ms=item["latency_ms"])
+    return payload
+
+
+def pump(engine, hub, stop_event):
+    """把引擎结果写入 ResultsHub，直到引擎结束或收到停止信号"""
+    for item in engine.results():
+        hub.publish(compact(item))
+        if stop_event.is_set():
+            break
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SmartStudy 无界面守护进程（本机结果接口）")
+    parser.add_argument("--source", action="append", required=True,
+                        help="name=spec，spec 为摄像头编号或视频文件路径，可重复")
+    parser.add_argument("--host", default="127.0.0.1", help="HTTP 监听地址（仅限本机回环地址）")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix", default=None, help="改为监听 Unix 域套接字路径")
+    parser.add_argument("--workers", type=int, default=None, help="默认与路数相同")
+    parser.add_argument("--pool-size", type=int, default=None, help="MediaPipe 模型组数，默认 min(workers, 2)")
+    parser.add_argument("--level", type=int, default=DEFAULT_LEVEL, help="档位下标（0 为最高画质）")
+    parser.add_argument("--history", type=int, default=256, help="/recent 与 /events 保留的最近结果条数")
+    parser.add_argument("--loop", action="store_true", help="视频文件循环播放")
+    parser.add_argument("--exit-on-eof", action="store_true", help="视频文件播完后退出（默认继续提供接口）")
+    args = parser.parse_args()
+
+    # 守护进程按实时处理：视频文件也按原帧率读取，处理不过来时丢旧帧
+    srcs = [StreamSource(name, spec, realtime=True, loop=args.loop)
+            for name, spec in map(_parse_source, args.source)]
+    engine = MultiStreamEngine(srcs, workers=args.workers, pool_size=args.pool_size, level=args.level)
+
+    hub = ResultsHub(history=args.history)
+    api = ResultsAPI(hub, status_fn=engine.stats)
+    server = APIServer(api, host=args.host, port=args.port, unix_path=args.unix)
+
+    stop_event = threading.Event()
+    signal.signal(signal.SIGINT, lambda *_: stop_event.set())
+    if hasattr(signal, "SIGTERM"):
+        signal.signal(signal.SIGTERM, lambda *_: stop_event.set())
+
+    server.start()
+    engine.start()
+    pump_thread = threading.Thread(target=pump, args=(engine, hub, stop_event), name="results-pump", daemon=True)
+    pump_thread.start()
+    print(f"Info: daemon running with {len(srcs)} stream(s), Ctrl+C to stop")
+
+    try:
+        while not stop_event.is_set():
+            if not pump_thread.is_alive() and args.exit_on_eof:
+                break
+            time.sleep(0.2)
+    finally:
+        engine.stop()
+        pump_thread.join(timeout=2.0)
+        server.stop()
+        print(f"Info: daemon stopped, {hub.seq} results served")
+
+
+if __name__ == "__main__":
+    main()
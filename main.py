@@ -21,6 +21,10 @@ def clean_temp_files():
                 pass
 
 if __name__ == "__main__":
+    # 推理子进程模式（--inference-process）下，打包后的 exe 需要在这里接管子进程的启动
+    import multiprocessing
+    multiprocessing.freeze_support()
+
     # 强制启用高分屏支持
     os.environ["QT_AUTO_SCREEN_SCALE_FACTOR"] = "1"
     if hasattr(Qt, "AA_EnableHighDpiScaling"):
@@ -1,4 +1,6 @@
 # app/ai/gaze.py
+import math
+
 import cv2
 import numpy as np
 
@@ -13,6 +15,15 @@ R_TOP, R_BOTTOM = 386, 374
 LEFT_EYE_POLY = [33, 160, 158, 159, 145, 153, 144, 133]
 RIGHT_EYE_POLY = [362, 385, 387, 386, 374, 380, 373, 263]
 
+# 虹膜关键点（FaceMesh refine_landmarks=True 时才有，共 478 点）
+# 468 为 33/133 这只眼的虹膜中心，469~472 为其外圈；473 / 474~477 对应 362/263 这只眼
+L_IRIS_CENTER, L_IRIS_RING = 468, (469, 470, 471, 472)
+R_IRIS_CENTER, R_IRIS_RING = 473, (474, 475, 476, 477)
+IRIS_LANDMARKS = 478
+
+# 与 CV 方法一致：眼睛半宽/半高的最小值（像素），避免小脸时除以极小值
+_MIN_HALF_W, _MIN_HALF_H = 6.0, 4.0
+
 
 def _pt(lm, idx, w, h):
     """将归一化关键点转换为像素坐标点"""
@@ -148,6 +159,117 @@ def _one_eye_gaze(frame_bgr, lm, img_w, img_h,
     return gx, gy, q
 
 
+def _one_eye_iris(lm, img_w, img_h, center_id, ring_ids, inner_id, outer_id, top_id, bottom_id):
+    """
+    仅用关键点计算单眼视线偏移。
+    gx 为虹膜中心在眼角连线方向上相对中点的偏移（除以半宽），
+    gy 为垂直方向上相对上下睑中点的偏移（除以半高），两者与 CV 方法同一坐标约定：
+    x 向画面右为正，y 向下为正。眼角连线用于校正头部侧倾。
+    点数很少，这里全部用标量运算，比构造小数组快一个数量级。
+    """
+    def px(i):
+        p = lm[i]
+        return p.x * img_w, p.y * img_h
+
+    cx, cy = px(center_id)
+    ring = [px(i) for i in ring_ids]
+    rx = sum(p[0] for p in ring) / len(ring)
+    ry = sum(p[1] for p in ring) / len(ring)
+    # 中心点与外圈均值再平均，比单独的中心点更稳
+    ix, iy = 0.5 * (cx + rx), 0.5 * (cy + ry)
+
+    (inx, iny), (outx, outy) = px(inner_id), px(outer_id)
+    (tx, ty), (bx, by) = px(top_id), px(bottom_id)
+
+    ax, ay = outx - inx, outy - iny
+    eye_w = math.hypot(ax, ay)
+    if eye_w < 1e-3:
+        return None
+    ux, uy = ax / eye_w, ay / eye_w
+    if ux < 0:
+        ux, uy = -ux, -uy
+    vx, vy = -uy, ux   # u 逆时针转 90°，图像坐标下指向下方
+
+    half_w = max(_MIN_HALF_W, 0.5 * eye_w)
+    lid_open = abs((bx - tx) * vx + (by - ty) * vy)
+    half_h = max(_MIN_HALF_H, 0.5 * lid_open)
+
+    dx, dy = ix - 0.5 * (inx + outx), iy - 0.5 * (iny + outy)
+    gx = (dx * ux + dy * uy) / half_w
+    dx, dy = ix - 0.5 * (tx + bx), iy - 0.5 * (ty + by)
+    gy = (dx * vx + dy * vy) / half_h
+
+    # 质量：眼睛够大、睁开、虹膜尺寸合理、虹膜落在眼眶内
+    iris_r = sum(math.hypot(p[0] - cx, p[1] - cy) for p in ring) / len(ring)
+    q_res = _clip01((eye_w - 8.0) / 12.0)
+    q_open = _clip01((lid_open / eye_w - 0.08) / 0.12)
+    q_size = 1.0 - _clip01(abs(2.0 * iris_r / eye_w - 0.45) / 0.3)
+    q_in = 1.0 - _clip01((max(abs(gx), abs(gy)) - 1.0) / 0.5)
+    quality = q_res * q_open * q_size * q_in
+
+    gx = min(1.5, max(-1.5, gx))
+    gy = min(1.5, max(-1.5, gy))
+    return gx, gy, quality
+
+
+def _clip01(v):
+    return 0.0 if v < 0.0 else (1.0 if v > 1.0 else v)
+
+
+def _merge_eyes(left, right, weighted=False):
+    vals = [item for item in (left, right) if item is not None]
+    if not vals:
+        return None
+    quality = sum(v[2] for v in vals) / len(vals)
+    total_q = sum(v[2] for v in vals)
+    if weighted and total_q > 1e-6:
+        # 按质量加权，半闭/被遮挡的一只眼影响更小
+        gx = sum(v[0] * v[2] for v in vals) / total_q
+        gy = sum(v[1] * v[2] for v in vals) / total_q
+    else:
+        gx = sum(v[0] for v in vals) / len(vals)
+        gy = sum(v[1] for v in vals) / len(vals)
+    return float(gx), float(gy), float(quality)
+
+
+def calc_gaze_iris(lm, img_w, img_h):
+    """
+    基于虹膜关键点的视线偏移（无需像素处理，对光照不敏感）。
+    需要 FaceMesh refine_landmarks=True；关键点不足 478 个时返回 None。
+    返回: (gx, gy, quality)，含义同 calc_gaze_proxy_cv
+    """
+    if len(lm) < IRIS_LANDMARKS:
+        return None
+    left = _one_eye_iris(lm, img_w, img_h, L_IRIS_CENTER, L_IRIS_RING,
+                         L_CORNER_IN, L_CORNER_OUT, L_TOP, L_BOTTOM)
+    right = _one_eye_iris(lm, img_w, img_h, R_IRIS_CENTER, R_IRIS_RING,
+                          R_CORNER_IN, R_CORNER_OUT, R_TOP, R_BOTTOM)
+    return _merge_eyes(left, right, weighted=True)
+
+
+# 虹膜法的质量门限（带回差）：像素法切到虹膜法需要质量高于 ENTER，
+# 已在用虹膜法时低于 EXIT 才退回，质量在门限附近抖动时不会来回切换
+IRIS_ENTER_QUALITY = 0.20
+IRIS_EXIT_QUALITY = 0.10
+
+
+def calc_gaze(frame_bgr, lm, img_w, img_h, current=None):
+    """
+    视线偏移：优先使用虹膜关键点，不可用或质量过低时退回像素方法。
+    current: 上一帧使用的方法，决定质量门限取 ENTER 还是 EXIT。
+    返回: ((gx, gy, quality) 或 None, 使用的方法 "iris" / "cv" / None)
+    """
+    min_quality = IRIS_EXIT_QUALITY if current in (None, "iris") else IRIS_ENTER_QUALITY
+    res = calc_gaze_iris(lm, img_w, img_h)
+    if res is not None and res[2] >= min_quality:
+        return res, "iris"
+    if frame_bgr is not None:
+        cv_res = calc_gaze_proxy_cv(frame_bgr, lm, img_w, img_h)
+        if cv_res is not None:
+            return cv_res, "cv"
+    return res, ("iris" if res is not None else None)
+
+
 def calc_gaze_proxy_cv(frame_bgr, lm, img_w, img_h):
     """
     计算视线偏移代理值
@@ -163,24 +285,5 @@ def calc_gaze_proxy_cv(frame_bgr, lm, img_w, img_h):
                           RIGHT_EYE_POLY, R_CORNER_IN, R_CORNER_OUT,
                           R_TOP, R_BOTTOM)
 
-    if left is None and right is None:
-        return None
-
-    vals = []
-    qs = []
-    for item in (left, right):
-        if item is None:
-            continue
-        gx, gy, q = item
-        vals.append((gx, gy))
-        qs.append(q)
-
-    if not vals:
-        return None
-
     # 取双眼平均值
-    gx = float(np.mean([v[0] for v in vals]))
-    gy = float(np.mean([v[1] for v in vals]))
-    quality = float(np.mean(qs)) if qs else 0.0
-
-    return gx, gy, quality
\ No newline at end of file
+    return _merge_eyes(left, right)
\ No newline at end of file
@@ -2,21 +2,8 @@ import cv2
 import json
 import numpy as np
 from collections import deque
-import mediapipe as mp
-
-from .config import (
-    SLEEPY_TIME, YAW_THRESHOLD,
-    PITCH_DOWN_THRESHOLD, PITCH_UP_THRESHOLD,
-    WINDOW_TIME, POSE_HOLD_TIME,
-    EAR_CLOSED_RATIO, EAR_HALF_RATIO,
-    PITCH_DOWN_SIGN,
-    MAX_POSE_JUMP,
-    W_EYE, W_AWAY, W_DOWN, W_UP, W_NOFACE, W_UNSTB,
-    YAW_STD_NORM, PITCH_STD_NORM,
-    SCORE_EMA_ALPHA, BLINK_MIN_SEC,
-    NOFACE_GRACE_SEC,
-    GAZE_X_THRESHOLD, GAZE_Y_THRESHOLD, GAZE_HOLD_TIME, W_GAZE,
-)
+
+from modules.runtime.thresholds import current_thresholds
 from .geometry import wrap_angle
 from .schema import make_base_output
 from .ear import calc_ear_both
@@ -24,18 +11,20 @@ from .pose import PoseEstimator
 # 移除外部 Calibrator 依赖，防止死锁
 # from .calibrator import BaselineCalibrator 
 from .windows import median_deque, std_deque
-from .gaze import calc_gaze_proxy_cv
-
-mp_face = mp.solutions.face_mesh
+from .gaze import calc_gaze
 
 class AttentionMonitor:
     """
     专注度监测器（极速启动版）
     """
-    def __init__(self, fps=30, baseline_frames=50): # 保留参数兼容性
+    def __init__(self, fps=30, baseline_frames=50, thresholds=None, refine_landmarks=True,
+                 with_model=True): # 保留参数兼容性
         self.fps = fps
         self.frame_time = 1.0 / fps
 
+        # 配置快照（不可变），热更新时整体替换引用
+        self.cfg = (thresholds or current_thresholds()).attention
+
         # 状态计时器
         self.eye_closed_time = 0.0
         self.yaw_off_time = 0.0
@@ -45,7 +34,7 @@ class AttentionMonitor:
         self.gaze_off_time = 0.0
 
         # 窗口设置
-        self.win_len = max(1, int(WINDOW_TIME * fps))
+        self.win_len = max(1, int(self.cfg.window_time * fps))
 
         # 数据窗口
         self.ear_window = deque(maxlen=self.win_len)
@@ -64,20 +53,21 @@ class AttentionMonitor:
 
         self.closed_run_frames = 0
         self.score_ema = 100.0
-        self.score_alpha = SCORE_EMA_ALPHA
+        self.score_alpha = self.cfg.score_ema_alpha
 
         self.yaw_ema = 0.0
         self.pitch_ema = 0.0
         self.pose_ema_alpha = 0.2
 
-        # 核心模型
-        self.face_mesh = mp_face.FaceMesh(
-            max_num_faces=1,
-            refine_landmarks=True,
-            min_detection_confidence=0.5,
-            min_tracking_confidence=0.5
-        )
-        self.pose_estimator = PoseEstimator()
+        # 核心模型（mediapipe 延迟到实例化时导入，避免拖慢 UI 启动）
+        # with_model=False 时不创建 FaceMesh，面部关键点由外部提供给 process_landmarks()
+        self.refine_landmarks = refine_landmarks
+        self.face_mesh = None
+        if with_model:
+            import mediapipe as mp
+            self._mp_face_mesh = mp.solutions.face_mesh
+            self.face_mesh = self._create_face_mesh(refine_landmarks)
+        self.pose_estimator = PoseEstimator(self.cfg)
 
         # --- 极速校准变量 ---
         self.is_calibrated = False
@@ -95,11 +85,53 @@ class AttentionMonitor:
         self.prev_pitch_rel = 0.0
         self.last_metrics = {}
 
+        # 当前视线估计方法（"iris" / "cv"）
+        self.gaze_method = None
+
+    def _create_face_mesh(self, refine_landmarks):
+        return self._mp_face_mesh.FaceMesh(
+            max_num_faces=1,
+            refine_landmarks=refine_landmarks,
+            min_detection_confidence=0.5,
+            min_tracking_confidence=0.5
+        )
+
+    def set_refine_landmarks(self, refine_landmarks):
+        """切换 FaceMesh 虹膜细化（需要重建模型），校准基线与窗口数据保留"""
+        refine_landmarks = bool(refine_landmarks)
+        if refine_landmarks == self.refine_landmarks:
+            return
+        if self.face_mesh is None:
+            self.refine_landmarks = refine_landmarks
+            return
+        old = self.face_mesh
+        self.face_mesh = self._create_face_mesh(refine_landmarks)
+        self.refine_landmarks = refine_landmarks
+        old.close()
+
+    def set_thresholds(self, thresholds):
+        """
+        替换配置快照。校准基线与窗口内已有数据保持不变；
+        WINDOW_TIME 变化时按新长度重建滑动窗口（保留最近的数据）。
+        """
+        cfg = thresholds.attention
+        win_len = max(1, int(cfg.window_time * self.fps))
+        if win_len != self.win_len:
+            self.win_len = win_len
+            for name in ("ear_window", "yaw_window", "pitch_window",
+                         "gaze_x_window", "gaze_y_window",
+                         "closed_score_flags", "away_flags", "down_flags",
+                         "up_flags", "noface_flags", "gaze_flags"):
+                setattr(self, name, deque(getattr(self, name), maxlen=win_len))
+        self.score_alpha = cfg.score_ema_alpha
+        self.pose_estimator.cfg = cfg
+        self.cfg = cfg
+
     def finish_closed_run_if_needed(self):
         if self.closed_run_frames <= 0:
             return
         dur = self.closed_run_frames * self.frame_time
-        if dur < BLINK_MIN_SEC:
+        if dur < self.cfg.blink_min_sec:
             k = min(self.closed_run_frames, len(self.closed_score_flags))
             for i in range(k):
                 idx = len(self.closed_score_flags) - 1 - i
@@ -108,6 +140,7 @@ class AttentionMonitor:
         self.closed_run_frames = 0
 
     def calc_attention_score(self):
+        cfg = self.cfg
         n = len(self.closed_score_flags)
         if n <= 0:
             self.last_metrics = {}
@@ -122,18 +155,18 @@ class AttentionMonitor:
 
         yaw_std = std_deque(self.yaw_window) if len(self.yaw_window) > 5 else 0.0
         pitch_std = std_deque(self.pitch_window) if len(self.pitch_window) > 5 else 0.0
-        unstb = 0.5 * min(1.0, yaw_std / max(1e-6, YAW_STD_NORM)) + \
-                0.5 * min(1.0, pitch_std / max(1e-6, PITCH_STD_NORM))
+        unstb = 0.5 * min(1.0, yaw_std / max(1e-6, cfg.yaw_std_norm)) + \
+                0.5 * min(1.0, pitch_std / max(1e-6, cfg.pitch_std_norm))
         unstb = float(min(1.0, max(0.0, unstb)))
 
         penalty = 0.0
-        penalty += W_EYE * perclos * 100.0
-        penalty += W_AWAY * away_ratio * 100.0
-        penalty += W_DOWN * down_ratio * 100.0
-        penalty += W_UP * up_ratio * 100.0
-        penalty += W_NOFACE * noface_ratio * 100.0
-        penalty += W_GAZE * gaze_ratio * 100.0
-        penalty += W_UNSTB * unstb * 100.0
+        penalty += cfg.w_eye * perclos * 100.0
+        penalty += cfg.w_away * away_ratio * 100.0
+        penalty += cfg.w_down * down_ratio * 100.0
+        penalty += cfg.w_up * up_ratio * 100.0
+        penalty += cfg.w_noface * noface_ratio * 100.0
+        penalty += cfg.w_gaze * gaze_ratio * 100.0
+        penalty += cfg.w_unstb * unstb * 100.0
 
         raw_score = 100.0 - penalty
         raw_score = max(0.0, min(100.0, raw_score))
@@ -149,19 +182,36 @@ class AttentionMonitor:
         return int(round(self.score_ema))
 
     def process(self, frame) -> str:
-        h, w = frame.shape[:2]
+        """返回 JSON 字符串（兼容独立 demo）"""
+        return json.dumps(self.process_dict(frame), ensure_ascii=False)
+
+    def detect(self, frame):
+        """只运行 FaceMesh，返回第一张人脸的关键点（没有人脸时为 None）"""
         rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
         res = self.face_mesh.process(rgb)
+        return res.multi_face_landmarks[0] if res.multi_face_landmarks else None
+
+    def process_dict(self, frame) -> dict:
+        """返回结果字典，AIWorker 直接使用，省去每帧的 JSON 序列化/反序列化"""
+        return self.process_landmarks(frame, self.detect(frame))
+
+    def process_landmarks(self, frame, face_landmarks, shape=None) -> dict:
+        """
+        根据给定的面部关键点（模型输出或滤波/预测值）更新状态并返回结果字典
+        frame 为 None 时（关键点回放）由 shape=(h, w) 给出画面尺寸，视线只用虹膜关键点法
+        """
+        cfg = self.cfg  # 本帧固定使用同一份快照
+        h, w = (frame.shape if frame is not None else shape)[:2]
 
         output = make_base_output(self.score_ema)
         
         # --- 1. 无人脸处理 ---
-        if not res.multi_face_landmarks:
+        if not face_landmarks:
             self.finish_closed_run_if_needed()
             self.noface_time += self.frame_time
             
             # 填充状态
-            self.noface_flags.append(1 if self.noface_time >= NOFACE_GRACE_SEC else 0)
+            self.noface_flags.append(1 if self.noface_time >= cfg.noface_grace_sec else 0)
             self.closed_score_flags.append(0)
             self.away_flags.append(0)
             self.down_flags.append(0)
@@ -178,17 +228,24 @@ class AttentionMonitor:
             output["blink_state"] = "no_face" # UI会显示检测中
             output["attention_score"] = self.calc_attention_score()
             self._fill_output_metrics(output)
-            return json.dumps(output, ensure_ascii=False)
+            return output
 
         # --- 2. 有人脸，提取数据 ---
-        lm = res.multi_face_landmarks[0].landmark
+        lm = face_landmarks.landmark
         self.noface_time = 0.0
         self.noface_flags.append(0)
 
         # 计算原始数据
         raw_ear = calc_ear_both(lm, w, h)
         pose_data = self.pose_estimator.calc_pose_abs(lm, w, h)
-        gaze_data = calc_gaze_proxy_cv(frame, lm, w, h)
+        # 有虹膜关键点时用关键点法，否则（或质量太低时）退回像素法
+        gaze_data, gaze_method = calc_gaze(frame, lm, w, h, current=self.gaze_method)
+        if gaze_method is not None and gaze_method != self.gaze_method:
+            # 两种方法同一坐标约定，校准基准可沿用；但窗口内的旧样本不混用
+            if self.gaze_method is not None:
+                self.gaze_x_window.clear()
+                self.gaze_y_window.clear()
+            self.gaze_method = gaze_method
 
         # --- 3. 极速校准逻辑 ---
         if not self.is_calibrated:
@@ -224,7 +281,7 @@ class AttentionMonitor:
 
             # 校准期间返回“检测中”
             output["blink_state"] = "no_face" 
-            return json.dumps(output, ensure_ascii=False)
+            return output
 
         # --- 4. 正常运行逻辑 ---
         
@@ -237,9 +294,9 @@ class AttentionMonitor:
         ear_ratio = raw_ear / max(1e-6, self.EAR_BASELINE)
         output["ear"] = round(float(ear_ratio), 3)
 
-        if ear_ratio < EAR_CLOSED_RATIO:
+        if ear_ratio < cfg.ear_closed_ratio:
             blink_state = "closed"
-        elif ear_ratio < EAR_HALF_RATIO:
+        elif ear_ratio < cfg.ear_half_ratio:
             blink_state = "half"
         else:
             blink_state = "open"
@@ -263,11 +320,11 @@ class AttentionMonitor:
                  gx_s = np.median(self.gaze_x_window)
                  gy_s = np.median(self.gaze_y_window)
                  
-                 is_off = (abs(gx_s) > GAZE_X_THRESHOLD) or (abs(gy_s) > GAZE_Y_THRESHOLD)
+                 is_off = (abs(gx_s) > cfg.gaze_x_threshold) or (abs(gy_s) > cfg.gaze_y_threshold)
                  self.gaze_flags.append(1 if is_off else 0)
                  if is_off: self.gaze_off_time += self.frame_time
                  else: self.gaze_off_time = 0.0
-                 output["gaze_off"] = (self.gaze_off_time >= GAZE_HOLD_TIME)
+                 output["gaze_off"] = (self.gaze_off_time >= cfg.gaze_hold_time)
 
         # 4.3 头部姿态
         if pose_data is None:
@@ -292,13 +349,14 @@ class AttentionMonitor:
 
             # 防抖动平滑
             dy = wrap_angle(yaw_rel - self.prev_yaw_rel)
-            if abs(dy) > MAX_POSE_JUMP: 
-                yaw_rel = wrap_angle(self.prev_yaw_rel + np.clip(dy, -MAX_POSE_JUMP, MAX_POSE_JUMP))
+            max_jump = cfg.max_pose_jump
+            if abs(dy) > max_jump:
+                yaw_rel = wrap_angle(self.prev_yaw_rel + np.clip(dy, -max_jump, max_jump))
             self.prev_yaw_rel = yaw_rel
             
             dp = wrap_angle(pitch_rel - self.prev_pitch_rel)
-            if abs(dp) > MAX_POSE_JUMP:
-                pitch_rel = wrap_angle(self.prev_pitch_rel + np.clip(dp, -MAX_POSE_JUMP, MAX_POSE_JUMP))
+            if abs(dp) > max_jump:
+                pitch_rel = wrap_angle(self.prev_pitch_rel + np.clip(dp, -max_jump, max_jump))
             self.prev_pitch_rel = pitch_rel
 
             # EMA 更新
@@ -325,21 +383,21 @@ class AttentionMonitor:
                 self.closed_score_flags.append(0)
 
             # 偏头判定
-            is_away = (abs(yaw_s) > YAW_THRESHOLD)
+            is_away = (abs(yaw_s) > cfg.yaw_threshold)
             self.away_flags.append(1 if is_away else 0)
             if is_away: self.yaw_off_time += self.frame_time
             else: self.yaw_off_time = 0.0
 
             # 低头判定
-            pitch_down = PITCH_DOWN_SIGN * pitch_s
-            is_down = (pitch_down > PITCH_DOWN_THRESHOLD)
+            pitch_down = cfg.pitch_down_sign * pitch_s
+            is_down = (pitch_down > cfg.pitch_down_threshold)
             self.down_flags.append(1 if is_down else 0)
             if is_down: self.pitch_down_time += self.frame_time
             else: self.pitch_down_time = 0.0
             
             # 抬头判定
             pitch_up = -pitch_down
-            is_up = (pitch_up > PITCH_UP_THRESHOLD)
+            is_up = (pitch_up > cfg.pitch_up_threshold)
             self.up_flags.append(1 if is_up else 0)
             if is_up: self.pitch_up_time += self.frame_time
             else: self.pitch_up_time = 0.0
@@ -347,7 +405,7 @@ class AttentionMonitor:
         # 计算最终分数
         output["attention_score"] = self.calc_attention_score()
         self._fill_output_metrics(output)
-        return json.dumps(output, ensure_ascii=False)
+        return output
 
     def _fill_output_metrics(self, output):
         m = self.last_metrics
@@ -1,9 +1,7 @@
 import cv2
 import numpy as np
 
-from .config import (
-    FOCAL_SCALE, MIN_EYE_DIST, REPROJ_ERR_MAX
-)
+from modules.runtime.thresholds import current_thresholds
 from .geometry import wrap_angle
 
 
@@ -15,7 +13,9 @@ class PoseEstimator:
       只用重投影误差做过滤
     """
 
-    def __init__(self):
+    def __init__(self, cfg=None):
+        # 专注度配置快照 (AttentionThresholds)
+        self.cfg = cfg or current_thresholds().attention
         self.prev_rvec = None
         self.prev_tvec = None
 
@@ -37,11 +37,12 @@ class PoseEstimator:
         ], dtype=np.float64)
 
     def calc_pose_abs(self, landmarks, img_w, img_h):
+        cfg = self.cfg
         # 质量门控
         pL = np.array([landmarks[33].x * img_w,  landmarks[33].y * img_h], dtype=np.float64)
         pR = np.array([landmarks[263].x * img_w, landmarks[263].y * img_h], dtype=np.float64)
         eye_dist = float(np.linalg.norm(pR - pL))
-        if eye_dist < float(MIN_EYE_DIST):
+        if eye_dist < float(cfg.min_eye_dist):
             return None
 
         # 2D点
@@ -51,7 +52,7 @@ class PoseEstimator:
         )
 
         # 相机内参
-        focal_length = float(img_w) * float(FOCAL_SCALE)
+        focal_length = float(img_w) * float(cfg.focal_scale)
         center = (img_w / 2.0, img_h / 2.0)
         camera_matrix = np.array([
             [focal_length, 0.0, center[0]],
@@ -89,7 +90,7 @@ class PoseEstimator:
         proj, _ = cv2.projectPoints(self.model_points, rvec, tvec, camera_matrix, dist_coeffs)
         proj = proj.reshape(-1, 2)
         err = float(np.mean(np.linalg.norm(proj - image_points, axis=1)))
-        if err > float(REPROJ_ERR_MAX):
+        if err > float(cfg.reproj_err_max):
             return None
 
         self.prev_rvec = rvec
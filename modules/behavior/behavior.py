@@ -3,7 +3,6 @@ os.environ["TF_CPP_MIN_LOG_LEVEL"] = "2"
 
 import cv2
 import json
-import yaml
 import time
 import sys
 from pathlib import Path
@@ -23,6 +22,7 @@ if str(BASE_DIR) not in sys.path:
     sys.path.insert(0, str(BASE_DIR))
 
 from modules.behavior.behavior_detector import BehaviorDetector
+from modules.runtime.thresholds import get_store
 
 # 配置路径
 CONFIG_DIR = BASE_DIR / "config"
@@ -100,8 +100,8 @@ def main():
     with SETTINGS_PATH.open("r", encoding="utf-8") as f:
         settings = json.load(f)
 
-    with THRESHOLDS_PATH.open("r", encoding="utf-8") as f:
-        thresholds = yaml.safe_load(f)
+    # 由配置服务统一解析并校验
+    thresholds = get_store().ensure_loaded(THRESHOLDS_PATH)
 
     print_interval = settings.get("output", {}).get("print_interval", 5)
 
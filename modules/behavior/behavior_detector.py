@@ -2,6 +2,7 @@ import json
 from modules.behavior.hand_behavior import HandBadHabitsDetector
 from modules.behavior.phone_detector import PhoneDetector
 from modules.behavior.seat_occupancy_detector import SeatOccupancyDetector
+from modules.runtime.thresholds import as_thresholds
 
 
 class BehaviorDetector:
@@ -10,23 +11,43 @@ class BehaviorDetector:
     负责整合多个行为检测模块的结果
     """
 
-    def __init__(self, config):
-        self.hand_detector = HandBadHabitsDetector(config)
-        self.phone_detector = PhoneDetector(config)
-        self.seat_detector = SeatOccupancyDetector(config)
+    def __init__(self, config=None, phone_service=None, with_model=True):
+        # config: Thresholds 快照 / yaml 字典 / None(使用全局配置)，只校验一次
+        # phone_service: 可选的多路共享批量 YOLO 服务
+        # with_model=False: 不加载 YOLO，手机检测结果由 process(phone=...) 给出（关键点回放）
+        thresholds = as_thresholds(config)
+        self.hand_detector = HandBadHabitsDetector(thresholds)
+        self.phone_detector = PhoneDetector(thresholds, service=phone_service, with_model=with_model)
+        self.seat_detector = SeatOccupancyDetector(thresholds)
 
-    def process(self, results, frame=None):
+    def set_thresholds(self, thresholds):
+        """将新的配置快照分发给各子检测器"""
+        self.hand_detector.set_thresholds(thresholds)
+        self.phone_detector.set_thresholds(thresholds)
+        self.seat_detector.set_thresholds(thresholds)
+
+    def set_quality(self, level):
+        """应用档位（目前只有手机检测的 YOLO 参数受档位控制）"""
+        self.phone_detector.set_quality(level.yolo_imgsz, level.yolo_interval)
+
+    def process(self, results, frame=None, phone=None):
         """
         对单帧结果进行行为检测
         Args:
             results: MediaPipe 或其他模块的前置检测结果
             frame: 当前视频帧
+            phone: 回放时使用的记录值（-1 本帧未检测 / 0 / 1），给出时不运行 YOLO
             
         Returns:
             dict: 包含各项行为检测状态的字典
         """
-        hand_result = self.hand_detector.detect_hand_bad_habits(results)
-        phone_result = self.phone_detector.detect(results, frame=frame)
+        # 上游已转换好的 (H, 21, 3) 手部数组（若有）直接复用
+        hand_result = self.hand_detector.detect_hand_bad_habits(
+            results, hands=getattr(results, "hand_array", None))
+        if phone is None:
+            phone_result = self.phone_detector.detect(results, frame=frame)
+        else:
+            phone_result = self.phone_detector.observe(None if phone < 0 else bool(phone))
         seat_result = self.seat_detector.detect(results)
 
         return {
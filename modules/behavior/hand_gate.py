@@ -0,0 +1,149 @@
+"""
+手部检测门控
+摸脸/托腮/扶额只在手靠近头部时才有意义。Pose 已经给出手腕(15/16)、手肘(13/14)，
+这里据此判断是否需要跑 MediaPipe Hands，需要时也只在头部区域的裁剪图上跑，
+正常看书、打字时手部推理几乎为零。
+"""
+import numpy as np
+
+# MediaPipe Pose 关键点索引
+NOSE = 0
+L_SHOULDER, R_SHOULDER = 11, 12
+L_ELBOW, R_ELBOW = 13, 14
+L_WRIST, R_WRIST = 15, 16
+
+_MIN_VISIBILITY = 0.3
+
+
+class HandGate:
+    """
+    Args:
+        cfg: HandThresholds 快照（使用 gate / gate_reach / gate_hold_frames）。
+
+    run() 返回映射回整帧归一化坐标的手部关键点列表（与 results.multi_hand_landmarks 同类型），
+    门控关闭或没检测到手时返回 None。
+    """
+
+    def __init__(self, cfg):
+        self.cfg = cfg
+        self._hold = 0          # 触发后继续保持打开的剩余帧数
+        self._roi = None        # 平滑后的裁剪框 (x0, y0, x1, y1)，像素坐标
+        self.last_open = False  # 本帧是否运行了 Hands（调试/统计用）
+
+    def set_config(self, cfg):
+        self.cfg = cfg
+
+    @staticmethod
+    def _pt(lm, idx):
+        p = lm[idx]
+        return np.array([p.x, p.y], dtype=np.float32), getattr(p, "visibility", 1.0)
+
+    def _triggered_wrists(self, lm, shoulder_w):
+        """返回靠近头部的手腕坐标列表（归一化）"""
+        cfg = self.cfg
+        nose, _ = self._pt(lm, NOSE)
+        shoulder_y = (lm[L_SHOULDER].y + lm[R_SHOULDER].y) / 2.0
+        reach = cfg.gate_reach * shoulder_w
+
+        hits = []
+        for wrist_i, elbow_i in ((L_WRIST, L_ELBOW), (R_WRIST, R_ELBOW)):
+            wrist, w_vis = self._pt(lm, wrist_i)
+            elbow, e_vis = self._pt(lm, elbow_i)
+            if w_vis >= _MIN_VISIBILITY:
+                near_head = float(np.linalg.norm(wrist - nose)) < reach
+                # 小臂上抬（手腕高于手肘）且手腕已到肩线附近：托腮/扶额的典型姿势
+                raised = wrist[1] < elbow[1] and wrist[1] < shoulder_y + 0.25 * shoulder_w
+                if near_head or raised:
+                    hits.append(wrist)
+            elif e_vis >= _MIN_VISIBILITY and elbow[1] < shoulder_y + 0.5 * shoulder_w:
+                # 手腕被脸/画面边缘遮挡，但手肘抬得较高，保守起见认为手在头部附近
+                hits.append(nose)
+        return hits
+
+    def _head_roi(self, lm, wrists, shoulder_w, w, h):
+        """头部区域（含触发的手腕）的像素裁剪框"""
+        nose = np.array([lm[NOSE].x, lm[NOSE].y])
+        shoulder_y = (lm[L_SHOULDER].y + lm[R_SHOULDER].y) / 2.0
+        x0, x1 = nose[0] - 1.3 * shoulder_w, nose[0] + 1.3 * shoulder_w
+        y0, y1 = nose[1] - 1.0 * shoulder_w, shoulder_y + 0.3 * shoulder_w
+        # 手掌检测需要看到完整的手，把触发的手腕连同手掌一起框进来
+        pad = 0.5 * shoulder_w
+        for p in wrists:
+            x0, x1 = min(x0, p[0] - pad), max(x1, p[0] + pad)
+            y0, y1 = min(y0, p[1] - pad), max(y1, p[1] + pad)
+
+        box = np.array([x0 * w, y0 * h, x1 * w, y1 * h])
+        box = np.clip(box, 0, [w, h, w, h])
+
+        # 裁剪框变化不大时沿用上一帧，保持 Hands 跟踪模式的输入稳定
+        if self._roi is not None:
+            prev = np.asarray(self._roi, dtype=np.float64)
+            size = max(prev[2] - prev[0], prev[3] - prev[1], 1.0)
+            if np.max(np.abs(box - prev)) < 0.1 * size:
+                return self._roi
+        x0, y0, x1, y1 = (int(v) for v in box)
+        if x1 - x0 < 32 or y1 - y0 < 32:
+            return None
+        self._roi = (x0, y0, x1, y1)
+        return self._roi
+
+    def update(self, pose_landmarks, frame_shape):
+        """决定本帧是否运行 Hands；需要时返回裁剪框，否则返回 None"""
+        self.last_open = False
+        if not self.cfg.gate:
+            h, w = frame_shape[:2]
+            self.last_open = True
+            return (0, 0, w, h)
+        if pose_landmarks is None:
+            self._hold = 0
+            return None
+
+        lm = pose_landmarks.landmark
+        h, w = frame_shape[:2]
+        ls, _ = self._pt(lm, L_SHOULDER)
+        rs, _ = self._pt(lm, R_SHOULDER)
+        shoulder_w = max(float(np.linalg.norm(ls - rs)), 0.05)
+
+        wrists = self._triggered_wrists(lm, shoulder_w)
+        if wrists:
+            self._hold = self.cfg.gate_hold_frames
+        elif self._hold > 0:
+            self._hold -= 1
+        else:
+            return None
+
+        roi = self._head_roi(lm, wrists, shoulder_w, w, h)
+        self.last_open = roi is not None
+        return roi
+
+    @staticmethod
+    def to_frame(hand_landmarks, roi, frame_shape):
+        """把裁剪图上的归一化关键点就地换算回整帧归一化坐标"""
+        if not hand_landmarks:
+            return hand_landmarks
+        h, w = frame_shape[:2]
+        x0, y0, x1, y1 = roi
+        sx, sy = (x1 - x0) / float(w), (y1 - y0) / float(h)
+        ox, oy = x0 / float(w), y0 / float(h)
+        for hand in hand_landmarks:
+            for p in hand.landmark:
+                p.x = p.x * sx + ox
+                p.y = p.y * sy + oy
+                p.z = p.z * sx   # z 与图像宽度同尺度
+        return hand_landmarks
+
+    def run(self, hands_model, frame_rgb, pose_landmarks):
+        """门控 + 裁剪 + 推理 + 坐标还原"""
+        roi = self.update(pose_landmarks, frame_rgb.shape)
+        if roi is None:
+            return None
+        x0, y0, x1, y1 = roi
+        h, w = frame_rgb.shape[:2]
+        if (x0, y0, x1, y1) == (0, 0, w, h):
+            crop = frame_rgb
+        else:
+            crop = np.ascontiguousarray(frame_rgb[y0:y1, x0:x1])
+        res = hands_model.process(crop)
+        if crop is frame_rgb:
+            return res.multi_hand_landmarks
+        return self.to_frame(res.multi_hand_landmarks, roi, frame_rgb.shape)
@@ -5,9 +5,19 @@
 
 import time
 import math
+import threading
 from collections import deque
 
+import cv2
+
+from modules.behavior.phone_tracker import PhoneTracker
+from modules.runtime.thresholds import as_thresholds
+from modules.runtime.probe import current_profile
+from modules.runtime.quality import DEFAULT_LEVEL, LADDER
+
 _yolo_model = None
+# ultralytics 的推理对象不是线程安全的，多路共用同一个模型时串行调用
+_yolo_lock = threading.Lock()
 
 
 def _get_yolo_model():
@@ -27,27 +37,128 @@ def _get_yolo_model():
     return _yolo_model if _yolo_model else None
 
 
+def phone_boxes(result, conf_th):
+    """从单张图的 YOLO 结果中取出手机框与置信度"""
+    boxes_out, confs_out = [], []
+    boxes = result.boxes
+    if boxes is not None:
+        for box in boxes:
+            cls_id = int(box.cls[0])
+            if cls_id == PhoneDetector.PHONE_CLASS_ID:
+                conf = float(box.conf[0])
+                if conf >= conf_th:
+                    boxes_out.append(tuple(float(v) for v in box.xyxy[0].tolist()))
+                    confs_out.append(conf)
+    return boxes_out, confs_out
+
+
+def _set_torch_threads(n):
+    if n <= 0:
+        return
+    try:
+        import torch
+        torch.set_num_threads(n)
+    except Exception:
+        pass
+
+
 class PhoneDetector:
     PHONE_CLASS_ID = 67 
 
-    def __init__(self, config):
-        phone_cfg = config.get("phone", {})
-        
-        self.yolo_confidence = phone_cfg.get("yolo_confidence", 0.4)
-        self.detection_interval = phone_cfg.get("detection_interval", 3)
-        
-        self.confirm_threshold = phone_cfg.get("confirm_threshold", 0.6)
-        self.exit_threshold = phone_cfg.get("exit_threshold", 0.2)
-        
+    def __init__(self, config, profile=None, service=None, with_model=True):
+        # 配置快照 (PhoneThresholds)；config 可以是 Thresholds 快照或 yaml 字典
+        self.cfg = as_thresholds(config).phone
+
         self.frame_count = 0
         self.last_phone_detected = False
-        
-        self.detection_window_size = phone_cfg.get("detection_window_size", 10)
-        self.detection_history = deque(maxlen=self.detection_window_size)
-        
+        # 本帧的原始检测结果：None 表示本帧没有运行检测（供会话记录使用）
+        self.last_observation = None
+
+        self.detection_history = deque(maxlen=self.cfg.detection_window_size)
+
         self.is_using_phone = False
-        
-        self.yolo_model = _get_yolo_model()
+
+        # 两次 YOLO 之间的手机框跟踪
+        self.tracker = PhoneTracker(self.cfg)
+        self.last_yolo_frame = 0
+        self.yolo_runs = 0
+
+        # YOLO 输入尺寸与档位的检测间隔；档位间隔为 None 时直接使用配置文件中的 detection_interval
+        self.imgsz = 320
+        self.ladder_interval = None
+
+        # with_model=False 时不加载 YOLO，检测结果由外部通过 observe() 给出（关键点回放）
+        self.yolo_model = _get_yolo_model() if with_model else None
+        # 可选的批量检测服务（YoloBatchService），多路部署时由引擎注入
+        self.service = service
+
+        # 启动探测选出的性能档案：推理线程数、起始档位对应的输入尺寸与检测间隔
+        profile = profile or current_profile()
+        if profile is not None:
+            if self.yolo_model is not None:
+                _set_torch_threads(profile.torch_threads)
+            level = LADDER[profile.start_level]
+            self.set_quality(level.yolo_imgsz, level.yolo_interval)
+
+    def set_quality(self, imgsz, interval=None):
+        """由档位控制器调整输入尺寸与检测间隔"""
+        self.imgsz = int(imgsz)
+        self.ladder_interval = int(interval) if interval else None
+
+    @property
+    def detection_interval(self):
+        """
+        配置文件的 detection_interval 是默认档位下的间隔，档位按其相对默认档的倍数缩放
+        （默认配置 3 帧：最高档 2 帧，最低档 8 帧），热更新配置后立即生效。
+        """
+        base = self.cfg.detection_interval
+        if self.ladder_interval is None:
+            return base
+        return max(1, int(round(base * self.ladder_interval / LADDER[DEFAULT_LEVEL].yolo_interval)))
+
+    def set_thresholds(self, thresholds):
+        """替换配置快照；窗口大小变化时保留最近的检测记录"""
+        cfg = thresholds.phone
+        if cfg.detection_window_size != self.detection_history.maxlen:
+            self.detection_history = deque(self.detection_history, maxlen=cfg.detection_window_size)
+        if not cfg.track:
+            self.tracker.reset()
+        self.tracker.set_config(cfg)
+        self.cfg = cfg
+
+    @property
+    def confidence(self):
+        """当前手机置信度：跟踪开启时为轨迹置信度（两次检测之间逐帧衰减）"""
+        return self.tracker.confidence
+
+    def _yolo_input(self, frame):
+        """缩放到 YOLO 输入尺寸（跟踪也在这张图上做）"""
+        h, w = frame.shape[:2]
+        scale = min(self.imgsz / w, self.imgsz / h)
+        if scale < 1:
+            return cv2.resize(frame, (int(w * scale), int(h * scale)))
+        return frame
+
+    def _run_yolo(self, small_frame):
+        """
+        运行 YOLO，返回手机框列表 [(x0, y0, x1, y1)] 与置信度列表（small_frame 像素坐标）
+        """
+        if self.yolo_model is None:
+            return [], []
+        conf_th = self.cfg.yolo_confidence
+        self.yolo_runs += 1
+
+        # 多路共用的批量检测服务：与其他路的帧合并成一批推理
+        if self.service is not None:
+            return self.service.detect(small_frame, self.imgsz, conf_th)
+
+        try:
+            # imgsz 需显式传入，否则 ultralytics 会把缩小后的图再放大到默认的 640 推理
+            with _yolo_lock:
+                results = self.yolo_model(small_frame, verbose=False, conf=conf_th, imgsz=self.imgsz)
+            return phone_boxes(results[0], conf_th) if results else ([], [])
+        except Exception as e:
+            return [], []
 
     def _detect_phone_yolo(self, frame):
         """
@@ -55,33 +166,31 @@ class PhoneDetector:
         """
         if self.yolo_model is None or frame is None:
             return False
-        
-        try:
-            h, w = frame.shape[:2]
-            scale = min(320 / w, 320 / h)
-            if scale < 1:
-                new_w, new_h = int(w * scale), int(h * scale)
-                import cv2
-                small_frame = cv2.resize(frame, (new_w, new_h))
-            else:
-                small_frame = frame
-            
-            results = self.yolo_model(small_frame, verbose=False, conf=self.yolo_confidence)
-            
-            # 检查是否检测到手机
-            for result in results:
-                boxes = result.boxes
-                if boxes is not None:
-                    for box in boxes:
-                        cls_id = int(box.cls[0])
-                        if cls_id == self.PHONE_CLASS_ID:
-                            conf = float(box.conf[0])
-                            if conf >= self.yolo_confidence:
-                                return True
-            return False
-            
-        except Exception as e:
-            return False
+        boxes, _ = self._run_yolo(self._yolo_input(frame))
+        return len(boxes) > 0
+
+    def _track_step(self, frame):
+        """
+        跟踪模式下的一帧：按轨迹状态决定是否运行 YOLO。
+        轨迹稳定时每 tracked_interval 帧复检；跟丢或置信度进入模糊区间时立即复检；
+        没有轨迹时按原检测间隔运行。
+        返回本帧 YOLO 的结论，没有运行 YOLO 时返回 None：跟踪只决定何时复检，
+        不逐帧产出结论，滑动窗口仍按 YOLO 次数计（置信度衰减本身不代表手机不见了）。
+        """
+        cfg = self.cfg
+        tracker = self.tracker
+        small = self._yolo_input(frame)
+        gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+
+        since = self.frame_count - self.last_yolo_frame
+        interval = cfg.tracked_interval if tracker.stable() else self.detection_interval
+        if since >= interval or tracker.needs_recheck():
+            self.last_yolo_frame = self.frame_count
+            boxes, confs = self._run_yolo(small)
+            tracker.correct(gray, boxes, confs)
+            return len(boxes) > 0
+        tracker.propagate(gray)
+        return None
 
     def detect(self, results, frame=None):
         """
@@ -89,20 +198,38 @@ class PhoneDetector:
         进入状态: 需要滑动窗口内60%以上检测到手机
         退出状态: 需要窗口内80%以上没检测到手机
         """
-        output = {"使用手机": False}
-        
         self.frame_count += 1
 
-        if self.frame_count % self.detection_interval == 0:
+        detected = None
+        if self.cfg.track and self.yolo_model is not None and frame is not None:
+            # 只有运行了 YOLO 的帧才有结论；手机移开时模板跟丢会立即触发复检
+            detected = self._track_step(frame)
+        elif self.frame_count % self.detection_interval == 0:
             detected = self._detect_phone_yolo(frame)
+        return self._update_state(detected)
+
+    def observe(self, detected):
+        """
+        用外部给出的检测结果（None 表示本帧未检测）推进一帧，不运行 YOLO。
+        关键点回放时使用记录下来的检测结果。
+        """
+        self.frame_count += 1
+        return self._update_state(detected)
+
+    def _update_state(self, detected):
+        cfg = self.cfg  # 本帧固定使用同一份快照
+        output = {"使用手机": False}
+
+        self.last_observation = detected
+        if detected is not None:
             self.detection_history.append(detected)
             self.last_phone_detected = detected
-        
+
         if not self.is_using_phone:
             if len(self.detection_history) >= 3:
                 recent_window = list(self.detection_history)[-5:]
                 phone_ratio = sum(recent_window) / len(recent_window)
-                if phone_ratio >= self.confirm_threshold:
+                if phone_ratio >= cfg.confirm_threshold:
                     self.is_using_phone = True
         
         else:
@@ -110,7 +237,7 @@ class PhoneDetector:
                 recent_window = list(self.detection_history)[-5:]
                 phone_ratio = sum(recent_window) / len(recent_window)
                 
-                if phone_ratio < self.exit_threshold:
+                if phone_ratio < cfg.exit_threshold:
                     self.is_using_phone = False
         
         output["使用手机"] = self.is_using_phone
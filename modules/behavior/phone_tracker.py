@@ -0,0 +1,193 @@
+"""
+手机框跟踪
+YOLO 每隔几帧才跑一次，两次检测之间用模板匹配把手机框逐帧跟下去，
+置信度按帧衰减；检测结果按 IoU 与已有轨迹关联。
+只有轨迹丢失（匹配分数过低）或置信度衰减到模糊区间时才请求立即重新检测，
+轨迹稳定时可以放宽 YOLO 的运行间隔。
+
+所有坐标都是 YOLO 输入图（缩小后的灰度图）上的像素坐标，输入尺寸变化时轨迹清空。
+"""
+import cv2
+
+# 模板最小边长（像素），太小的框匹配不稳定
+_MIN_TEMPLATE = 8
+# 搜索区域相对框尺寸向外扩展的比例
+_SEARCH_PAD = 0.5
+
+
+def iou(a, b) -> float:
+    """两个 (x0, y0, x1, y1) 框的交并比"""
+    ix0, iy0 = max(a[0], b[0]), max(a[1], b[1])
+    ix1, iy1 = min(a[2], b[2]), min(a[3], b[3])
+    inter = max(0.0, ix1 - ix0) * max(0.0, iy1 - iy0)
+    if inter <= 0.0:
+        return 0.0
+    area_a = (a[2] - a[0]) * (a[3] - a[1])
+    area_b = (b[2] - b[0]) * (b[3] - b[1])
+    return inter / (area_a + area_b - inter)
+
+
+class PhoneTrack:
+    __slots__ = ("box", "conf", "hits", "misses", "lost", "template", "match_score")
+
+    def __init__(self, box, conf):
+        self.box = box            # (x0, y0, x1, y1) float
+        self.conf = conf          # 当前置信度：检测时取 YOLO 置信度，之后逐帧衰减
+        self.hits = 1             # 被检测结果确认的次数
+        self.misses = 0           # 连续几次检测没有关联上
+        self.lost = False         # 模板匹配失败
+        self.template = None
+        self.match_score = 1.0
+
+
+class PhoneTracker:
+    """
+    Args:
+        cfg: PhoneThresholds 快照（使用 track_* / recheck_conf 等字段）。
+
+    每帧：
+        tracker.propagate(gray)                  # 没跑 YOLO 的帧
+        tracker.correct(gray, boxes, confs)      # 跑了 YOLO 的帧
+    """
+
+    def __init__(self, cfg):
+        self.cfg = cfg
+        self.tracks = []
+        self._shape = None
+
+    def set_config(self, cfg):
+        self.cfg = cfg
+
+    def reset(self):
+        self.tracks = []
+
+    # ---------- 查询 ----------
+
+    @property
+    def confidence(self) -> float:
+        """已确认轨迹中的最高置信度（没有时为 0）"""
+        return max((t.conf for t in self.tracks if self._confirmed(t)), default=0.0)
+
+    def best_box(self):
+        confirmed = [t for t in self.tracks if self._confirmed(t)]
+        if not confirmed:
+            return None
+        return max(confirmed, key=lambda t: t.conf).box
+
+    def _confirmed(self, track):
+        # 单次检测可能是误检，至少两次确认（或置信度很高）才计入结果
+        return track.hits >= 2 or track.conf >= self.cfg.confirm_conf
+
+    def needs_recheck(self) -> bool:
+        """轨迹丢失、尚未确认或置信度落入模糊区间时需要立即重新检测"""
+        cfg = self.cfg
+        for t in self.tracks:
+            if t.lost or not self._confirmed(t) or t.conf < cfg.recheck_conf:
+                return True
+        return False
+
+    def stable(self) -> bool:
+        """存在一条可靠的轨迹（可以放宽检测间隔）"""
+        cfg = self.cfg
+        return any(self._confirmed(t) and not t.lost and t.conf >= cfg.recheck_conf
+                   for t in self.tracks)
+
+    # ---------- 更新 ----------
+
+    def _check_shape(self, gray):
+        if gray.shape != self._shape:
+            self._shape = gray.shape
+            self.tracks = []
+
+    def _grab_template(self, gray, track):
+        x0, y0, x1, y1 = (int(round(v)) for v in track.box)
+        x0, y0 = max(x0, 0), max(y0, 0)
+        x1, y1 = min(x1, gray.shape[1]), min(y1, gray.shape[0])
+        if x1 - x0 < _MIN_TEMPLATE or y1 - y0 < _MIN_TEMPLATE:
+            track.template = None
+            return
+        track.template = gray[y0:y1, x0:x1].copy()
+
+    def _match(self, gray, track):
+        """在框周围的搜索区域做一次模板匹配，平移框并返回匹配分数"""
+        tpl = track.template
+        if tpl is None:
+            return 0.0
+        th, tw = tpl.shape
+        x0, y0, x1, y1 = track.box
+        pad_x, pad_y = _SEARCH_PAD * tw, _SEARCH_PAD * th
+        h, w = gray.shape
+        sx0, sy0 = max(int(x0 - pad_x), 0), max(int(y0 - pad_y), 0)
+        sx1, sy1 = min(int(x1 + pad_x) + 1, w), min(int(y1 + pad_y) + 1, h)
+        if sx1 - sx0 < tw or sy1 - sy0 < th:
+            return 0.0
+        res = cv2.matchTemplate(gray[sy0:sy1, sx0:sx1], tpl, cv2.TM_CCOEFF_NORMED)
+        _, score, _, loc = cv2.minMaxLoc(res)
+        nx0, ny0 = sx0 + loc[0], sy0 + loc[1]
+        track.box = (float(nx0), float(ny0), float(nx0 + tw), float(ny0 + th))
+        return float(score)
+
+    def propagate(self, gray):
+        """没有检测结果的帧：模板匹配移动轨迹，置信度衰减，衰减到下限的轨迹删除"""
+        cfg = self.cfg
+        self._check_shape(gray)
+        alive = []
+        for t in self.tracks:
+            if not t.lost:
+                t.match_score = self._match(gray, t)
+                if t.match_score < cfg.track_match_min:
+                    t.lost = True
+            t.conf *= cfg.track_decay if not t.lost else cfg.track_decay ** 4
+            if t.conf >= cfg.track_min_conf:
+                alive.append(t)
+        self.tracks = alive
+
+    def correct(self, gray, boxes, confs):
+        """
+        有检测结果的帧：按 IoU 贪心关联。
+        关联上的轨迹用检测框替换并刷新模板；没关联上的检测新建轨迹；
+        已跟丢或连续超过 track_max_misses 次没关联上的轨迹删除。
+        """
+        cfg = self.cfg
+        self._check_shape(gray)
+
+        pairs = []
+        for ti, t in enumerate(self.tracks):
+            for di, b in enumerate(boxes):
+                v = iou(t.box, b)
+                if v >= cfg.track_iou:
+                    pairs.append((v, ti, di))
+        pairs.sort(reverse=True)
+
+        used_t, used_d = set(), set()
+        for _, ti, di in pairs:
+            if ti in used_t or di in used_d:
+                continue
+            used_t.add(ti)
+            used_d.add(di)
+            t = self.tracks[ti]
+            t.box = tuple(float(v) for v in boxes[di])
+            t.conf = float(confs[di])
+            t.hits += 1
+            t.misses = 0
+            t.lost = False
+            t.match_score = 1.0
+            self._grab_template(gray, t)
+
+        alive = []
+        for ti, t in enumerate(self.tracks):
+            if ti not in used_t:
+                t.misses += 1
+                t.conf *= cfg.track_decay ** 4
+                # 模板已跟丢、检测也没看到：不再保留
+                if t.lost or t.misses > cfg.track_max_misses or t.conf < cfg.track_min_conf:
+                    continue
+            alive.append(t)
+
+        for di, b in enumerate(boxes):
+            if di in used_d:
+                continue
+            t = PhoneTrack(tuple(float(v) for v in b), float(confs[di]))
+            self._grab_template(gray, t)
+            alive.append(t)
+        self.tracks = alive
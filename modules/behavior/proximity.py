@@ -0,0 +1,119 @@
+"""
+手-脸距离计算（向量化）
+输入 (H, 21, 3) 的手部关键点数组与少量面部参考点，一次 NumPy 广播算出
+所有 “手部采样点 × 参考点” 的距离、最小值与对应的采样点，开销与手的数量基本无关。
+"""
+import numpy as np
+
+# 每只手参与计算的采样点：手腕 + 五个指尖，外加手掌中心（手腕与四个掌指关节的均值）
+TIP_IDX = (0, 8, 12, 16, 20)
+PALM_IDX = (0, 5, 9, 13, 17)
+POINTS_PER_HAND = len(TIP_IDX) + 1
+
+# MediaPipe Pose 面部/肩部关键点
+NOSE, L_EYE, R_EYE, MOUTH_L, MOUTH_R, L_SHOULDER, R_SHOULDER = 0, 2, 5, 9, 10, 11, 12
+
+
+def landmarks_to_array(multi_hand_landmarks) -> np.ndarray:
+    """MediaPipe 手部关键点列表 → (H, 21, 3) float32"""
+    if not multi_hand_landmarks:
+        return np.zeros((0, 21, 3), dtype=np.float32)
+    return np.array(
+        [[(p.x, p.y, p.z) for p in hand.landmark] for hand in multi_hand_landmarks],
+        dtype=np.float32,
+    )
+
+
+def hand_sample_points(hands: np.ndarray) -> np.ndarray:
+    """(H, 21, 3) → (H * 6, 2) 采样点（只取 xy）"""
+    tips = hands[:, TIP_IDX, :2]
+    palm = hands[:, PALM_IDX, :2].mean(axis=1, keepdims=True)
+    return np.concatenate((tips, palm), axis=1).reshape(-1, 2)
+
+
+def nearest(points: np.ndarray, refs: np.ndarray):
+    """
+    points (N, 2) 与 refs (R, 2) 的两两距离。
+    返回 (min_dist (R,), nearest_point (R, 2))；没有采样点时距离为 inf。
+    """
+    if points.shape[0] == 0:
+        return np.full(refs.shape[0], np.inf), np.full((refs.shape[0], 2), np.nan)
+    diff = points[:, None, :] - refs[None, :, :]
+    dist = np.sqrt(np.einsum("nrk,nrk->nr", diff, diff))
+    idx = dist.argmin(axis=0)
+    cols = np.arange(refs.shape[0])
+    return dist[idx, cols], points[idx]
+
+
+class FaceRefs:
+    """
+    从 Pose 关键点推出的面部参考点（归一化坐标）。
+    mouth / forehead 用于距离计算，eye_center / nose 用于方位约束，scale 为尺度参考。
+    """
+    __slots__ = ("mouth", "forehead", "eye_center", "nose", "scale")
+
+    def __init__(self, pose_landmarks, cfg):
+        lm = pose_landmarks.landmark
+
+        def get(i):
+            try:
+                p = lm[i]
+                return np.array((p.x, p.y))
+            except Exception:
+                return None
+
+        nose, l_eye, r_eye = get(NOSE), get(L_EYE), get(R_EYE)
+        mouth_l, mouth_r = get(MOUTH_L), get(MOUTH_R)
+        l_sh, r_sh = get(L_SHOULDER), get(R_SHOULDER)
+
+        # 面部/口部中心
+        if mouth_l is not None and mouth_r is not None:
+            mouth = (mouth_l + mouth_r) / 2.0 + (0.0, cfg.mouth_offset_y)
+        elif nose is not None:
+            mouth = nose + (0.0, 0.03 + cfg.mouth_offset_y)
+        elif l_sh is not None and r_sh is not None:
+            mouth = (l_sh + r_sh) / 2.0
+        else:
+            mouth = np.array((0.5, 0.5))
+
+        # 眼睛中心与额头参考点
+        if l_eye is not None and r_eye is not None:
+            eye = (l_eye + r_eye) / 2.0
+            forehead = eye - (0.0, cfg.forehead_offset_y)
+        elif nose is not None:
+            eye = np.array((nose[0], max(0.0, nose[1] - 0.03)))
+            forehead = np.array((eye[0], max(0.0, eye[1] - cfg.forehead_offset_y)))
+        else:
+            eye = np.array((0.5, 0.45))
+            forehead = np.array((0.5, 0.43))
+
+        if l_eye is not None and r_eye is not None:
+            scale = float(np.linalg.norm(l_eye - r_eye))
+        elif l_sh is not None and r_sh is not None:
+            scale = float(np.linalg.norm(l_sh - r_sh))
+        else:
+            scale = 0.2
+
+        self.mouth = mouth
+        self.forehead = forehead
+        self.eye_center = eye
+        self.nose = nose
+        self.scale = scale
+
+
+class ProximityEngine:
+    """
+    每帧一次调用：measure(hands, refs) → (脸部最近距离, 最近点, 额头最近距离, 最近点)
+    """
+
+    FACE, HEAD = 0, 1
+
+    def __init__(self):
+        self._refs = np.zeros((2, 2), dtype=np.float64)
+
+    def measure(self, hands: np.ndarray, refs: FaceRefs):
+        self._refs[self.FACE] = refs.mouth
+        self._refs[self.HEAD] = refs.forehead
+        dist, pts = nearest(hand_sample_points(hands), self._refs)
+        return (float(dist[self.FACE]), pts[self.FACE],
+                float(dist[self.HEAD]), pts[self.HEAD])
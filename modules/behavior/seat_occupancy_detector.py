@@ -2,6 +2,8 @@ import numpy as np
 import time
 import cv2
 
+from modules.runtime.thresholds import as_thresholds
+
 class SeatOccupancyDetector:
     """
     上半身视角离席检测:
@@ -11,14 +13,16 @@ class SeatOccupancyDetector:
     """
 
     def __init__(self, config):
-        seat_cfg = config["seat"]
-
-        self.offset_threshold = seat_cfg.get("offset_threshold", 0.4)
-        self.miss_frame_threshold = seat_cfg.get("miss_frame_threshold", 5)
+        # 配置快照 (SeatThresholds)；config 可以是 Thresholds 快照或 yaml 字典
+        self.cfg = as_thresholds(config).seat
 
         self.origin_center = None
         self.miss_count = 0
 
+    def set_thresholds(self, thresholds):
+        """替换配置快照，已记录的原点位置保持不变"""
+        self.cfg = thresholds.seat
+
     def _distance(self, p1, p2):
         return np.linalg.norm(np.array(p1) - np.array(p2))
 
@@ -55,11 +59,25 @@ class SeatOccupancyDetector:
 
         offset = self._distance(shoulder_center, self.origin_center)
 
-        if offset > self.offset_threshold:
+        if offset > self.cfg.offset_threshold:
             output["离席"] = True
 
         return output
 
+    def within_seat(self, pose_landmarks):
+        """
+        只判断肩部中心是否在原点附近（与 detect 的偏移条件一致，不更新任何状态）。
+        供空座低功耗模式的在座探测使用；原点尚未确定时视为在座。
+        """
+        if self.origin_center is None:
+            return True
+        lm = pose_landmarks.landmark
+        shoulder_center = (
+            (lm[11].x + lm[12].x) / 2,
+            (lm[11].y + lm[12].y) / 2
+        )
+        return self._distance(shoulder_center, self.origin_center) <= self.cfg.offset_threshold
+
 def draw_shoulder_center(self, frame, results):
         """
         绘制肩部中心
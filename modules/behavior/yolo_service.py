@@ -0,0 +1,155 @@
+"""
+多路共享的批量 YOLO 手机检测服务
+每路的 PhoneDetector 把待检测的帧提交给服务后阻塞等待；服务线程在一个很短的时间窗口内
+收集各路的请求，凑成一批一次推理，再把结果分发回各路。
+
+取舍由配置控制（phone: 段）：
+- batch_size：一批最多几帧，越大吞吐越高，单帧延迟也越大；
+- batch_wait_ms：第一帧到达后最多等多久凑批，0 表示有多少算多少、不等待。
+
+每个调用方同一时刻只有一个请求在途，所以一批实际最多 min(batch_size, 有请求在途的路数) 帧；
+多路引擎里还受工作线程数限制（见 MultiStreamEngine 的 workers）。调用方应在归还 MediaPipe
+模型之后再提交，避免凑批期间占着模型。
+"""
+import queue
+import threading
+import time
+
+from modules.behavior.phone_detector import _get_yolo_model, _yolo_lock, phone_boxes
+
+
+class _Request:
+    __slots__ = ("frame", "imgsz", "conf", "done", "result", "t_submit")
+
+    def __init__(self, frame, imgsz, conf):
+        self.frame = frame
+        self.imgsz = imgsz
+        self.conf = conf
+        self.done = threading.Event()
+        self.result = ([], [])
+        self.t_submit = time.monotonic()
+
+
+class YoloBatchService:
+    """
+    Args:
+        cfg: PhoneThresholds 快照（使用 batch_size / batch_wait_ms）。
+        model: YOLO 模型，默认使用手机检测的全局模型。
+    """
+
+    def __init__(self, cfg, model=None):
+        self.cfg = cfg
+        self.model = model if model is not None else _get_yolo_model()
+        self._queue = queue.Queue()
+        self._stop = threading.Event()
+        self._thread = None
+
+        # 统计
+        self.batches = 0
+        self.frames = 0
+        self._wait_total = 0.0
+        self._infer_total = 0.0
+
+    @property
+    def available(self) -> bool:
+        return self.model is not None
+
+    def set_config(self, cfg):
+        self.cfg = cfg
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="yolo-batch", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._queue.put(None)
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+            self._thread = None
+        # 唤醒仍在等待的调用方
+        while True:
+            try:
+                req = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if req is not None:
+                req.done.set()
+
+    def detect(self, frame, imgsz, conf, timeout=2.0):
+        """
+        提交一帧并等待结果，返回 (手机框列表, 置信度列表)。
+        服务未启动或超时时返回空结果。
+        """
+        if self.model is None or self._thread is None:
+            return [], []
+        req = _Request(frame, int(imgsz), float(conf))
+        self._queue.put(req)
+        if not req.done.wait(timeout):
+            print("[PhoneDetector] 批量检测超时")
+            return [], []
+        return req.result
+
+    def _collect(self, first):
+        """以第一个请求为起点，在 batch_wait_ms 内收集最多 batch_size 个请求"""
+        cfg = self.cfg
+        batch = [first]
+        deadline = first.t_submit + cfg.batch_wait_ms / 1000.0
+        while len(batch) < cfg.batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                req = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if req is None:
+                self._stop.set()
+                break
+            batch.append(req)
+        return batch
+
+    def _run(self):
+        while not self._stop.is_set():
+            first = self._queue.get()
+            if first is None:
+                break
+            batch = self._collect(first)
+            t0 = time.monotonic()
+            self._wait_total += sum(t0 - r.t_submit for r in batch)
+
+            # 输入尺寸不同的请求分开推理（档位切换期间可能混有两种尺寸）
+            groups = {}
+            for req in batch:
+                groups.setdefault(req.imgsz, []).append(req)
+            for imgsz, reqs in groups.items():
+                self._infer(imgsz, reqs)
+
+            self._infer_total += time.monotonic() - t0
+            self.batches += 1
+            self.frames += len(batch)
+
+    def _infer(self, imgsz, reqs):
+        conf_min = min(r.conf for r in reqs)
+        try:
+            with _yolo_lock:
+                results = self.model([r.frame for r in reqs], verbose=False, conf=conf_min, imgsz=imgsz)
+            for req, result in zip(reqs, results):
+                req.result = phone_boxes(result, req.conf)
+        except Exception as e:
+            print(f"[PhoneDetector] 批量检测失败: {e}")
+        finally:
+            for req in reqs:
+                req.done.set()
+
+    def stats(self) -> dict:
+        batches = max(self.batches, 1)
+        frames = max(self.frames, 1)
+        return {
+            "batches": self.batches,
+            "frames": self.frames,
+            "avg_batch": round(self.frames / batches, 2),
+            "avg_wait_ms": round(self._wait_total / frames * 1000.0, 2),
+            "avg_infer_ms": round(self._infer_total / batches * 1000.0, 2),
+        }
@@ -1,37 +1,75 @@
 import cv2
-import mediapipe as mp
 import numpy as np
 import math
-from .config import (
-    SHOULDER_TILT_THRESH, 
-    HEAD_FORWARD_THRESH, 
-    HUNCHBACK_THRESH,
-    NECK_TILT_THRESH,
-    SCREEN_RATIO_THRESH,
-    LEAN_DEGREE_THRESH
-)
+import time
+from modules.runtime.thresholds import current_thresholds
+from modules.posture.history import PostureHistory
 
 class PostureDetector:
-    def __init__(self):
-        self.mp_pose = mp.solutions.pose
-        self.pose = self.mp_pose.Pose(
+    def __init__(self, thresholds=None, model_complexity=1, with_model=True):
+        # 坐姿配置快照 (PostureThresholds)，热更新时整体替换引用
+        self.cfg = (thresholds or current_thresholds()).posture
+
+        # with_model=False 时只保留状态与分析逻辑，关键点由外部（共享模型池）提供给 analyze()
+        self.model_complexity = model_complexity
+        self.pose = None
+        if with_model:
+            # mediapipe 延迟到实例化时导入，避免拖慢 UI 启动
+            import mediapipe as mp
+            self.mp_pose = mp.solutions.pose
+            self.pose = self._create_pose(model_complexity)
+        
+        # 用于稳定性分析的多尺度历史统计（预分配环形缓冲）
+        self.history = PostureHistory(self.cfg)
+
+        # 最近一帧的 MediaPipe 姿态关键点（供行为检测等下游模块使用，不放进结果字典）
+        self.last_pose_landmarks = None
+
+        # 统计窗口使用的时钟；关键点回放时替换为按记录时间戳走的时钟
+        self.clock = time.monotonic
+
+    def _create_pose(self, model_complexity):
+        return self.mp_pose.Pose(
             static_image_mode=False, 
-            model_complexity=1, 
+            model_complexity=model_complexity, 
             min_detection_confidence=0.5,
             min_tracking_confidence=0.5
         )
-        
-        # 用于稳定性分析的历史数据
-        self.history = [] 
+
+    def set_model_complexity(self, model_complexity):
+        """切换 Pose 模型复杂度（0/1/2），需要重建模型，历史统计保留"""
+        if model_complexity == self.model_complexity:
+            return
+        if self.pose is None:
+            self.model_complexity = model_complexity
+            return
+        old = self.pose
+        self.pose = self._create_pose(model_complexity)
+        self.model_complexity = model_complexity
+        old.close()
+
+    def set_thresholds(self, thresholds):
+        """替换配置快照，模型实例保持不变；统计窗口长度变化时历史会重建"""
+        self.cfg = thresholds.posture
+        self.history.set_config(self.cfg)
+
+    def detect(self, image):
+        """只运行 Pose 模型，返回姿态关键点（没检测到人时为 None）"""
+        image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+        return self.pose.process(image_rgb).pose_landmarks
 
     def process_frame(self, image):
         """
         接收一帧图像，返回分析结果
         """
+        return self.analyze(image, self.detect(image))
 
-        # 图像预处理
-        image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-        results = self.pose.process(image_rgb)
+    def analyze(self, image, pose_landmarks, shape=None):
+        """
+        根据给定的姿态关键点（模型输出或滤波/预测值）计算坐姿指标
+        image 为 None 时（关键点回放）由 shape=(h, w) 给出画面尺寸
+        """
+        cfg = self.cfg  # 本帧固定使用同一份快照
 
         # 初始化返回数据
         output_data = {
@@ -50,17 +88,18 @@ class PostureDetector:
             "neck_tilt": 0.0,                   # 颈部侧倾角度
             "shoulder_screen_ratio": 0.0,       # 肩膀宽度与屏幕宽度比
             "lean_degree":0,                    # 躯干偏移程度
-            "stability_score": 100,             # 稳定性评分
-            "landmarks": [],                    # 返回关键点给前端画图用
+            "stability_score": 100,             # 稳定性评分（短窗口）
+            "stability_score_long": 100,        # 稳定性评分（长窗口）
+            "hunchback_avg": 0.0,               # 驼背程度短窗口均值
+            "head_forward_avg": 0.0,            # 头部前伸短窗口均值
+            "bad_posture_ratio": 0.0,           # 长窗口内驼背/头前伸时间占比
         }
+        self.last_pose_landmarks = pose_landmarks
 
 
-        if results.pose_landmarks:
-            landmarks = results.pose_landmarks.landmark
-            h, w, _ = image.shape
-
-            # 返回关键点，方便前端界面上画骨架
-            output_data["landmarks"] = results.pose_landmarks
+        if pose_landmarks:
+            landmarks = pose_landmarks.landmark
+            h, w = (image.shape if image is not None else shape)[:2]
 
             # 获取关键点坐标，计算基础数据
             nose = np.array([landmarks[0].x * w, landmarks[0].y * h, landmarks[0].z * w]) 
@@ -77,7 +116,7 @@ class PostureDetector:
             dx = r_shoulder[0] - l_shoulder[0]
             angle = math.degrees(math.atan2(dy, dx))
             output_data["shoulder_tilt_angle"] = round(angle, 2)
-            if abs(angle) > SHOULDER_TILT_THRESH:
+            if abs(angle) > cfg.shoulder_tilt:
                 output_data["is_shoulder_tilted"] = True
             
             # 判断头部前伸
@@ -87,8 +126,6 @@ class PostureDetector:
                 z_diff = 0
             head_forward_degree = z_diff
             output_data["head_forward_degree"] = head_forward_degree
-            if z_diff > HEAD_FORWARD_THRESH:
-                output_data["is_head_forward"] = True
             
             # 判断驼背
             if shoulder_width > 0:
@@ -96,8 +133,6 @@ class PostureDetector:
             else:
                 neck_ratio = 0
             hunchback_degree = neck_ratio
-            if neck_ratio < HUNCHBACK_THRESH:
-                output_data["is_hunchback"] = True
             output_data["hunchback_degree"] = hunchback_degree
             
             # 计算颈部侧倾
@@ -105,13 +140,13 @@ class PostureDetector:
             dx_ear = r_ear[0] - l_ear[0]
             head_angle = math.degrees(math.atan2(dy_ear, dx_ear))
             output_data["neck_tilt"] = round(head_angle, 2)
-            if abs(head_angle) > NECK_TILT_THRESH:
+            if abs(head_angle) > cfg.neck_tilt:
                 output_data["is_neck_tilted"] = True
 
             # 判断是否距离屏幕过近
             shoulder_screen_ratio = shoulder_width / w
             output_data["shoulder_screen_ratio"] = round(shoulder_screen_ratio, 2)
-            if shoulder_screen_ratio > SCREEN_RATIO_THRESH:
+            if shoulder_screen_ratio > cfg.screen_distance:
                 output_data["dist_screen"] = "too_close"
 
             # 判断躯干偏移
@@ -119,25 +154,22 @@ class PostureDetector:
             img_center = w / 2
             lean_degree = (center_x - img_center) / w
             output_data["lean_degree"]=lean_degree
-            if lean_degree > LEAN_DEGREE_THRESH:
+            if lean_degree > cfg.lean:
                 output_data["body_lean"] = "leaning_right" # 画面右侧
-            elif lean_degree < -LEAN_DEGREE_THRESH:
+            elif lean_degree < -cfg.lean:
                 output_data["body_lean"] = "leaning_left"  # 画面左侧
 
-            # 稳定性分析
-            current_center = (l_shoulder + r_shoulder) / 2
-            self.history.append(current_center)
-            if len(self.history) > 50:
-                self.history.pop(0)
-            if len(self.history) > 5:
-                history_array = np.array(self.history)
-                std_devs = np.std(history_array, axis=0)
-                # 归一化：将像素抖动转为相对于画面宽度的比例
-                normalized_jitter = (std_devs[0] / w + std_devs[1] / h) / 2 * 1000
-                deduction = min(normalized_jitter * 5, 60) 
-                output_data["stability_score"] = int(100 - deduction)
+            # 稳定性分析 + 驼背/头前伸判定（窗口均值 + 回差，避免逐帧闪烁）
+            # 肩中心按画面宽高归一化后入队，抖动直接是相对比例
+            stats = self.history.update(
+                shoulder_mid[0] / w, shoulder_mid[1] / h,
+                hunchback_degree, head_forward_degree,
+                self.clock(),
+            )
+            output_data.update(stats)
 
         return output_data
     
     def close(self):
-        self.pose.close()
\ No newline at end of file
+        if self.pose is not None:
+            self.pose.close()
\ No newline at end of file
@@ -0,0 +1,199 @@
+"""
+坐姿历史统计
+- RingBuffer:   预分配的 NumPy 环形缓冲，按时间窗口淘汰旧样本，增量维护均值/方差
+- Hysteresis:   带回差的阈值判定，进入/退出使用不同阈值，防止结论来回跳
+- PostureHistory: 短窗口（秒级）+ 长窗口（分钟级）的多尺度统计
+
+每帧的开销与窗口长度无关（均摊 O(1)），不再对整段历史做 np.array / np.std。
+"""
+import numpy as np
+
+
+class RingBuffer:
+    """
+    定长环形缓冲 + 时间窗口。
+    push() 时先淘汰超出 horizon 秒的旧样本（缓冲满时也淘汰最旧的），
+    同时增量更新 sum / sumsq；每写满一轮全量重算一次，消除浮点累积误差。
+    """
+
+    def __init__(self, horizon: float, dim: int = 1, max_rate: float = 60.0):
+        self.horizon = float(horizon)
+        self.dim = int(dim)
+        self.capacity = max(8, int(np.ceil(self.horizon * max_rate)) + 1)
+
+        self._data = np.zeros((self.capacity, self.dim), dtype=np.float64)
+        self._ts = np.zeros(self.capacity, dtype=np.float64)
+        self._sum = np.zeros(self.dim, dtype=np.float64)
+        self._sumsq = np.zeros(self.dim, dtype=np.float64)
+        self._head = 0    # 最旧样本位置
+        self._size = 0
+        self._pushes = 0
+
+    def __len__(self):
+        return self._size
+
+    def clear(self):
+        self._sum[:] = 0.0
+        self._sumsq[:] = 0.0
+        self._head = 0
+        self._size = 0
+        self._pushes = 0
+
+    def _pop_oldest(self):
+        old = self._data[self._head]
+        self._sum -= old
+        self._sumsq -= old * old
+        self._head = (self._head + 1) % self.capacity
+        self._size -= 1
+
+    def expire(self, now: float):
+        """淘汰早于 now - horizon 的样本"""
+        limit = now - self.horizon
+        while self._size and self._ts[self._head] < limit:
+            self._pop_oldest()
+
+    def push(self, value, now: float):
+        self.expire(now)
+        if self._size == self.capacity:
+            self._pop_oldest()
+
+        idx = (self._head + self._size) % self.capacity
+        row = self._data[idx]
+        row[:] = value
+        self._ts[idx] = now
+        self._sum += row
+        self._sumsq += row * row
+        self._size += 1
+
+        self._pushes += 1
+        if self._pushes >= self.capacity:
+            self._recompute()
+
+    def _recompute(self):
+        self._pushes = 0
+        if self._size == 0:
+            self._sum[:] = 0.0
+            self._sumsq[:] = 0.0
+            return
+        idx = (self._head + np.arange(self._size)) % self.capacity
+        window = self._data[idx]
+        self._sum = window.sum(axis=0)
+        self._sumsq = (window * window).sum(axis=0)
+
+    def mean(self) -> np.ndarray:
+        if self._size == 0:
+            return np.zeros(self.dim)
+        return self._sum / self._size
+
+    def var(self) -> np.ndarray:
+        """总体方差（与 np.var / np.std 默认 ddof=0 一致）"""
+        if self._size == 0:
+            return np.zeros(self.dim)
+        m = self._sum / self._size
+        return np.maximum(self._sumsq / self._size - m * m, 0.0)
+
+    def std(self) -> np.ndarray:
+        return np.sqrt(self.var())
+
+
+class Hysteresis:
+    """
+    回差判定。
+    higher_is_bad=True : value > on 进入异常，value < off 才退出
+    higher_is_bad=False: value < on 进入异常，value > off 才退出
+    """
+
+    def __init__(self, on: float, off: float, higher_is_bad: bool = True):
+        self.on = on
+        self.off = off
+        self.higher_is_bad = higher_is_bad
+        self.active = False
+
+    def update(self, value: float) -> bool:
+        if self.higher_is_bad:
+            if not self.active and value > self.on:
+                self.active = True
+            elif self.active and value < self.off:
+                self.active = False
+        else:
+            if not self.active and value < self.on:
+                self.active = True
+            elif self.active and value > self.off:
+                self.active = False
+        return self.active
+
+
+def _hysteresis(thresh: float, margin: float, higher_is_bad: bool) -> Hysteresis:
+    """按相对回差生成退出阈值"""
+    gap = abs(thresh) * margin
+    off = thresh - gap if higher_is_bad else thresh + gap
+    return Hysteresis(thresh, off, higher_is_bad)
+
+
+class PostureHistory:
+    """
+    多尺度坐姿统计。
+
+    每帧样本: 肩中心 (x/w, y/h)、驼背比例、头部前伸比例。
+    - 短窗口（short_window 秒）: 稳定性评分、驼背/头前伸的平滑均值与回差判定
+    - 长窗口（long_window 秒）: 长时稳定性、不良坐姿时间占比
+    """
+
+    # 样本列
+    CX, CY, HUNCH, HEAD = range(4)
+
+    def __init__(self, cfg):
+        self.cfg = cfg
+        self.short = RingBuffer(cfg.short_window, dim=4)
+        self.long = RingBuffer(cfg.long_window, dim=3)   # cx, cy, 是否不良坐姿
+        self._build_gates(cfg)
+
+    def _build_gates(self, cfg):
+        self.hunch_gate = _hysteresis(cfg.hunchback, cfg.hysteresis, higher_is_bad=False)
+        self.head_gate = _hysteresis(cfg.head_forward, cfg.hysteresis, higher_is_bad=True)
+
+    def set_config(self, cfg):
+        """窗口长度变化时重建缓冲（历史清空），只改阈值时保留历史与当前判定"""
+        old = self.cfg
+        self.cfg = cfg
+        if (cfg.short_window, cfg.long_window) != (old.short_window, old.long_window):
+            self.short = RingBuffer(cfg.short_window, dim=4)
+            self.long = RingBuffer(cfg.long_window, dim=3)
+        hunch_active, head_active = self.hunch_gate.active, self.head_gate.active
+        self._build_gates(cfg)
+        self.hunch_gate.active = hunch_active
+        self.head_gate.active = head_active
+
+    @staticmethod
+    def _stability(std_xy) -> int:
+        # 归一化抖动（已是相对画面宽高的比例）
+        normalized_jitter = (std_xy[0] + std_xy[1]) / 2 * 1000
+        deduction = min(normalized_jitter * 5, 60)
+        return int(100 - deduction)
+
+    def update(self, center_x: float, center_y: float, hunch: float, head: float, now: float) -> dict:
+        """
+        写入一帧并返回统计结果。
+        center_x / center_y 为相对画面宽高的归一化坐标。
+        """
+        self.short.push((center_x, center_y, hunch, head), now)
+        s_mean = self.short.mean()
+
+        is_hunchback = self.hunch_gate.update(s_mean[self.HUNCH])
+        is_head_forward = self.head_gate.update(s_mean[self.HEAD])
+
+        self.long.push((center_x, center_y, float(is_hunchback or is_head_forward)), now)
+
+        out = {
+            "is_hunchback": is_hunchback,
+            "is_head_forward": is_head_forward,
+            "hunchback_avg": float(s_mean[self.HUNCH]),
+            "head_forward_avg": float(s_mean[self.HEAD]),
+            "bad_posture_ratio": float(self.long.mean()[2]),
+        }
+        # 样本太少时方差没有意义，沿用满分
+        if len(self.short) > 5:
+            out["stability_score"] = self._stability(self.short.std()[:2])
+        if len(self.long) > 5:
+            out["stability_score_long"] = self._stability(self.long.std()[:2])
+        return out
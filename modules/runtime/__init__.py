@@ -0,0 +1,22 @@
+# 运行时基础设施：配置服务等跨模块共享的组件（不依赖 Qt）
+from .thresholds import (
+    Thresholds, ConfigError,
+    get_store, current_thresholds, as_thresholds,
+)
+from .watcher import ConfigWatcher
+from .quality import QualityController, QualityLevel
+from .presence import PresenceMonitor
+from .filters import LandmarkFilters
+from .events import EventDetector, EventState
+from .alerts import AlertEngine
+
+__all__ = [
+    "Thresholds", "ConfigError",
+    "get_store", "current_thresholds", "as_thresholds",
+    "ConfigWatcher",
+    "QualityController", "QualityLevel",
+    "PresenceMonitor",
+    "LandmarkFilters",
+    "EventDetector", "EventState",
+    "AlertEngine",
+]
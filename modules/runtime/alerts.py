@@ -0,0 +1,246 @@
+"""
+声明式提醒规则
+规则写在 config/alert_rules.yaml（条件、等级、持续时间、冷却、提示音），加载时编译成谓词函数，
+在推理线程里对事件通道的状态（EventDetector.states）逐帧求值，只把产生的提醒动作交给 UI。
+
+- 条件是一个小表达式：状态名、字符串/数字常量、== != < <= > >=、and / or / not，
+  例如 `phone`、`blink_state == "closed"`、`hunchback or shoulder_tilt`；
+- 每条规则独立去抖：条件连续成立 hold 秒后触发，之后每 cooldown 秒最多触发一次；
+- 规则按文件顺序排优先级：已确认的高优先级规则会压住后面的规则（后面的规则照常计时，只是不提示）；
+- toggle 对应控制面板上的开关，开关关闭时规则不参与求值。
+"""
+import ast
+import operator
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, ClassVar, Optional
+
+import yaml
+
+from .events import BOOL_STATES, CATEGORY_STATES, CROSSINGS
+from .thresholds import ConfigError
+
+# 条件中可以引用的状态名（与事件通道一致）
+STATE_NAMES = frozenset(
+    [name for name, _ in BOOL_STATES]
+    + [name for name, _ in CATEGORY_STATES]
+    + [name for name, *_ in CROSSINGS]
+)
+
+# 配置文件缺失或无效时使用的内置规则（与 alert_rules.yaml 的出厂内容一致）
+DEFAULT_RULES = (
+    {"name": "phone", "when": "phone", "toggle": "phone", "level": 2, "message": "禁止使用手机", "sound": "alarm"},
+    {"name": "away", "when": "away", "toggle": "away", "level": 2, "message": "检测到离席", "sound": "alarm"},
+    {"name": "too_close", "when": 'dist_screen == "too_close"', "toggle": "dist", "level": 1,
+     "message": "离屏幕太近了", "sound": "alert"},
+    {"name": "eyes_closed", "when": 'blink_state == "closed"', "toggle": "sleep", "level": 1,
+     "message": "请勿闭眼", "sound": "alert"},
+    {"name": "chin", "when": "chin", "toggle": "chin", "level": 1, "message": "请勿托腮", "sound": "alert"},
+    {"name": "face_touch", "when": "face_touch", "toggle": "face", "level": 1, "message": "不要摸脸", "sound": "alert"},
+    {"name": "neck", "when": "neck_tilt", "toggle": "posture", "level": 1, "message": "脖子前伸", "sound": "alert"},
+    {"name": "posture", "when": "hunchback or shoulder_tilt", "toggle": "posture", "level": 1,
+     "message": "坐姿不正", "sound": "alert"},
+)
+
+
+def _default_rules_path() -> Path:
+    # 兼容 PyInstaller 打包后的临时目录
+    if hasattr(sys, "_MEIPASS"):
+        return Path(sys._MEIPASS) / "config" / "alert_rules.yaml"
+    return Path(__file__).resolve().parents[2] / "config" / "alert_rules.yaml"
+
+
+# ---------------- 条件编译 ----------------
+
+_COMPARE_OPS = {
+    ast.Eq: operator.eq, ast.NotEq: operator.ne,
+    ast.Lt: operator.lt, ast.LtE: operator.le,
+    ast.Gt: operator.gt, ast.GtE: operator.ge,
+}
+
+
+def _compile_node(node, expr):
+    if isinstance(node, ast.Name):
+        if node.id not in STATE_NAMES:
+            raise ConfigError(f"{expr!r}: 未知状态 {node.id}")
+        key = node.id
+        return lambda s: s.get(key)
+
+    if isinstance(node, ast.Constant) and isinstance(node.value, (str, int, float, bool)):
+        value = node.value
+        return lambda s: value
+
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.Not):
+        inner = _compile_node(node.operand, expr)
+        return lambda s: not inner(s)
+
+    if isinstance(node, ast.BoolOp):
+        parts = tuple(_compile_node(v, expr) for v in node.values)
+        if isinstance(node.op, ast.And):
+            return lambda s: all(p(s) for p in parts)
+        return lambda s: any(p(s) for p in parts)
+
+    if isinstance(node, ast.Compare):
+        operands = (_compile_node(node.left, expr),) + tuple(_compile_node(c, expr) for c in node.comparators)
+        ops = []
+        for op in node.ops:
+            fn = _COMPARE_OPS.get(type(op))
+            if fn is None:
+                raise ConfigError(f"{expr!r}: 不支持的比较 {type(op).__name__}")
+            ops.append(fn)
+        ops = tuple(ops)
+
+        def compare(s):
+            values = [f(s) for f in operands]
+            for fn, left, right in zip(ops, values, values[1:]):
+                # 状态尚未出现（None）时条件不成立
+                if left is None or right is None:
+                    return False
+                try:
+                    if not fn(left, right):
+                        return False
+                except TypeError:
+                    return False
+            return True
+        return compare
+
+    raise ConfigError(f"{expr!r}: 不支持的语法 {type(node).__name__}")
+
+
+def compile_condition(expr: str) -> Callable[[dict], bool]:
+    """把条件表达式编译成 predicate(states) -> bool"""
+    try:
+        tree = ast.parse(str(expr).strip(), mode="eval")
+    except SyntaxError as e:
+        raise ConfigError(f"{expr!r}: 语法错误 ({e.msg})") from None
+    fn = _compile_node(tree.body, expr)
+    return lambda states: bool(fn(states))
+
+
+# ---------------- 规则 ----------------
+
+@dataclass(frozen=True)
+class AlertRule:
+    LEVELS: ClassVar[tuple] = (1, 2)     # 1 轻度（气泡），2 重度（弹窗）
+
+    name: str
+    when: str
+    message: str
+    level: int = 1
+    hold: float = 2.0                    # 条件需持续成立的秒数
+    cooldown: float = 4.0                # 两次触发的最小间隔（秒）
+    sound: Optional[str] = None          # 提示音名称（SoundMgr），None 表示静音
+    toggle: Optional[str] = None         # 控制面板开关名，None 表示总是启用
+    predicate: Callable = field(default=None, compare=False, repr=False)
+
+    def action(self, now) -> dict:
+        return {"rule": self.name, "message": self.message, "level": self.level,
+                "sound": self.sound, "ts": round(now, 3)}
+
+
+_RULE_KEYS = {"name", "when", "message", "level", "hold", "cooldown", "sound", "toggle"}
+
+
+def _build_rule(raw, defaults, index) -> AlertRule:
+    if not isinstance(raw, dict):
+        raise ConfigError(f"rules[{index}]: 需要映射，实际为 {raw!r}")
+    unknown = set(raw) - _RULE_KEYS
+    if unknown:
+        raise ConfigError(f"rules[{index}]: 未知字段 {', '.join(sorted(unknown))}")
+    spec = dict(defaults)
+    spec.update(raw)
+    for key in ("name", "when", "message"):
+        if not spec.get(key):
+            raise ConfigError(f"rules[{index}]: 缺少 {key}")
+    try:
+        level = int(spec.get("level", 1))
+        hold = float(spec.get("hold", 2.0))
+        cooldown = float(spec.get("cooldown", 4.0))
+    except (TypeError, ValueError):
+        raise ConfigError(f"rules[{index}] ({spec['name']}): level/hold/cooldown 需要数值") from None
+    if level not in AlertRule.LEVELS:
+        raise ConfigError(f"rules[{index}] ({spec['name']}): level 只能是 1 或 2")
+    if hold < 0 or cooldown < 0:
+        raise ConfigError(f"rules[{index}] ({spec['name']}): hold/cooldown 不能为负")
+    return AlertRule(
+        name=str(spec["name"]),
+        when=str(spec["when"]),
+        message=str(spec["message"]),
+        level=level,
+        hold=hold,
+        cooldown=cooldown,
+        sound=spec.get("sound") or None,
+        toggle=spec.get("toggle") or None,
+        predicate=compile_condition(spec["when"]),
+    )
+
+
+def parse_rules(raw: dict) -> tuple:
+    """解析 alert_rules.yaml 的内容，任何错误都抛出 ConfigError"""
+    raw = raw or {}
+    defaults = raw.get("defaults") or {}
+    if not isinstance(defaults, dict):
+        raise ConfigError("defaults: 需要映射")
+    rules = raw.get("rules")
+    if not isinstance(rules, list) or not rules:
+        raise ConfigError("rules: 需要非空列表")
+    built = tuple(_build_rule(r, defaults, i) for i, r in enumerate(rules))
+    names = [r.name for r in built]
+    dup = {n for n in names if names.count(n) > 1}
+    if dup:
+        raise ConfigError(f"rules: 规则名重复 {', '.join(sorted(dup))}")
+    return built
+
+
+def load_rules(path=None) -> tuple:
+    """读取规则文件；文件缺失或无效时打印警告并使用内置规则"""
+    path = Path(path) if path is not None else _default_rules_path()
+    try:
+        if not path.exists():
+            print(f"Warning: alert rules not found at {path}, using built-in rules")
+            return parse_rules({"rules": list(DEFAULT_RULES)})
+        with open(path, "r", encoding="utf-8") as f:
+            return parse_rules(yaml.safe_load(f))
+    except Exception as e:
+        print(f"Warning: alert_rules.yaml 无效 ({e})，使用内置规则")
+        return parse_rules({"rules": list(DEFAULT_RULES)})
+
+
+class AlertEngine:
+    """
+    Args:
+        rules: AlertRule 序列（顺序即优先级），默认从 alert_rules.yaml 加载。
+    """
+
+    def __init__(self, rules=None):
+        self.rules = tuple(rules) if rules is not None else load_rules()
+        self.toggles = {}
+        self.reset()
+
+    def reset(self):
+        self._since = {}         # 规则名 → 条件开始连续成立的时间
+        self._last_fired = {}    # 规则名 → 上次触发时间
+
+    def set_toggles(self, toggles):
+        """控制面板开关（可能在其他线程调用，只做一次引用赋值）"""
+        self.toggles = dict(toggles or {})
+
+    def evaluate(self, states, now) -> list:
+        """对当前状态求值，返回需要 UI 执行的提醒动作列表"""
+        toggles = self.toggles
+        actions = []
+        confirmed = False
+        for rule in self.rules:
+            if (rule.toggle is not None and not toggles.get(rule.toggle, True)) or not rule.predicate(states):
+                self._since.pop(rule.name, None)
+                continue
+            since = self._since.setdefault(rule.name, now)
+            if now - since < rule.hold or confirmed:
+                continue
+            confirmed = True
+            last = self._last_fired.get(rule.name)
+            if last is None or now - last >= rule.cooldown:
+                self._last_fired[rule.name] = now
+                actions.append(rule.action(now))
+        return actions
@@ -0,0 +1,325 @@
+"""
+无界面服务的本地结果接口
+ResultsHub 汇总引擎产出的每帧结果（每路最新一帧 + 累计统计 + 最近结果的环形队列），
+ResultsAPI 把它映射为几个只读的 JSON 接口，可通过：
+- 本机 HTTP（127.0.0.1，标准库 http.server，无额外依赖）；
+- Unix 域套接字（POSIX）上的同一套 HTTP；
+- LocalClient：不经过套接字、在进程内直接调用，供测试使用。
+
+接口：
+    GET /health                     运行状态
+    GET /streams                    路名列表
+    GET /latest[?stream=名]         每路（或指定路）最新一帧
+    GET /aggregates[?stream=名]     累计统计（专注度均值、玩手机/离席/驼背占比等）
+    GET /recent?after=序号          序号之后的结果（最多 limit 条，默认 100）
+    GET /events[?after=序号]        Server-Sent Events 推送实时结果（仅 HTTP）
+"""
+import json
+import os
+import socketserver
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+
+
+def _json_default(v):
+    if isinstance(v, np.generic):
+        return v.item()
+    if isinstance(v, bytes):
+        return None
+    return str(v)
+
+
+def to_json(obj) -> str:
+    return json.dumps(obj, ensure_ascii=False, default=_json_default)
+
+
+class _StreamStats:
+    """单路累计统计"""
+    __slots__ = ("frames", "first_ts", "last_ts", "score_sum", "score_n",
+                 "phone", "away", "hunch", "gaze_off")
+
+    def __init__(self):
+        self.frames = 0
+        self.first_ts = None
+        self.last_ts = None
+        self.score_sum = 0.0
+        self.score_n = 0
+        self.phone = 0
+        self.away = 0
+        self.hunch = 0
+        self.gaze_off = 0
+
+    def add(self, result):
+        a, b, c = result.get("A") or {}, result.get("B") or {}, result.get("C") or {}
+        ts = result.get("ts")
+        self.frames += 1
+        self.first_ts = ts if self.first_ts is None else self.first_ts
+        self.last_ts = ts
+        away = bool(c.get("离席检测", {}).get("离席"))
+        self.away += away
+        if away:
+            return
+        score = b.get("attention_score")
+        if score is not None:
+            self.score_sum += float(score)
+            self.score_n += 1
+        self.phone += bool(c.get("手机使用", {}).get("使用手机"))
+        self.hunch += bool(a.get("is_hunchback"))
+        self.gaze_off += bool(b.get("gaze_off"))
+
+    def summary(self) -> dict:
+        n = max(self.frames, 1)
+        present = max(self.frames - self.away, 1)
+        return {
+            "frames": self.frames,
+            "first_ts": self.first_ts,
+            "last_ts": self.last_ts,
+            "attention_avg": round(self.score_sum / self.score_n, 1) if self.score_n else None,
+            "away_ratio": round(self.away / n, 3),
+            "phone_ratio": round(self.phone / present, 3),
+            "hunch_ratio": round(self.hunch / present, 3),
+            "gaze_off_ratio": round(self.gaze_off / present, 3),
+        }
+
+
+class ResultsHub:
+    """
+    线程安全的结果汇总。publish() 由消费引擎结果的线程调用，其余方法供接口线程读取。
+
+    Args:
+        history: 最近结果环形队列的长度（/recent 与 /events 从这里取）。
+    """
+
+    def __init__(self, history=256):
+        self._cond = threading.Condition()
+        self._recent = deque(maxlen=int(history))
+        self._latest = {}
+        self._stats = {}
+        self._seq = 0
+        self.started_at = time.time()
+
+    @property
+    def seq(self) -> int:
+        return self._seq
+
+    def publish(self, result: dict):
+        with self._cond:
+            self._seq += 1
+            item = dict(result, hub_seq=self._seq)
+            name = item.get("stream", "default")
+            self._latest[name] = item
+            self._stats.setdefault(name, _StreamStats()).add(item)
+            self._recent.append(item)
+            self._cond.notify_all()
+
+    def streams(self):
+        with self._cond:
+            return sorted(self._latest)
+
+    def latest(self, stream=None):
+        with self._cond:
+            if stream is None:
+                return dict(self._latest)
+            return self._latest.get(stream)
+
+    def aggregates(self, stream=None):
+        with self._cond:
+            if stream is None:
+                return {name: s.summary() for name, s in self._stats.items()}
+            s = self._stats.get(stream)
+            return s.summary() if s else None
+
+    def since(self, after, limit=100):
+        with self._cond:
+            items = [r for r in self._recent if r["hub_seq"] > after]
+        return items[:limit]
+
+    def wait(self, after, timeout=1.0, limit=100):
+        """阻塞到有序号大于 after 的结果（或超时），返回这些结果"""
+        with self._cond:
+            if self._seq <= after:
+                self._cond.wait(timeout)
+            items = [r for r in self._recent if r["hub_seq"] > after]
+        return items[:limit]
+
+
+class ResultsAPI:
+    """
+    路由：handle(method, path) → (HTTP 状态码, 可 JSON 序列化的对象)。
+    HTTP 处理器与 LocalClient 共用这一份逻辑。
+    """
+
+    def __init__(self, hub: ResultsHub, status_fn=None):
+        self.hub = hub
+        self.status_fn = status_fn   # 可选：返回引擎状态字典，并入 /health
+
+    def handle(self, method, path):
+        if method != "GET":
+            return 405, {"error": "method not allowed"}
+        url = urlparse(path)
+        query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        stream = query.get("stream")
+        route = url.path.rstrip("/") or "/"
+
+        if route == "/health":
+            body = {"ok": True, "uptime_sec": round(time.time() - self.hub.started_at, 1),
+                    "results": self.hub.seq}
+            if self.status_fn is not None:
+                body["engine"] = self.status_fn()
+            return 200, body
+        if route == "/streams":
+            return 200, {"streams": self.hub.streams()}
+        if route == "/latest":
+            body = self.hub.latest(stream)
+            if stream is not None and body is None:
+                return 404, {"error": f"unknown stream {stream}"}
+            return 200, body
+        if route == "/aggregates":
+            body = self.hub.aggregates(stream)
+            if stream is not None and body is None:
+                return 404, {"error": f"unknown stream {stream}"}
+            return 200, body
+        if route == "/recent":
+            try:
+                after = int(query.get("after", 0))
+                limit = max(1, min(int(query.get("limit", 100)), 1000))
+            except ValueError:
+                return 400, {"error": "after/limit must be integers"}
+            return 200, {"seq": self.hub.seq, "items": self.hub.since(after, limit)}
+        return 404, {"error": f"unknown path {url.path}"}
+
+
+class LocalClient:
+    """
+    进程内的替身客户端：与 HTTP 客户端同样的调用方式，但不经过套接字。
+    返回值经过一次 JSON 序列化/反序列化，与真实接口拿到的数据一致。
+    """
+
+    def __init__(self, api: ResultsAPI):
+        self.api = api
+
+    def get(self, path):
+        status, body = self.api.handle("GET", path)
+        return status, json.loads(to_json(body))
+
+    def get_json(self, path):
+        status, body = self.get(path)
+        if status != 200:
+            raise RuntimeError(f"GET {path} -> {status}: {body}")
+        return body
+
+
+def _make_handler(api: ResultsAPI):
+    class Handler(BaseHTTPRequestHandler):
+        server_version = "SmartStudyDaemon/1.0"
+
+        def log_message(self, fmt, *args):
+            pass
+
+        def _send_json(self, status, body):
+            data = to_json(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _events(self):
+            # Server-Sent Events：每条结果一行 data，连接断开时结束
+            query = {k: v[-1] for k, v in parse_qs(urlparse(self.path).query).items()}
+            try:
+                after = int(query.get("after", api.hub.seq))
+            except ValueError:
+                after = api.hub.seq
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream; charset=utf-8")
+            self.send_header("Cache-Control", "no-cache")
+            self.end_headers()
+            try:
+                while not getattr(self.server, "closing", False):
+                    items = api.hub.wait(after, timeout=1.0)
+                    if not items:
+                        self.wfile.write(b": keep-alive\n\n")
+                    for item in items:
+                        after = item["hub_seq"]
+                        self.wfile.write(f"id: {after}\ndata: {to_json(item)}\n\n".encode("utf-8"))
+                    self.wfile.flush()
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+
+        def do_GET(self):
+            if urlparse(self.path).path.rstrip("/") == "/events":
+                self._events()
+                return
+            status, body = api.handle("GET", self.path)
+            self._send_json(status, body)
+
+    return Handler
+
+
+class _UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def get_request(self):
+        request, _ = super().get_request()
+        # BaseHTTPRequestHandler 需要 (host, port) 形式的地址
+        return request, ("local", 0)
+
+
+class APIServer:
+    """
+    在后台线程里运行接口服务。
+
+    Args:
+        api: ResultsAPI。
+        host / port: HTTP 监听地址，只允许本机回环地址。
+        unix_path: 指定时改为监听 Unix 域套接字（POSIX）。
+    """
+
+    def __init__(self, api: ResultsAPI, host="127.0.0.1", port=8765, unix_path=None):
+        if unix_path is None and host not in ("127.0.0.1", "localhost", "::1"):
+            raise ValueError("API server only binds to the loopback interface")
+        self.api = api
+        self.host, self.port, self.unix_path = host, int(port), unix_path
+        self._server = None
+        self._thread = None
+
+    @property
+    def address(self) -> str:
+        if self.unix_path:
+            return f"unix:{self.unix_path}"
+        return f"http://{self.host}:{self.port}"
+
+    def start(self):
+        handler = _make_handler(self.api)
+        if self.unix_path:
+            if os.path.exists(self.unix_path):
+                os.unlink(self.unix_path)
+            self._server = _UnixHTTPServer(self.unix_path, handler)
+        else:
+            self._server = ThreadingHTTPServer((self.host, self.port), handler)
+            self._server.daemon_threads = True
+            self.port = self._server.server_address[1]
+        self._server.closing = False
+        self._thread = threading.Thread(target=self._server.serve_forever, name="api-server", daemon=True)
+        self._thread.start()
+        print(f"Info: results API listening on {self.address}")
+
+    def stop(self):
+        if self._server is None:
+            return
+        self._server.closing = True
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join(timeout=2.0)
+        self._server = None
+        if self.unix_path and os.path.exists(self.unix_path):
+            try:
+                os.unlink(self.unix_path)
+            except OSError:
+                pass
@@ -0,0 +1,649 @@
+"""
+多路无界面推理引擎（服务器模式）
+一个进程同时处理 N 路摄像头 / 视频文件：
+- 每路一个取帧线程（StreamSource），摄像头只保留最新一帧，视频文件按顺序逐帧交付；
+- 共享的模型池（ModelPool）：若干组 Pose / FaceMesh / Hands 实例，由工作线程轮流借用；
+- 每路独立的检测状态（StreamPipeline）：坐姿历史、专注度校准与计时、行为时序、关键点滤波；
+- 结果按帧汇入一个队列，results() 以生成器形式逐条输出。
+
+MediaPipe 的跟踪模式依赖上一帧的结果，同一模型实例轮流处理不同画面会互相干扰，
+所以池中的模型都以单张图模式 (static_image_mode=True) 创建；帧间平滑由每路的 LandmarkFilters 负责。
+
+时间基准：逐帧读取的视频文件按帧序号换算媒体时间（seq / fps），滤波、坐姿窗口和手部计时都用它，
+同一段视频无论处理快慢结果都一致；摄像头和按原帧率读取的视频文件使用墙上时钟。
+
+命令行（用本地视频测试）：
+    python -m modules.runtime.engine --source seat1=a.mp4 --source seat2=b.mp4 --pool-size 2
+"""
+import json
+import queue
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+import cv2
+import numpy as np
+
+from .filters import FACE, HANDS, POSE, LandmarkFilters, LandmarkView
+from .quality import DEFAULT_LEVEL, LADDER
+from .thresholds import current_thresholds, get_store
+
+# 摄像头没有报告帧率、或视频文件帧率异常时使用的默认值
+_DEFAULT_FPS = 30.0
+# 模型池默认大小上限（每组 ModelSet 一份 Pose / FaceMesh / Hands，内存占用与之成正比）
+_DEFAULT_POOL_SIZE = 2
+
+
+def _normalize_angle(angle):
+    """与 AIWorker 一致：角度标准化到 [-90, 90]"""
+    if angle is None:
+        return 0.0
+    while angle > 90:
+        angle -= 180
+    while angle < -90:
+        angle += 180
+    return round(angle, 2)
+
+
+def _is_camera(spec):
+    return isinstance(spec, int) or (isinstance(spec, str) and spec.isdigit())
+
+
+class StreamSource:
+    """
+    单路视频源（后台取帧线程）。
+
+    Args:
+        name: 路名（结果中的 "stream" 字段）。
+        spec: 摄像头编号 (int / "0") 或视频文件路径、URL。
+        realtime: 视频文件是否按原帧率读取；默认 False，即按处理速度逐帧交付、一帧不丢。
+            摄像头总是实时的，处理不过来时只保留最新一帧。
+        loop: 视频文件播完后是否从头开始。
+        mirror: 是否水平翻转；默认摄像头翻转（与桌面版一致），文件不翻转。
+    """
+
+    def __init__(self, name, spec, realtime=False, loop=False, mirror=None, width=0, height=0):
+        self.name = name
+        self.spec = spec
+        self.is_camera = _is_camera(spec)
+        self.realtime = True if self.is_camera else bool(realtime)
+        self.loop = bool(loop)
+        self.mirror = self.is_camera if mirror is None else bool(mirror)
+        self.width, self.height = int(width), int(height)
+        self.fps = _DEFAULT_FPS
+
+        self.on_frame = None          # callable(source)，有新帧时由取帧线程调用
+        self.finished = False
+        self.frames_read = 0
+        self.frames_dropped = 0
+
+        self._cap = None
+        self._lock = threading.Lock()
+        self._frame = None
+        self._seq = 0
+        self._taken = threading.Event()
+        self._taken.set()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def open(self):
+        target = int(self.spec) if self.is_camera else str(self.spec)
+        cap = cv2.VideoCapture(target)
+        if not cap.isOpened():
+            raise IOError(f"cannot open source {self.name}: {self.spec}")
+        if self.is_camera and self.width > 0:
+            cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.width)
+            cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.height)
+        fps = cap.get(cv2.CAP_PROP_FPS)
+        if fps and 1.0 <= fps <= 240.0:
+            self.fps = float(fps)
+        self._cap = cap
+
+    def start(self):
+        if self._cap is None:
+            self.open()
+        self._thread = threading.Thread(target=self._run, name=f"source-{self.name}", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._taken.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+            self._thread = None
+        if self._cap is not None:
+            self._cap.release()
+            self._cap = None
+
+    def _run(self):
+        period = 1.0 / self.fps
+        next_t = time.monotonic()
+        while not self._stop.is_set():
+            if not self.realtime:
+                # 逐帧模式：上一帧被取走后再读下一帧
+                self._taken.wait()
+                if self._stop.is_set():
+                    break
+            ok, frame = self._cap.read()
+            if not ok:
+                if self.loop and not self.is_camera:
+                    self._cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                    continue
+                break
+            if self.mirror:
+                frame = cv2.flip(frame, 1)
+
+            with self._lock:
+                if self._frame is not None:
+                    self.frames_dropped += 1
+                self._frame = frame
+                self._seq += 1
+                self.frames_read += 1
+                self._taken.clear()
+            if self.on_frame is not None:
+                self.on_frame(self)
+
+            if self.realtime and not self.is_camera:
+                # 视频文件按原帧率回放
+                next_t += period
+                delay = next_t - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                else:
+                    next_t = time.monotonic()
+        with self._lock:
+            self.finished = True
+        if self.on_frame is not None:
+            self.on_frame(self)
+
+    def pending(self) -> bool:
+        with self._lock:
+            return self._frame is not None
+
+    def take(self):
+        """取走最新一帧，返回 (帧序号, 帧)；没有新帧时返回 (None, None)"""
+        with self._lock:
+            frame, self._frame = self._frame, None
+            seq = self._seq
+        self._taken.set()
+        if frame is None:
+            return None, None
+        return seq, frame
+
+
+class ModelSet:
+    """一组共享的 MediaPipe 模型（单张图模式，可轮流处理不同画面）"""
+
+    def __init__(self, level):
+        import mediapipe as mp
+        solutions = mp.solutions
+        self.level = level
+        self.pose = solutions.pose.Pose(
+            static_image_mode=True,
+            model_complexity=level.pose_complexity,
+            min_detection_confidence=0.5,
+        )
+        self.face_mesh = solutions.face_mesh.FaceMesh(
+            static_image_mode=True,
+            max_num_faces=1,
+            refine_landmarks=level.face_refine,
+            min_detection_confidence=0.5,
+        )
+        self.hands = solutions.hands.Hands(
+            static_image_mode=True,
+            max_num_hands=level.max_hands,
+            min_detection_confidence=0.5,
+        )
+
+    def detect_pose(self, frame_rgb):
+        return self.pose.process(frame_rgb).pose_landmarks
+
+    def detect_face(self, frame_rgb):
+        res = self.face_mesh.process(frame_rgb)
+        return res.multi_face_landmarks[0] if res.multi_face_landmarks else None
+
+    def close(self):
+        for model in (self.pose, self.face_mesh, self.hands):
+            try:
+                model.close()
+            except Exception:
+                pass
+
+
+class ModelPool:
+    """固定数量的 ModelSet，工作线程用 with pool.acquire() as models 借用"""
+
+    def __init__(self, size, level, factory=None):
+        factory = factory or ModelSet
+        self.size = max(1, int(size))
+        self._free = queue.Queue()
+        self._all = []
+        for _ in range(self.size):
+            models = factory(level)
+            self._all.append(models)
+            self._free.put(models)
+
+    @contextmanager
+    def acquire(self):
+        models = self._free.get()
+        try:
+            yield models
+        finally:
+            self._free.put(models)
+
+    def close(self):
+        for models in self._all:
+            models.close()
+        self._all = []
+
+
+class _MediaClock:
+    """按帧序号换算的媒体时间（替换检测器的 time.monotonic / time.time）"""
+    __slots__ = ("now",)
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class StreamPipeline:
+    """
+    单路的检测状态与处理逻辑（不持有模型）。
+    与桌面版 AIWorker.process_full 相同的流程，只是关键点来自借用的 ModelSet。
+
+    Args:
+        media_clock: 为 True 时各检测器的计时改用 process() 传入的 now（媒体时间），
+            而不是各自的墙上时钟。
+    """
+
+    def __init__(self, name, thresholds, level, fps=_DEFAULT_FPS, phone_service=None, media_clock=False):
+        from modules.posture.detector import PostureDetector
+        from modules.attention.monitor import AttentionMonitor
+        from modules.behavior.behavior_detector import BehaviorDetector
+        from modules.behavior.hand_gate import HandGate
+
+        self.name = name
+        self.thresholds = thresholds
+        self.posture = PostureDetector(thresholds, model_complexity=level.pose_complexity,
+                                       with_model=False)
+        self.attention = AttentionMonitor(fps=int(round(fps)), thresholds=thresholds,
+                                          refine_landmarks=level.face_refine, with_model=False)
+        self.behavior = BehaviorDetector(thresholds, phone_service=phone_service)
+        self.behavior.set_quality(level)
+        self.hand_gate = HandGate(thresholds.hand)
+        self.filters = LandmarkFilters(thresholds.filter)
+
+        self.clock = None
+        if media_clock:
+            self.clock = _MediaClock()
+            self.posture.clock = self.clock
+            self.behavior.hand_detector.clock = self.clock
+
+        self.pending_thresholds = None
+        self.frames = 0
+
+    def apply_pending_thresholds(self):
+        # 与 AIWorker 相同：只比较版本号，不清空槽位，避免与发布线程竞争丢失快照
+        snap = self.pending_thresholds
+        if snap is None or snap.version <= self.thresholds.version:
+            return
+        self.thresholds = snap
+        self.hand_gate.set_config(snap.hand)
+        self.filters.set_config(snap.filter)
+        for module in (self.posture, self.attention, self.behavior):
+            try:
+                module.set_thresholds(snap)
+            except Exception as e:
+                print(f"Warning: [{self.name}] apply thresholds to {type(module).__name__} failed: {e}")
+
+    def detect(self, frame, models, now=None):
+        """
+        模型阶段：只做 MediaPipe 推理与关键点滤波，需要持有借来的 ModelSet。
+        now: 本帧时间（秒）；使用媒体时钟时必须传入，否则取 time.monotonic()。
+        返回 _Landmarks，交给 analyze()。
+        """
+        from modules.behavior.proximity import landmarks_to_array
+
+        self.apply_pending_thresholds()
+        now = time.monotonic() if now is None else now
+        self.frames += 1
+        self.filters.step()
+        frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+
+        pose_landmarks = self.filters.run(POSE, lambda: models.detect_pose(frame_rgb), now)
+        # 手部：门控 + 头部裁剪
+        hand_array = self.filters.run(
+            HANDS,
+            lambda: landmarks_to_array(self.hand_gate.run(models.hands, frame_rgb, pose_landmarks)),
+            now,
+        )
+        face_landmarks = self.filters.run(FACE, lambda: models.detect_face(frame_rgb), now)
+        return _Landmarks(now, pose_landmarks, face_landmarks, hand_array)
+
+    def analyze(self, frame, lm):
+        """
+        分析阶段：坐姿 / 专注度 / 行为（含手机检测），不需要模型，应在归还 ModelSet 后调用，
+        这样等待批量 YOLO 的工作线程不会占着整组 MediaPipe 模型。
+        返回 (data_a, data_b, data_c)。
+        """
+        if self.clock is not None:
+            self.clock.now = lm.now
+
+        # A: 坐姿
+        data_a = self.posture.analyze(frame, lm.pose)
+        s_ang = _normalize_angle(data_a.get("shoulder_tilt_angle"))
+        n_ang = _normalize_angle(data_a.get("neck_tilt"))
+        data_a["shoulder_tilt_angle"] = s_ang
+        data_a["neck_tilt"] = n_ang
+        posture_cfg = self.thresholds.posture
+        data_a["is_shoulder_tilted"] = abs(s_ang) > posture_cfg.shoulder_tilt
+        data_a["is_neck_tilted"] = abs(n_ang) > posture_cfg.neck_tilt
+
+        # B: 专注度
+        data_b = self.attention.process_landmarks(frame, lm.face)
+
+        # C: 行为
+        hand_landmarks = [LandmarkView(h) for h in lm.hands] or None
+        results = _Results(lm.pose, hand_landmarks, lm.hands)
+        data_c = self.behavior.process(results, frame=frame)
+        return data_a, data_b, data_c
+
+    def process(self, frame, models, now=None):
+        """detect + analyze 一次完成（单路使用时的便捷接口），返回 (data_a, data_b, data_c)"""
+        return self.analyze(frame, self.detect(frame, models, now))
+
+
+class _Landmarks:
+    """StreamPipeline.detect 的输出：本帧时间与滤波后的关键点"""
+    __slots__ = ("now", "pose", "face", "hands")
+
+    def __init__(self, now, pose, face, hands):
+        self.now = now
+        self.pose = pose
+        self.face = face
+        self.hands = hands
+
+
+class _Results:
+    """与 AIWorker 的 DetectionResultsWrapper 相同的字段"""
+    __slots__ = ("pose_landmarks", "multi_hand_landmarks", "hand_array")
+
+    def __init__(self, pose_landmarks, hand_landmarks, hand_array):
+        self.pose_landmarks = pose_landmarks
+        self.multi_hand_landmarks = hand_landmarks
+        self.hand_array = hand_array
+
+
+class MultiStreamEngine:
+    """
+    Args:
+        sources: {路名: spec} 或 StreamSource 列表。
+        workers: 工作线程数，默认与路数相同。每路同一时刻最多一帧在处理，
+            所以批量手机检测的一批实际最多 min(batch_size, workers, 路数) 帧。
+        pool_size: 模型池中 ModelSet 的数量（内存占用与之成正比），默认 min(workers, 2)。
+            工作线程只在 MediaPipe 阶段借用模型，等待手机检测时不占用，线程数可以多于模型组数。
+        level: 档位下标（见 quality.LADDER），决定各模型参数。
+        max_results: 结果队列上限，消费不及时时丢弃最旧的结果。
+        model_factory: callable(level) -> ModelSet 兼容对象，默认 ModelSet。
+
+    用法：
+        engine = MultiStreamEngine({"seat1": "a.mp4", "seat2": 0})
+        engine.start()
+        for result in engine.results():
+            ...
+        engine.stop()
+    """
+
+    def __init__(self, sources, workers=None, pool_size=None, thresholds=None,
+                 level=DEFAULT_LEVEL, max_results=256, watch_config=False, model_factory=None):
+        if isinstance(sources, dict):
+            sources = [StreamSource(name, spec) for name, spec in sources.items()]
+        self.sources = {s.name: s for s in sources}
+        if len(self.sources) != len(sources):
+            raise ValueError("stream names must be unique")
+
+        self.thresholds = thresholds or current_thresholds()
+        self.level = LADDER[level]
+        self.workers = len(self.sources) if workers is None else max(1, int(workers))
+        if pool_size is None:
+            self.pool_size = min(self.workers, _DEFAULT_POOL_SIZE)
+        else:
+            self.pool_size = max(1, int(pool_size))
+        self.watch_config = watch_config
+        self.model_factory = model_factory
+
+        self.pool = None
+        self.phone_service = None
+        self.pipelines = {}
+        self._ready = queue.Queue()
+        self._results = queue.Queue(maxsize=max(1, int(max_results)))
+        self._lock = threading.Lock()
+        self._queued = set()
+        self._busy = set()
+        self._stop = threading.Event()
+        self._threads = []
+        self._watcher = None
+        self.results_dropped = 0
+        self.frames_processed = 0
+        self.running = False
+
+    # ---------- 生命周期 ----------
+
+    def start(self):
+        self.pool = ModelPool(self.pool_size, self.level, self.model_factory)
+        self.phone_service = self._create_phone_service()
+        for name, src in self.sources.items():
+            src.open()
+            self.pipelines[name] = StreamPipeline(name, self.thresholds, self.level, fps=src.fps,
+                                                  phone_service=self.phone_service,
+                                                  media_clock=not src.realtime)
+            src.on_frame = self._on_frame
+
+        store = get_store()
+        store.subscribe(self._on_thresholds_changed)
+        if self.watch_config:
+            from .watcher import ConfigWatcher
+            self._watcher = ConfigWatcher(store)
+            self._watcher.start()
+
+        self._stop.clear()
+        self.running = True
+        for i in range(self.workers):
+            t = threading.Thread(target=self._worker, name=f"engine-worker-{i}", daemon=True)
+            t.start()
+            self._threads.append(t)
+        for src in self.sources.values():
+            src.start()
+        print(f"Info: engine started with {len(self.sources)} stream(s), "
+              f"{self.workers} worker(s), {self.pool_size} model set(s).")
+
+    def _create_phone_service(self):
+        """多路且允许合批时，各路的手机检测共用一个批量 YOLO 服务"""
+        if len(self.sources) < 2 or self.thresholds.phone.batch_size < 2:
+            return None
+        from modules.behavior.yolo_service import YoloBatchService
+        service = YoloBatchService(self.thresholds.phone)
+        if not service.available:
+            return None
+        service.start()
+        return service
+
+    def stop(self):
+        if not self.running:
+            return
+        self.running = False
+        self._stop.set()
+        for src in self.sources.values():
+            src.stop()
+        for _ in self._threads:
+            self._ready.put(None)
+        for t in self._threads:
+            t.join(timeout=5.0)
+        self._threads = []
+        get_store().unsubscribe(self._on_thresholds_changed)
+        if self._watcher is not None:
+            self._watcher.stop()
+            self._watcher = None
+        if self.phone_service is not None:
+            print(f"Info: phone batch service {self.phone_service.stats()}")
+            self.phone_service.stop()
+            self.phone_service = None
+        if self.pool is not None:
+            self.pool.close()
+            self.pool = None
+        print("Info: engine stopped.")
+
+    def _on_thresholds_changed(self, snapshot):
+        # 每路在下一帧开始前各自应用
+        self.thresholds = snapshot
+        if self.phone_service is not None:
+            self.phone_service.set_config(snapshot.phone)
+        for pipeline in self.pipelines.values():
+            pipeline.pending_thresholds = snapshot
+
+    # ---------- 调度 ----------
+
+    def _on_frame(self, src):
+        """取帧线程通知有新帧：该路空闲且未排队时放入就绪队列"""
+        with self._lock:
+            if src.name in self._queued or src.name in self._busy:
+                return
+            self._queued.add(src.name)
+        self._ready.put(src.name)
+
+    def _worker(self):
+        while not self._stop.is_set():
+            name = self._ready.get()
+            if name is None:
+                break
+            with self._lock:
+                self._queued.discard(name)
+                self._busy.add(name)
+            try:
+                self._process_one(name)
+            finally:
+                with self._lock:
+                    self._busy.discard(name)
+                    requeue = self.sources[name].pending() and name not in self._queued
+                    if requeue:
+                        self._queued.add(name)
+                if requeue:
+                    self._ready.put(name)
+
+    def _process_one(self, name):
+        src = self.sources[name]
+        seq, frame = src.take()
+        if frame is None:
+            return
+        t0 = time.perf_counter()
+        # 逐帧读取的视频文件用媒体时间，与处理速度、模型池忙闲无关
+        now = None if src.realtime else seq / src.fps
+        pipeline = self.pipelines[name]
+        try:
+            # 只在 MediaPipe 阶段持有模型；手机检测可能要等批量 YOLO 凑批，放到归还之后
+            with self.pool.acquire() as models:
+                lm = pipeline.detect(frame, models, now)
+            data_a, data_b, data_c = pipeline.analyze(frame, lm)
+        except Exception as e:
+            print(f"Error: [{name}] frame {seq} failed: {e}")
+            return
+        self.frames_processed += 1
+        self._emit({
+            "stream": name,
+            "seq": seq,
+            "ts": round(time.time(), 3),
+            "latency_ms": round((time.perf_counter() - t0) * 1000.0, 1),
+            "A": data_a,
+            "B": data_b,
+            "C": data_c,
+        })
+
+    def _emit(self, result):
+        while True:
+            try:
+                self._results.put_nowait(result)
+                return
+            except queue.Full:
+                try:
+                    self._results.get_nowait()
+                    self.results_dropped += 1
+                except queue.Empty:
+                    pass
+
+    # ---------- 输出 ----------
+
+    def idle(self) -> bool:
+        """所有视频源都已结束且没有待处理的帧"""
+        with self._lock:
+            if self._queued or self._busy:
+                return False
+        return all(s.finished and not s.pending() for s in self.sources.values())
+
+    def results(self, timeout=0.5):
+        """
+        逐条产出结果字典：{"stream", "seq", "ts", "latency_ms", "A", "B", "C"}。
+        引擎停止，或所有视频源播完且结果已取完时结束。
+        """
+        while True:
+            try:
+                yield self._results.get(timeout=timeout)
+            except queue.Empty:
+                if not self.running or self.idle():
+                    if self._results.empty():
+                        return
+
+    def stats(self) -> dict:
+        return {
+            "frames_processed": self.frames_processed,
+            "phone_batch": self.phone_service.stats() if self.phone_service else None,
+            "results_dropped": self.results_dropped,
+            "streams": {
+                name: {"read": s.frames_read, "dropped": s.frames_dropped,
+                       "finished": s.finished, "fps": s.fps}
+                for name, s in self.sources.items()
+            },
+        }
+
+
+def _json_default(v):
+    if isinstance(v, np.generic):
+        return v.item()
+    return str(v)
+
+
+def _parse_source(text):
+    """"name=spec" 或单独的 spec（以 spec 作为路名）"""
+    if "=" in text:
+        name, spec = text.split("=", 1)
+        return name, spec
+    return text, text
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="多路无界面推理：每帧结果以 JSON 行输出到 stdout")
+    parser.add_argument("--source", action="append", required=True,
+                        help="name=spec，spec 为摄像头编号或视频文件路径，可重复")
+    parser.add_argument("--workers", type=int, default=None, help="默认与路数相同")
+    parser.add_argument("--pool-size", type=int, default=None, help="默认 min(workers, 2)")
+    parser.add_argument("--level", type=int, default=DEFAULT_LEVEL, help="档位下标（0 为最高画质）")
+    parser.add_argument("--realtime", action="store_true", help="视频文件按原帧率读取（会丢帧）")
+    parser.add_argument("--loop", action="store_true", help="视频文件循环播放")
+    args = parser.parse_args()
+
+    srcs = [StreamSource(name, spec, realtime=args.realtime, loop=args.loop)
+            for name, spec in map(_parse_source, args.source)]
+    engine = MultiStreamEngine(srcs, workers=args.workers, pool_size=args.pool_size, level=args.level)
+    engine.start()
+    try:
+        for item in engine.results():
+            print(json.dumps(item, ensure_ascii=False, default=_json_default), flush=True)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        engine.stop()
+        print(json.dumps(engine.stats(), ensure_ascii=False), file=sys.stderr)
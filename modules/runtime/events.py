@@ -0,0 +1,190 @@
+"""
+事件通道：把逐帧的完整载荷压缩成少量带类型的事件
+大部分状态（玩手机、离席、闭眼……）几分钟才变一次，逐帧发送完整字典和写日志都是浪费。
+EventDetector 每帧对比上一次的状态，只在变化时产出事件：
+
+- enter / exit：布尔状态进入、退出（phone、away、chin ...）；
+- change：类别状态切换（blink_state、dist_screen、presence），新值需保持 change_hold 秒；
+- cross：连续量越过阈值（带回差），value 为越线后是否处于“异常侧”；
+- summary：按 summary_interval 周期发送的完整精简载荷；有状态事件的帧也立即附带一次，
+  供仪表盘刷新数值。
+
+EventState 是消费端的状态镜像：依次 apply() 收到的事件，即可随时查询当前状态。
+"""
+import time
+from dataclasses import dataclass, field
+from typing import Any
+
+ENTER, EXIT, CHANGE, CROSS, SUMMARY = "enter", "exit", "change", "cross", "summary"
+
+# 布尔状态：名字 → 载荷中的路径
+BOOL_STATES = (
+    ("phone", ("C", "手机使用", "使用手机")),
+    ("away", ("C", "离席检测", "离席")),
+    ("chin", ("C", "手部行为", "托腮")),
+    ("face_touch", ("C", "手部行为", "频繁摸脸")),
+    ("hunchback", ("A", "is_hunchback")),
+    ("gaze_off", ("B", "gaze_off")),
+)
+
+# 类别状态
+CATEGORY_STATES = (
+    ("blink_state", ("B", "blink_state")),
+    ("dist_screen", ("A", "dist_screen")),
+    ("presence", ("presence", "mode")),
+)
+
+# 阈值越线：名字 → (载荷路径, 阈值配置项, 方向, 是否取绝对值)
+CROSSINGS = (
+    ("neck_tilt", ("A", "neck_tilt"), "neck_tilt", "above", False),
+    ("shoulder_tilt", ("A", "shoulder_tilt_angle"), "shoulder_tilt", "above", True),
+    ("attention_low", ("B", "attention_score"), "attention_low", "below", False),
+    ("fatigue", ("B", "perclos"), "perclos_high", "above", False),
+)
+
+
+@dataclass(frozen=True)
+class Event:
+    kind: str                   # enter / exit / change / cross / summary
+    name: str                   # 状态名；summary 事件为 "summary"
+    ts: float                   # time.time()
+    value: Any = None           # enter/exit/cross: bool；change: 新值
+    data: dict = field(default=None, compare=False)  # cross: {"value", "threshold"}；summary: 精简载荷
+
+    def to_dict(self) -> dict:
+        out = {"ts": round(self.ts, 3), "event": self.kind, "name": self.name}
+        if self.value is not None:
+            out["value"] = self.value
+        if self.data is not None:
+            out["data"] = self.data
+        return out
+
+
+def _lookup(payload, path):
+    node = payload
+    for key in path:
+        if not isinstance(node, dict):
+            return None
+        node = node.get(key)
+    return node
+
+
+class EventDetector:
+    """
+    Args:
+        cfg: EventThresholds 快照。
+    """
+
+    def __init__(self, cfg):
+        self.cfg = cfg
+        self.reset()
+
+    def set_config(self, cfg):
+        self.cfg = cfg
+
+    def reset(self):
+        self._bools = {name: False for name, _ in BOOL_STATES}
+        self._categories = {name: None for name, _ in CATEGORY_STATES}
+        self._candidates = {}          # 类别状态的候选新值：name → (值, 首次出现时间)
+        self._crossed = {name: False for name, *_ in CROSSINGS}
+        # 全部状态的当前值（与 EventState.states 同样的结构），提醒规则直接读取
+        self.states = dict(self._bools)
+        self.states.update(self._categories)
+        self.states.update(self._crossed)
+        self._last_summary = None
+        # 统计：处理的帧数与产出的事件数（不含摘要）
+        self.frames = 0
+        self.events = 0
+
+    def _cross(self, name, value, threshold, direction):
+        """带回差的越线判断，返回新的“异常侧”状态"""
+        if value is None:
+            return False
+        active = self._crossed[name]
+        margin = abs(threshold) * self.cfg.hysteresis
+        if direction == "above":
+            return value > threshold if not active else value > threshold - margin
+        return value < threshold if not active else value < threshold + margin
+
+    def update(self, payload, now=None) -> list:
+        """对比一帧载荷（build_ui_payload 的输出），返回本帧产生的事件列表"""
+        now = time.time() if now is None else now
+        self.frames += 1
+        out = []
+
+        for name, path in BOOL_STATES:
+            value = bool(_lookup(payload, path))
+            if value != self._bools[name]:
+                self._bools[name] = value
+                out.append(Event(ENTER if value else EXIT, name, now, value))
+
+        cfg = self.cfg
+        for name, path in CATEGORY_STATES:
+            value = _lookup(payload, path)
+            if value is None or value == self._categories[name]:
+                self._candidates.pop(name, None)
+                continue
+            cand = self._candidates.get(name)
+            if cand is None or cand[0] != value:
+                cand = self._candidates[name] = (value, now)
+            if now - cand[1] >= cfg.change_hold:
+                del self._candidates[name]
+                self._categories[name] = value
+                out.append(Event(CHANGE, name, now, value))
+
+        for name, path, key, direction, use_abs in CROSSINGS:
+            raw = _lookup(payload, path)
+            value = None if raw is None else float(raw)
+            if value is not None and use_abs:
+                value = abs(value)
+            threshold = getattr(cfg, key)
+            active = self._cross(name, value, threshold, direction)
+            if active != self._crossed[name]:
+                self._crossed[name] = active
+                out.append(Event(CROSS, name, now, active,
+                                 {"value": value, "threshold": threshold}))
+
+        for ev in out:
+            self.states[ev.name] = ev.value
+        self.events += len(out)
+        # 有状态变化时立即附带摘要，否则按间隔发送
+        if out or self._last_summary is None or now - self._last_summary >= cfg.summary_interval:
+            self._last_summary = now
+            data = {k: v for k, v in payload.items() if k != "overlay"}
+            out.append(Event(SUMMARY, SUMMARY, now, data=data))
+        return out
+
+    def snapshot(self) -> dict:
+        """当前全部状态的副本"""
+        return dict(self.states)
+
+
+class EventState:
+    """消费端的状态镜像：按顺序 apply 事件即可得到与检测端一致的当前状态"""
+
+    def __init__(self):
+        self.states = {}
+        self.summary = None
+        self.summary_ts = None
+        self.since = {}        # 各状态最近一次变化的时间
+
+    def apply(self, events):
+        changed = []
+        for ev in events:
+            if ev.kind == SUMMARY:
+                self.summary = ev.data
+                self.summary_ts = ev.ts
+                continue
+            self.states[ev.name] = ev.value
+            self.since[ev.name] = ev.ts
+            changed.append(ev.name)
+        return changed
+
+    def get(self, name, default=None):
+        return self.states.get(name, default)
+
+    def reset(self):
+        self.states.clear()
+        self.since.clear()
+        self.summary = None
+        self.summary_ts = None
@@ -0,0 +1,262 @@
+"""
+关键点滤波与帧间预测
+对 Pose / FaceMesh / Hands 的关键点数组 (N, 3) 做向量化 One-Euro 滤波：
+静止时截止频率低、抖动被压住，快速运动时截止频率随速度升高、不拖影。
+滤波器同时维护每个点的速度估计，模型被跳过的帧用 “上次滤波值 + 速度 × 间隔” 预测，
+这样重模型可以隔帧/隔两帧运行，下游检测器仍然每帧拿到平滑的关键点。
+
+输出用 LandmarkView 包装，接口与 MediaPipe 的 NormalizedLandmarkList 一致
+（.landmark[i].x / .y / .z / .visibility），下游代码无需改动。
+"""
+import math
+
+import numpy as np
+
+POSE, FACE, HANDS = "pose", "face", "hands"
+KINDS = (POSE, FACE, HANDS)
+
+# 两次测量间隔超过该值（秒）视为跟踪中断，滤波器重新开始（如从空座模式恢复）
+_RESET_GAP = 1.0
+_MIN_DT = 1e-3
+
+
+class LandmarkPoint:
+    __slots__ = ("x", "y", "z", "visibility")
+
+    def __init__(self, x, y, z, visibility=1.0):
+        self.x = x
+        self.y = y
+        self.z = z
+        self.visibility = visibility
+
+
+class LandmarkView:
+    """
+    (N, 3) 数组的只读关键点视图，兼容 NormalizedLandmarkList：
+    view.landmark[i].x、len(view.landmark)、切片与迭代都可用。点对象按需创建，
+    下游通常只访问少数几个索引，不必为 468 个面部点逐一建对象。
+    """
+    __slots__ = ("_xyz", "_vis")
+
+    def __init__(self, xyz, visibility=None):
+        self._xyz = xyz
+        self._vis = visibility
+
+    @property
+    def landmark(self):
+        return self
+
+    @property
+    def array(self):
+        return self._xyz
+
+    @property
+    def visibility(self):
+        return self._vis
+
+    def __len__(self):
+        return self._xyz.shape[0]
+
+    def _point(self, i):
+        x, y, z = self._xyz[i].tolist()
+        vis = 1.0 if self._vis is None else float(self._vis[i])
+        return LandmarkPoint(x, y, z, vis)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self._point(k) for k in range(*i.indices(len(self)))]
+        return self._point(i)
+
+    def __iter__(self):
+        return (self._point(k) for k in range(len(self)))
+
+
+def landmarks_xyz(landmark_list, with_visibility=False):
+    """NormalizedLandmarkList → (N, 3) float64 [, (N,) 可见度]"""
+    pts = landmark_list.landmark
+    xyz = np.array([(p.x, p.y, p.z) for p in pts], dtype=np.float64)
+    if not with_visibility:
+        return xyz
+    return xyz, np.array([getattr(p, "visibility", 1.0) for p in pts], dtype=np.float64)
+
+
+def _alpha(cutoff, dt):
+    # 一阶低通的平滑系数：tau = 1 / (2π f_c)
+    return 1.0 / (1.0 + 1.0 / (2.0 * math.pi * cutoff * dt))
+
+
+class OneEuroBank:
+    """
+    一组点的 One-Euro 滤波器（所有点共用参数，状态为数组）。
+    截止频率按每个点 xy 平面内的速度自适应，三个坐标分量一起滤波。
+    """
+
+    def __init__(self, min_cutoff=1.0, beta=50.0, d_cutoff=1.0):
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.d_cutoff = d_cutoff
+        self.reset()
+
+    def reset(self):
+        self.x_hat = None
+        self.dx_hat = None
+        self.t = None
+
+    @property
+    def ready(self):
+        return self.x_hat is not None
+
+    def update(self, x, t):
+        """输入一次测量 (N, 3)，返回滤波后的数组（新数组，调用方可长期持有）"""
+        if self.x_hat is None or self.x_hat.shape != x.shape:
+            self.x_hat = np.array(x, dtype=np.float64)
+            self.dx_hat = np.zeros_like(self.x_hat)
+            self.t = t
+            return self.x_hat.copy()
+
+        dt = max(t - self.t, _MIN_DT)
+        dx = (x - self.x_hat) / dt
+        self.dx_hat += _alpha(self.d_cutoff, dt) * (dx - self.dx_hat)
+
+        speed = np.hypot(self.dx_hat[:, 0], self.dx_hat[:, 1])
+        cutoff = self.min_cutoff + self.beta * speed
+        self.x_hat += _alpha(cutoff, dt)[:, None] * (x - self.x_hat)
+        self.t = t
+        return self.x_hat.copy()
+
+    def predict(self, t, max_horizon):
+        """按当前速度外推到时刻 t（外推时长不超过 max_horizon 秒），不改变滤波状态"""
+        if self.x_hat is None:
+            return None
+        horizon = min(max(t - self.t, 0.0), max_horizon)
+        return self.x_hat + self.dx_hat * horizon
+
+
+class LandmarkTrack:
+    """
+    单类关键点的跟踪：测量帧更新滤波器，跳过帧做预测。
+    目标丢失（测量为 None）时清空状态，预测也随之返回 None。
+    """
+
+    def __init__(self, min_cutoff, beta, d_cutoff):
+        self.bank = OneEuroBank(min_cutoff, beta, d_cutoff)
+        self.visibility = None
+        self.last_measured = None
+
+    def configure(self, min_cutoff, beta, d_cutoff):
+        self.bank.min_cutoff = min_cutoff
+        self.bank.beta = beta
+        self.bank.d_cutoff = d_cutoff
+
+    @property
+    def alive(self):
+        return self.bank.ready
+
+    def reset(self):
+        self.bank.reset()
+        self.visibility = None
+        self.last_measured = None
+
+    def measure(self, xyz, t, visibility=None):
+        if xyz is None or len(xyz) == 0:
+            self.reset()
+            return None
+        if self.last_measured is not None and t - self.last_measured > _RESET_GAP:
+            self.bank.reset()
+        self.visibility = visibility
+        self.last_measured = t
+        return self.bank.update(xyz, t)
+
+    def predict(self, t, max_horizon):
+        return self.bank.predict(t, max_horizon)
+
+
+class LandmarkFilters:
+    """
+    Pose / FaceMesh / Hands 三路关键点的滤波与调度。
+
+    Args:
+        cfg: FilterThresholds 快照。
+
+    每帧先调用 step()，再对每一路调用 run()：
+        pose = filters.run(POSE, lambda: detector.detect(frame), now)
+    run() 在该路本帧应当运行模型时（按 *_stride 轮转，或当前没有可预测的状态）调用 detect_fn
+    并滤波，否则直接返回预测值。pose / face 返回 LandmarkView 或 None，
+    hands 的 detect_fn 返回 (H, 21, 3) 数组，run() 也返回同形状数组。
+    enabled=0 时原样返回模型输出、每帧都运行模型。
+    """
+
+    def __init__(self, cfg):
+        self.cfg = cfg
+        self.tracks = {kind: LandmarkTrack(*self._params(kind)) for kind in KINDS}
+        self._frame = -1
+        self.last_ran = {kind: False for kind in KINDS}   # 本帧各路是否真正运行了模型
+
+    def _params(self, kind):
+        cfg = self.cfg
+        min_cutoff = {POSE: cfg.pose_min_cutoff, FACE: cfg.face_min_cutoff,
+                      HANDS: cfg.hand_min_cutoff}[kind]
+        return min_cutoff, cfg.beta, cfg.d_cutoff
+
+    def _stride(self, kind):
+        cfg = self.cfg
+        return {POSE: cfg.pose_stride, FACE: cfg.face_stride, HANDS: cfg.hand_stride}[kind]
+
+    def set_config(self, cfg):
+        self.cfg = cfg
+        for kind, track in self.tracks.items():
+            track.configure(*self._params(kind))
+        if not cfg.enabled:
+            self.reset()
+
+    def reset(self):
+        for track in self.tracks.values():
+            track.reset()
+
+    def step(self):
+        self._frame += 1
+
+    def due(self, kind):
+        """本帧是否应运行该路模型"""
+        if not self.cfg.enabled:
+            return True
+        # 丢失目标时每帧都跑，尽快重新捕获
+        if not self.tracks[kind].alive:
+            return True
+        return self._frame % self._stride(kind) == 0
+
+    def run(self, kind, detect_fn, now):
+        ran = self.due(kind)
+        self.last_ran[kind] = ran
+        if not self.cfg.enabled:
+            return detect_fn()
+
+        track = self.tracks[kind]
+        if ran:
+            raw = detect_fn()
+            return self._measure(kind, track, raw, now)
+
+        xyz = track.predict(now, self.cfg.max_predict)
+        if xyz is None:
+            return None
+        if kind == HANDS:
+            return xyz.reshape(-1, 21, 3).astype(np.float32)
+        return LandmarkView(xyz, track.visibility)
+
+    @staticmethod
+    def _measure(kind, track, raw, now):
+        if kind == HANDS:
+            if raw is None or len(raw) == 0:
+                track.reset()
+                return raw
+            xyz = track.measure(np.asarray(raw, dtype=np.float64).reshape(-1, 3), now)
+            return xyz.reshape(-1, 21, 3).astype(np.float32)
+
+        if not raw:
+            track.reset()
+            return None
+        if kind == POSE:
+            xyz, vis = landmarks_xyz(raw, with_visibility=True)
+        else:
+            xyz, vis = landmarks_xyz(raw), None
+        return LandmarkView(track.measure(xyz, now, vis), vis)
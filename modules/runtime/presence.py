@@ -0,0 +1,138 @@
+"""
+在座/空座状态机（低功耗模式）
+离席持续一段时间后进入 EMPTY：停掉 FaceMesh / Hands / YOLO 等完整管线，
+只每隔几帧做一次廉价的在座探测——缩小灰度图的帧差，画面有变化（或定期）时
+再用一次低复杂度 Pose 确认是否有人；连续确认到人后恢复完整管线。
+同时统计两种模式各自累计的时长。
+"""
+import time
+
+import cv2
+import numpy as np
+
+PRESENT = "present"
+EMPTY = "empty"
+
+# 帧差探测用的缩略图尺寸
+_PROBE_SIZE = (64, 48)
+
+
+class PresenceMonitor:
+    """
+    Args:
+        cfg: PresenceThresholds 快照。
+        pose_probe: callable(frame_bgr) -> bool，座位上是否有人（由调用方提供，通常是复杂度 0 的 Pose）。
+            判定条件必须与完整管线的离席判断一致（包括肩部偏移），否则偏离座位的人会让状态机来回切换。
+
+    用法（每帧）：
+        if monitor.mode == PRESENT:
+            ...完整管线...
+            monitor.report_away(离席, now)
+        else:
+            monitor.probe(frame)
+    """
+
+    def __init__(self, cfg, pose_probe=None):
+        self.cfg = cfg
+        self.pose_probe = pose_probe
+
+        self.mode = PRESENT
+        self._totals = {PRESENT: 0.0, EMPTY: 0.0}
+        self._last_tick = None
+
+        self._away_since = None
+        self._frame_idx = 0
+        self._probe_idx = 0
+        self._hits = 0
+        self._ref = None
+        self._small = np.empty(_PROBE_SIZE[::-1] + (3,), dtype=np.uint8)
+        self._gray = np.empty(_PROBE_SIZE[::-1], dtype=np.uint8)
+        self._diff = np.empty(_PROBE_SIZE[::-1], dtype=np.uint8)
+
+    def set_config(self, cfg):
+        self.cfg = cfg
+
+    # ---------- 计时 ----------
+
+    def tick(self, now=None):
+        """累计当前模式的时长，每帧调用一次"""
+        now = time.monotonic() if now is None else now
+        if self._last_tick is not None:
+            self._totals[self.mode] += now - self._last_tick
+        self._last_tick = now
+
+    def mode_times(self) -> dict:
+        return {"present_sec": round(self._totals[PRESENT], 1),
+                "empty_sec": round(self._totals[EMPTY], 1)}
+
+    def _switch(self, mode):
+        if mode == self.mode:
+            return
+        self.mode = mode
+        self._away_since = None
+        self._frame_idx = 0
+        self._probe_idx = 0
+        self._hits = 0
+        self._ref = None
+        print(f"Info: presence -> {mode} (present {self._totals[PRESENT]:.0f}s, "
+              f"empty {self._totals[EMPTY]:.0f}s)")
+
+    # ---------- PRESENT ----------
+
+    def report_away(self, away: bool, now=None):
+        """完整管线运行时，把离席检测结果交给状态机；持续离席 empty_after 秒后进入 EMPTY"""
+        if not self.cfg.enabled:
+            return
+        now = time.monotonic() if now is None else now
+        if not away:
+            self._away_since = None
+            return
+        if self._away_since is None:
+            self._away_since = now
+        elif now - self._away_since >= self.cfg.empty_after:
+            self._switch(EMPTY)
+
+    # ---------- EMPTY ----------
+
+    def _motion(self, frame):
+        cv2.resize(frame, _PROBE_SIZE, dst=self._small, interpolation=cv2.INTER_AREA)
+        cv2.cvtColor(self._small, cv2.COLOR_BGR2GRAY, dst=self._gray)
+        if self._ref is None:
+            self._ref = self._gray.copy()
+            return 0.0
+        cv2.absdiff(self._gray, self._ref, dst=self._diff)
+        motion = float(cv2.mean(self._diff)[0])
+        # 参考帧缓慢跟随光照变化
+        cv2.addWeighted(self._ref, 0.9, self._gray, 0.1, 0, dst=self._ref)
+        return motion
+
+    def probe(self, frame) -> str:
+        """
+        EMPTY 模式下每帧调用。只有每 probe_interval 帧才真正计算；
+        返回调用后的模式（恢复到 PRESENT 时调用方应在下一帧重新运行完整管线）。
+        """
+        cfg = self.cfg
+        self._frame_idx += 1
+        if self._frame_idx % cfg.probe_interval:
+            return self.mode
+
+        self._probe_idx += 1
+        motion = self._motion(frame)
+        moved = motion > cfg.motion_thresh
+        if self.pose_probe is None:
+            # 没有 Pose 可用时只能依据帧差
+            seen = moved
+        elif moved or self._probe_idx % cfg.pose_every == 0:
+            # 有明显运动，或每隔 pose_every 次探测，才跑一次 Pose 确认
+            try:
+                seen = bool(self.pose_probe(frame))
+            except Exception as e:
+                print(f"Warning: presence probe failed: {e}")
+                seen = True   # 探测出错时宁可恢复完整管线
+        else:
+            return self.mode
+        self._hits = self._hits + 1 if seen else 0
+
+        if self._hits >= cfg.return_hits:
+            self._switch(PRESENT)
+        return self.mode
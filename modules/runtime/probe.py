@@ -0,0 +1,297 @@
+"""
+启动硬件探测
+首次启动（或硬件/依赖版本变化后）用一张测试图跑一遍 Pose / FaceMesh / Hands / YOLO，
+按实测耗时选出一个性能档案 (PerfProfile) 并写入本地缓存，之后启动直接读取，不再重复探测。
+
+档案决定：
+- 自适应档位的起始档与可升到的最高档（见 quality.py）
+- 摄像头采集分辨率
+- OpenCV / PyTorch 线程数
+"""
+import json
+import os
+import platform
+import sys
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+
+PROFILE_FILE = "perf_profile.json"
+PROBE_IMAGE = Path("assets") / "images" / "probe.jpg"
+
+# 探测时比较的依赖版本，任何一个变化都会触发重新探测
+_VERSIONED_PACKAGES = ("mediapipe", "ultralytics", "opencv-python", "numpy", "torch")
+
+
+@dataclass(frozen=True)
+class PerfProfile:
+    name: str
+    start_level: int         # 自适应档位的起始档
+    floor: int               # 允许升到的最高档（下标越小画质越高）
+    capture_width: int       # 摄像头采集分辨率（0 表示使用摄像头默认值）
+    capture_height: int
+    cv_threads: int          # cv2.setNumThreads，0 表示不修改
+    torch_threads: int       # torch.set_num_threads，0 表示不修改
+
+
+PROFILES = {
+    "high": PerfProfile("high", start_level=1, floor=0,
+                        capture_width=1280, capture_height=720, cv_threads=0, torch_threads=0),
+    "medium": PerfProfile("medium", start_level=2, floor=1,
+                          capture_width=640, capture_height=480, cv_threads=0, torch_threads=0),
+    # 老旧双核机器：降档起步，给 UI 线程留出一个核
+    "low": PerfProfile("low", start_level=4, floor=2,
+                       capture_width=640, capture_height=480, cv_threads=1, torch_threads=1),
+}
+DEFAULT_PROFILE = "medium"
+# 档案由高到低的顺序
+_PROFILE_RANK = {"high": 0, "medium": 1, "low": 2}
+
+# 估算的单帧推理耗时（毫秒）低于该值即选用对应档案
+_PROFILE_LIMITS_MS = (("high", 30.0), ("medium", 60.0))
+
+# 探测/选档逻辑的版本，写入指纹；逻辑变化后旧缓存自动失效并重新探测
+_PROBE_VERSION = 2
+
+# 估算单帧耗时时 YOLO 按默认档位的检测间隔分摊
+_YOLO_INTERVAL = 3
+
+
+def _base_dir() -> Path:
+    # 与日志目录一致：打包后放在 exe 同级目录，开发环境放在项目根目录
+    if hasattr(sys, "frozen"):
+        return Path(os.path.dirname(sys.executable))
+    return Path(__file__).resolve().parents[2]
+
+
+def default_profile_path() -> Path:
+    return _base_dir() / "cache" / PROFILE_FILE
+
+
+def _package_version(name):
+    try:
+        from importlib.metadata import version
+        return version(name)
+    except Exception:
+        return None
+
+
+def fingerprint() -> dict:
+    """硬件与依赖版本指纹"""
+    total_mem = None
+    if psutil is not None:
+        try:
+            total_mem = int(psutil.virtual_memory().total // (1024 * 1024))
+        except Exception:
+            pass
+    return {
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "system": platform.system(),
+        "cpu_count": os.cpu_count(),
+        "memory_mb": total_mem,
+        "python": platform.python_version(),
+        "packages": {name: _package_version(name) for name in _VERSIONED_PACKAGES},
+        "probe": _PROBE_VERSION,
+    }
+
+
+def _probe_frame(image_path=None):
+    """
+    读取测试图；没有时生成一张 640x480 的合成图（此时人脸/姿态只会测到检测阶段，
+    choose_profile 不会据此选出高于默认的档案）
+    """
+    import cv2
+    path = Path(image_path) if image_path else _base_dir() / PROBE_IMAGE
+    if path.exists():
+        frame = cv2.imread(str(path))
+        if frame is not None:
+            return cv2.resize(frame, (640, 480), interpolation=cv2.INTER_AREA), True
+    rng = np.random.default_rng(0)
+    frame = cv2.GaussianBlur(rng.integers(0, 255, (480, 640, 3), dtype=np.uint8), (9, 9), 0)
+    return frame, False
+
+
+def _time_it(fn, iterations, warmup=2):
+    for _ in range(warmup):
+        fn()
+    t0 = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - t0) / iterations * 1000.0
+
+
+def run_probe(image_path=None, iterations: int = 5) -> dict:
+    """
+    在默认档位参数下测量各模型的单帧耗时（毫秒）。
+    某个模型不可用时对应值为 None。
+    """
+    import cv2
+    frame, real_image = _probe_frame(image_path)
+    rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+    timings = {"pose": None, "face_mesh": None, "hands": None, "yolo": None}
+
+    try:
+        import mediapipe as mp
+        solutions = mp.solutions
+    except Exception as e:
+        print(f"Warning: probe skipped MediaPipe ({e})")
+        solutions = None
+
+    if solutions is not None:
+        factories = {
+            "pose": lambda: solutions.pose.Pose(
+                static_image_mode=False, model_complexity=1,
+                min_detection_confidence=0.5, min_tracking_confidence=0.5),
+            "face_mesh": lambda: solutions.face_mesh.FaceMesh(
+                max_num_faces=1, refine_landmarks=True,
+                min_detection_confidence=0.5, min_tracking_confidence=0.5),
+            "hands": lambda: solutions.hands.Hands(
+                max_num_hands=2, min_detection_confidence=0.5, min_tracking_confidence=0.5),
+        }
+        for name, factory in factories.items():
+            try:
+                model = factory()
+                try:
+                    timings[name] = _time_it(lambda: model.process(rgb), iterations)
+                finally:
+                    model.close()
+            except Exception as e:
+                print(f"Warning: probe {name} failed: {e}")
+
+    try:
+        # 复用手机检测的全局模型，探测完不需要重新加载
+        from modules.behavior.phone_detector import _get_yolo_model
+        yolo = _get_yolo_model()
+        if yolo is not None:
+            small = cv2.resize(frame, (320, 240))
+            timings["yolo"] = _time_it(lambda: yolo(small, verbose=False, imgsz=320), iterations)
+    except Exception as e:
+        print(f"Warning: probe yolo failed: {e}")
+
+    timings["real_image"] = real_image
+    return timings
+
+
+def estimate_frame_ms(timings: dict) -> Optional[float]:
+    parts = [timings.get(k) for k in ("pose", "face_mesh", "hands")]
+    if all(v is None for v in parts) and timings.get("yolo") is None:
+        return None
+    total = sum(v for v in parts if v is not None)
+    if timings.get("yolo") is not None:
+        total += timings["yolo"] / _YOLO_INTERVAL
+    return total
+
+
+def choose_profile(timings: dict) -> PerfProfile:
+    est = estimate_frame_ms(timings)
+    if est is None:
+        return PROFILES[DEFAULT_PROFILE]
+    for name, limit in _PROFILE_LIMITS_MS:
+        if est <= limit:
+            break
+    else:
+        name = "low"
+    # 合成图上没有人，Pose/FaceMesh/Hands 只跑了检测阶段，耗时偏低：最多选默认档案，只允许往下降
+    if not timings.get("real_image") and _PROFILE_RANK[name] < _PROFILE_RANK[DEFAULT_PROFILE]:
+        name = DEFAULT_PROFILE
+    return PROFILES[name]
+
+
+def load_profile(path=None, fp=None) -> Optional[PerfProfile]:
+    """读取缓存的档案；文件不存在、损坏或指纹不一致时返回 None"""
+    path = Path(path) if path else default_profile_path()
+    if not path.exists():
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except Exception as e:
+        print(f"Warning: {path.name} unreadable ({e}), will re-probe")
+        return None
+    if data.get("fingerprint") != (fp or fingerprint()):
+        return None
+    return PROFILES.get(data.get("profile"))
+
+
+def save_profile(profile: PerfProfile, timings: dict, path=None, fp=None):
+    path = Path(path) if path else default_profile_path()
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        data = {
+            "profile": profile.name,
+            "fingerprint": fp or fingerprint(),
+            "timings_ms": timings,
+            "settings": asdict(profile),
+            "probed_at": round(time.time(), 3),
+        }
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+    except Exception as e:
+        print(f"Warning: save {path.name} failed: {e}")
+
+
+_current = None
+
+
+def ensure_profile(force: bool = False, path=None, image_path=None) -> PerfProfile:
+    """
+    返回本机的性能档案：指纹一致时直接读缓存，否则跑一次探测并写入缓存。
+    force=True 时无条件重新探测。
+    """
+    global _current
+    fp = fingerprint()
+    profile = None if force else load_profile(path, fp)
+    if profile is None:
+        print("Info: probing hardware for performance profile...")
+        timings = run_probe(image_path)
+        profile = choose_profile(timings)
+        est = estimate_frame_ms(timings)
+        if est is not None:
+            save_profile(profile, timings, path, fp)
+            print(f"Info: performance profile '{profile.name}' (estimated {est:.1f} ms/frame)")
+        else:
+            print(f"Warning: no model could be probed, using '{profile.name}' profile")
+    _current = profile
+    return profile
+
+
+def current_profile() -> Optional[PerfProfile]:
+    """
+    当前进程已选定的档案；尚未探测时尝试读取缓存（不会触发探测），都没有返回 None。
+    """
+    global _current
+    if _current is None:
+        _current = load_profile()
+    return _current
+
+
+def apply_thread_settings(profile: PerfProfile):
+    """应用 OpenCV 线程数（PyTorch 线程数由 PhoneDetector 在加载 YOLO 时设置）"""
+    if profile.cv_threads > 0:
+        try:
+            import cv2
+            cv2.setNumThreads(profile.cv_threads)
+        except Exception:
+            pass
+
+
+if __name__ == "__main__":
+    # 手动重新探测：python -m modules.runtime.probe [--image path]
+    import argparse
+
+    parser = argparse.ArgumentParser(description="重新探测本机性能并更新性能档案")
+    parser.add_argument("--image", default=None, help="测试图路径（默认 assets/images/probe.jpg）")
+    args = parser.parse_args()
+
+    chosen = ensure_profile(force=True, image_path=args.image)
+    print(json.dumps(asdict(chosen), ensure_ascii=False, indent=2))
@@ -0,0 +1,188 @@
+"""
+自适应画质/算力档位
+按实测帧耗时与 CPU 占用，在一条由高到低的档位阶梯上升降：
+每降一级只调低一个模块的一个参数（按 DEGRADE_ORDER 的顺序，先牺牲对结果影响最小的），
+这样弱机器会逐级退化，而不是整体掉到个位数帧率。
+"""
+import os
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+
+# 各模块自己的档位（由高到低）
+MODULE_LADDERS = {
+    "pose_complexity": (2, 1, 0),               # MediaPipe Pose model_complexity
+    "face_refine": (True, False),               # FaceMesh refine_landmarks
+    "max_hands": (2, 1),                        # Hands max_num_hands
+    # (输入尺寸, 每 N 帧检测一次)；间隔是相对默认档的比例，实际值按 phone.detection_interval 缩放
+    "yolo": ((416, 2), (320, 3), (320, 5), (256, 8)),
+}
+
+# 降级顺序：阶梯上每一级相对上一级只改这里列出的一个模块
+DEGRADE_ORDER = (
+    "pose_complexity",   # 2 -> 1
+    "yolo",              # 416/2 -> 320/3   （到这里即原来写死的默认配置）
+    "yolo",              # 320/3 -> 320/5
+    "max_hands",
+    "face_refine",
+    "yolo",              # 320/5 -> 256/8
+    "pose_complexity",   # 1 -> 0
+)
+
+# 与原先硬编码参数一致的档位（pose=1, refine=True, hands=2, yolo 320/每3帧）
+DEFAULT_LEVEL = 2
+
+
+@dataclass(frozen=True)
+class QualityLevel:
+    index: int
+    pose_complexity: int
+    face_refine: bool
+    max_hands: int
+    yolo_imgsz: int
+    yolo_interval: int
+
+
+def build_ladder():
+    """按 DEGRADE_ORDER 展开为完整阶梯，下标 0 为最高画质"""
+    pos = {name: 0 for name in MODULE_LADDERS}
+
+    def make(i):
+        yolo = MODULE_LADDERS["yolo"][pos["yolo"]]
+        return QualityLevel(
+            index=i,
+            pose_complexity=MODULE_LADDERS["pose_complexity"][pos["pose_complexity"]],
+            face_refine=MODULE_LADDERS["face_refine"][pos["face_refine"]],
+            max_hands=MODULE_LADDERS["max_hands"][pos["max_hands"]],
+            yolo_imgsz=yolo[0],
+            yolo_interval=yolo[1],
+        )
+
+    ladder = [make(0)]
+    for name in DEGRADE_ORDER:
+        pos[name] += 1
+        if pos[name] >= len(MODULE_LADDERS[name]):
+            raise ValueError(f"DEGRADE_ORDER 中 {name} 超出其档位数")
+        ladder.append(make(len(ladder)))
+    return tuple(ladder)
+
+
+LADDER = build_ladder()
+
+
+class CpuSampler:
+    """
+    CPU 占用采样（0~1）。优先使用 psutil，否则在类 Unix 上用 loadavg 近似；
+    都不可用时返回 None，控制器只看帧耗时。
+    """
+
+    def __init__(self, interval: float = 1.0):
+        self.interval = interval
+        self._last_ts = 0.0
+        self._value = None
+        if psutil is not None:
+            psutil.cpu_percent(interval=None)   # 第一次调用只建立基准
+
+    def _read(self):
+        if psutil is not None:
+            return psutil.cpu_percent(interval=None) / 100.0
+        if hasattr(os, "getloadavg"):
+            return min(1.0, os.getloadavg()[0] / (os.cpu_count() or 1))
+        return None
+
+    def sample(self, now: float):
+        if now - self._last_ts >= self.interval:
+            self._last_ts = now
+            try:
+                self._value = self._read()
+            except Exception:
+                self._value = None
+        return self._value
+
+
+class QualityController:
+    """
+    档位控制器（不依赖 Qt，单线程使用）。
+
+    每帧调用 record(帧耗时ms)：
+    - 平滑后的耗时超出预算，或 CPU 高于 cpu_high，连续 down_frames 帧 → 降一级
+    - 耗时低于预算 * headroom 且 CPU 低于 cpu_low，连续 up_frames 帧 → 升一级
+    - 每次换档后 cooldown 秒内不再换档（模型重建需要时间，重建那几帧的耗时也不计）
+    档位变化时返回新的 QualityLevel，否则返回 None。
+    """
+
+    def __init__(self, cfg, start: int = DEFAULT_LEVEL, floor: int = 0,
+                 ladder=LADDER, cpu_sampler=None):
+        self.cfg = cfg
+        self.ladder = ladder
+        # floor: 允许升到的最高档（下标越小画质越高），启动探测可以据此限制上限
+        self.floor = max(0, min(int(floor), len(ladder) - 1))
+        self._index = max(self.floor, min(int(start), len(ladder) - 1))
+        self.cpu = cpu_sampler or CpuSampler()
+
+        self.latency_ms = None
+        self._over = 0
+        self._under = 0
+        self._hold_until = 0.0
+
+    @property
+    def level(self) -> QualityLevel:
+        return self.ladder[self._index]
+
+    def set_config(self, cfg):
+        self.cfg = cfg
+
+    def force(self, index: int, now: Optional[float] = None) -> QualityLevel:
+        """直接切到指定档位（例如启动探测结果），同样进入冷却"""
+        self._index = max(self.floor, min(int(index), len(self.ladder) - 1))
+        self._reset(now if now is not None else time.monotonic())
+        return self.level
+
+    def _reset(self, now):
+        self._over = 0
+        self._under = 0
+        self._hold_until = now + self.cfg.cooldown
+
+    def record(self, frame_ms: float, now: Optional[float] = None) -> Optional[QualityLevel]:
+        cfg = self.cfg
+        if not cfg.adaptive:
+            return None
+        now = time.monotonic() if now is None else now
+        if now < self._hold_until:
+            return None
+
+        a = cfg.latency_ema_alpha
+        self.latency_ms = frame_ms if self.latency_ms is None else a * frame_ms + (1 - a) * self.latency_ms
+        cpu = self.cpu.sample(now)
+
+        over = self.latency_ms > cfg.frame_budget_ms or (cpu is not None and cpu > cfg.cpu_high)
+        under = (self.latency_ms < cfg.frame_budget_ms * cfg.headroom
+                 and (cpu is None or cpu < cfg.cpu_low))
+
+        self._over = self._over + 1 if over else 0
+        self._under = self._under + 1 if under else 0
+
+        step = 0
+        if self._over >= cfg.down_frames and self._index < len(self.ladder) - 1:
+            step = 1
+        elif self._under >= cfg.up_frames and self._index > self.floor:
+            step = -1
+        if not step:
+            return None
+
+        old = self._index
+        self._index += step
+        self._reset(now)
+        # 换档后耗时会变化，旧的平滑值不再有参考意义
+        self.latency_ms = None
+        cpu_text = f"{cpu * 100:.0f}%" if cpu is not None else "n/a"
+        print(f"Info: quality level {old} -> {self._index} "
+              f"(frame {frame_ms:.1f} ms, budget {cfg.frame_budget_ms:.0f} ms, cpu {cpu_text})")
+        return self.level
+
@@ -0,0 +1,348 @@
+"""
+关键点会话记录与回放
+调阈值时不必再对视频重跑模型：SessionRecorder 把每帧送进检测器的关键点（滤波后）、
+时间戳和手机检测的原始结果写进紧凑的二进制文件；ReplayDriver 读出后直接喂给
+PostureDetector.analyze / AttentionMonitor.process_landmarks / BehaviorDetector.process，
+全程不需要 MediaPipe 和 YOLO，几小时的记录几秒内就能跑完一组阈值。
+
+文件格式（.lmrec）：
+    8 字节魔数 b"SSLMREC1" + 4 字节头部长度（小端） + JSON 头部（补齐到 64 字节对齐）
+    之后是定长帧记录（numpy 结构化 dtype，见 frame_dtype），按 chunk_frames 帧一块追加写入。
+    帧记录定长，整个数据区可以直接 np.memmap；异常退出时末尾不完整的记录在读取时丢弃。
+
+关键点以 float16 存储（归一化坐标的分辨率约 1e-3 量级，相当于 1280 宽画面上 1 像素以内）。
+手机检测：-1 本帧未检测，0 未检测到，1 检测到（画面像素相关，无法从关键点重算，回放时照原样使用）。
+"""
+import json
+import os
+import struct
+import sys
+import time
+from dataclasses import fields, replace
+from pathlib import Path
+
+import numpy as np
+
+from .filters import LandmarkView, landmarks_xyz
+
+RECORD_FLAG = "--record"
+RECORD_ENV = "SMARTSTUDY_RECORD"
+
+MAGIC = b"SSLMREC1"
+FORMAT_VERSION = 1
+
+POSE_POINTS = 33
+FACE_POINTS = 478          # refine_landmarks=True（含虹膜）；468 点的帧按实际点数记录
+HAND_POINTS = 21
+MAX_HANDS = 2
+
+_HAS_POSE, _HAS_FACE = 1, 2
+_ALIGN = 64
+
+
+def recording_requested() -> bool:
+    """是否请求记录关键点会话（命令行参数 --record 或环境变量 SMARTSTUDY_RECORD=1）"""
+    return RECORD_FLAG in sys.argv or os.environ.get(RECORD_ENV, "") == "1"
+
+
+def frame_dtype(face_points=FACE_POINTS, max_hands=MAX_HANDS):
+    return np.dtype([
+        ("ts", "<f8"),                                   # 单调时钟（秒）
+        ("flags", "u1"),                                 # bit0 有姿态，bit1 有人脸
+        ("n_hands", "u1"),
+        ("phone", "i1"),
+        ("_pad", "u1"),
+        ("n_face", "<u2"),
+        ("pose", "<f2", (POSE_POINTS, 4)),               # x, y, z, visibility
+        ("face", "<f2", (face_points, 3)),
+        ("hands", "<f2", (max_hands, HAND_POINTS, 3)),
+    ])
+
+
+def _pose_array(pose_landmarks):
+    if isinstance(pose_landmarks, LandmarkView):
+        xyz, vis = pose_landmarks.array, pose_landmarks.visibility
+    else:
+        xyz, vis = landmarks_xyz(pose_landmarks, with_visibility=True)
+    out = np.ones((POSE_POINTS, 4), dtype=np.float32)
+    n = min(len(xyz), POSE_POINTS)
+    out[:n, :3] = xyz[:n]
+    if vis is not None:
+        out[:n, 3] = vis[:n]
+    return out
+
+
+def _face_array(face_landmarks):
+    if isinstance(face_landmarks, LandmarkView):
+        return face_landmarks.array
+    return landmarks_xyz(face_landmarks)
+
+
+class SessionRecorder:
+    """
+    Args:
+        path: 输出文件路径（.lmrec）。
+        width / height: 画面尺寸（回放时检测器按它换算像素坐标）。
+        fps: 标称帧率（AttentionMonitor 按帧计时）。
+        chunk_frames: 每积累多少帧写一次盘。
+        meta: 附加到头部的任意信息（如阈值版本、档位）。
+    """
+
+    def __init__(self, path, width, height, fps=30.0, chunk_frames=256, meta=None):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.header = {
+            "version": FORMAT_VERSION,
+            "width": int(width),
+            "height": int(height),
+            "fps": float(fps),
+            "face_points": FACE_POINTS,
+            "max_hands": MAX_HANDS,
+            "created": round(time.time(), 3),
+            "meta": meta or {},
+        }
+        self.dtype = frame_dtype()
+        self._chunk = np.zeros(int(chunk_frames), dtype=self.dtype)
+        self._n = 0
+        self.frames = 0
+
+        head = json.dumps(self.header, ensure_ascii=False).encode("utf-8")
+        total = len(MAGIC) + 4 + len(head)
+        head += b" " * (-total % _ALIGN)
+        self._file = open(self.path, "wb")
+        self._file.write(MAGIC + struct.pack("<I", len(head)) + head)
+
+    def write(self, ts, pose_landmarks=None, face_landmarks=None, hand_array=None, phone=None):
+        """
+        记录一帧。
+        Args:
+            ts: 时间戳（秒，单调时钟）。
+            pose_landmarks / face_landmarks: MediaPipe 关键点或 LandmarkView，没有时为 None。
+            hand_array: (H, 21, 3) 手部关键点数组。
+            phone: 手机检测原始结果（None 本帧未检测 / False / True）。
+        """
+        rec = self._chunk[self._n]
+        rec["ts"] = ts
+        flags = 0
+        if pose_landmarks:
+            rec["pose"] = _pose_array(pose_landmarks)
+            flags |= _HAS_POSE
+        if face_landmarks:
+            face = _face_array(face_landmarks)
+            n = min(len(face), FACE_POINTS)
+            rec["face"][:n] = face[:n]
+            rec["n_face"] = n
+            flags |= _HAS_FACE
+        else:
+            rec["n_face"] = 0
+        rec["flags"] = flags
+        n_hands = 0
+        if hand_array is not None and len(hand_array):
+            n_hands = min(len(hand_array), MAX_HANDS)
+            rec["hands"][:n_hands] = hand_array[:n_hands]
+        rec["n_hands"] = n_hands
+        rec["phone"] = -1 if phone is None else int(bool(phone))
+
+        self._n += 1
+        self.frames += 1
+        if self._n == len(self._chunk):
+            self.flush()
+
+    def flush(self):
+        if self._n and self._file is not None:
+            self._file.write(self._chunk[:self._n].tobytes())
+            self._file.flush()
+            # 复用缓冲前清零，避免上一块的关键点残留到缺失字段
+            self._chunk[:self._n] = 0
+            self._n = 0
+
+    def close(self):
+        if self._file is None:
+            return
+        self.flush()
+        self._file.close()
+        self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class SessionReader:
+    """只读打开 .lmrec 文件，frames 是内存映射的结构化数组（不整体读入内存）"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            magic = f.read(len(MAGIC))
+            if magic != MAGIC:
+                raise ValueError(f"{self.path}: 不是关键点记录文件")
+            (head_len,) = struct.unpack("<I", f.read(4))
+            self.header = json.loads(f.read(head_len).decode("utf-8"))
+        self.dtype = frame_dtype(self.header["face_points"], self.header["max_hands"])
+        offset = len(MAGIC) + 4 + head_len
+        count = (self.path.stat().st_size - offset) // self.dtype.itemsize
+        if count > 0:
+            self.frames = np.memmap(self.path, dtype=self.dtype, mode="r", offset=offset, shape=(count,))
+        else:
+            self.frames = np.zeros(0, dtype=self.dtype)
+
+    def __len__(self):
+        return len(self.frames)
+
+    @property
+    def shape(self):
+        return self.header["height"], self.header["width"]
+
+    @property
+    def duration(self) -> float:
+        if len(self.frames) < 2:
+            return 0.0
+        return float(self.frames["ts"][-1] - self.frames["ts"][0])
+
+    def frame(self, i):
+        """第 i 帧 → (ts, pose LandmarkView | None, face LandmarkView | None, (H, 21, 3) 手部数组, phone)"""
+        rec = self.frames[i]
+        flags = int(rec["flags"])
+        pose = face = None
+        if flags & _HAS_POSE:
+            p = rec["pose"].astype(np.float64)
+            pose = LandmarkView(p[:, :3], p[:, 3])
+        if flags & _HAS_FACE:
+            face = LandmarkView(rec["face"][:int(rec["n_face"])].astype(np.float64))
+        hands = rec["hands"][:int(rec["n_hands"])].astype(np.float32)
+        return float(rec["ts"]), pose, face, hands, int(rec["phone"])
+
+
+class _ReplayClock:
+    """按记录时间戳走的时钟（替换检测器的 time.monotonic / time.time）"""
+    __slots__ = ("now",)
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class ReplayDriver:
+    """
+    把记录的关键点喂给三组检测器（不加载任何模型），逐帧产出 (ts, data_a, data_b, data_c)。
+
+    Args:
+        reader: SessionReader 或文件路径。
+        thresholds: 阈值快照，默认使用当前配置。
+    """
+
+    def __init__(self, reader, thresholds=None):
+        from modules.posture.detector import PostureDetector
+        from modules.attention.monitor import AttentionMonitor
+        from modules.behavior.behavior_detector import BehaviorDetector
+        from .thresholds import current_thresholds
+
+        self.reader = reader if isinstance(reader, SessionReader) else SessionReader(reader)
+        self.thresholds = thresholds or current_thresholds()
+        fps = self.reader.header.get("fps") or 30.0
+
+        self.clock = _ReplayClock()
+        self.posture = PostureDetector(self.thresholds, with_model=False)
+        self.attention = AttentionMonitor(fps=int(round(fps)), thresholds=self.thresholds, with_model=False)
+        self.behavior = BehaviorDetector(self.thresholds, with_model=False)
+        self.posture.clock = self.clock
+        self.behavior.hand_detector.clock = self.clock
+
+    def run(self, start=0, stop=None):
+        from .engine import _Results, _normalize_angle
+
+        shape = self.reader.shape
+        posture_cfg = self.thresholds.posture
+        for i in range(start, len(self.reader) if stop is None else stop):
+            ts, pose, face, hands, phone = self.reader.frame(i)
+            self.clock.now = ts
+
+            data_a = self.posture.analyze(None, pose, shape=shape)
+            s_ang = _normalize_angle(data_a.get("shoulder_tilt_angle"))
+            n_ang = _normalize_angle(data_a.get("neck_tilt"))
+            data_a["shoulder_tilt_angle"] = s_ang
+            data_a["neck_tilt"] = n_ang
+            data_a["is_shoulder_tilted"] = abs(s_ang) > posture_cfg.shoulder_tilt
+            data_a["is_neck_tilted"] = abs(n_ang) > posture_cfg.neck_tilt
+
+            data_b = self.attention.process_landmarks(None, face, shape=shape)
+
+            hand_landmarks = [LandmarkView(h) for h in hands] or None
+            results = _Results(pose, hand_landmarks, hands)
+            data_c = self.behavior.process(results, phone=phone)
+            yield ts, data_a, data_b, data_c
+
+
+def with_overrides(thresholds, overrides):
+    """
+    返回替换了若干配置项的新快照（用于阈值扫描）。
+    overrides: {"section.key": value}，section 为 Thresholds 的字段名（posture / attention / hand ...）。
+    """
+    sections = {}
+    for dotted, value in overrides.items():
+        section, _, key = dotted.partition(".")
+        cfg = sections.get(section) or getattr(thresholds, section)
+        kinds = {f.name: f.type for f in fields(cfg)}
+        if key not in kinds:
+            raise KeyError(f"未知配置项 {dotted}")
+        cast = int if kinds[key] in (int, "int") else float
+        sections[section] = replace(cfg, **{key: cast(value)})
+    return replace(thresholds, **sections)
+
+
+def summarize(driver) -> dict:
+    """跑完整个记录，返回与 /aggregates 相同口径的统计"""
+    from .api import _StreamStats
+
+    stats = _StreamStats()
+    for ts, a, b, c in driver.run():
+        stats.add({"ts": ts, "A": a, "B": b, "C": c})
+    return stats.summary()
+
+
+def _sweep_task(path, combo):
+    """阈值扫描的一个任务：一份记录 × 一组配置（在进程池中运行）"""
+    from .thresholds import current_thresholds
+
+    snap = with_overrides(current_thresholds(), dict(combo))
+    result = summarize(ReplayDriver(path, snap))
+    label = " ".join(f"{k}={v}" for k, v in combo) or "(当前配置)"
+    return {"file": Path(path).name, "set": label, **result}
+
+
+if __name__ == "__main__":
+    import argparse
+    import itertools
+    from concurrent.futures import ProcessPoolExecutor
+
+    parser = argparse.ArgumentParser(description="关键点记录回放 / 阈值扫描（不需要 MediaPipe）")
+    parser.add_argument("files", nargs="+", help=".lmrec 文件")
+    parser.add_argument("--set", action="append", default=[], metavar="SECTION.KEY=V1,V2",
+                        help="扫描的配置项，可重复；多个配置项取笛卡尔积")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="并行进程数")
+    args = parser.parse_args()
+
+    grid = []
+    for item in args.set:
+        key, _, values = item.partition("=")
+        grid.append([(key, v) for v in values.split(",") if v])
+    combos = list(itertools.product(*grid)) if grid else [()]
+    tasks = [(path, combo) for combo in combos for path in args.files]
+    total_frames = sum(len(SessionReader(p)) for p in args.files) * len(combos)
+
+    t0 = time.perf_counter()
+    if args.jobs > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=args.jobs) as pool:
+            results = pool.map(_sweep_task, *zip(*tasks))
+            for result in results:
+                print(json.dumps(result, ensure_ascii=False), flush=True)
+    else:
+        for path, combo in tasks:
+            print(json.dumps(_sweep_task(path, combo), ensure_ascii=False), flush=True)
+    elapsed = time.perf_counter() - t0
+    print(f"Info: {total_frames} frames replayed in {elapsed:.2f}s", file=sys.stderr)
@@ -0,0 +1,421 @@
+"""
+阈值配置服务
+thresholds.yaml 只解析一次，按 schema 校验后发布为不可变的类型化快照 (frozen dataclass)。
+检测器持有快照引用，每帧直接读属性；更新配置时整体替换引用，天然原子，
+不会出现“一半旧值一半新值”的中间状态。
+"""
+import sys
+import threading
+from dataclasses import dataclass, field, fields
+from pathlib import Path
+from typing import ClassVar
+
+import yaml
+
+
+def _default_config_path() -> Path:
+    # 兼容 PyInstaller 打包后的临时目录
+    if hasattr(sys, "_MEIPASS"):
+        return Path(sys._MEIPASS) / "config" / "thresholds.yaml"
+    return Path(__file__).resolve().parents[2] / "config" / "thresholds.yaml"
+
+
+class ConfigError(ValueError):
+    """配置文件不符合 schema"""
+
+
+def _opt(default, lo=None, hi=None):
+    """带取值范围的配置项（闭区间，None 表示不限制）"""
+    return field(default=default, metadata={"lo": lo, "hi": hi})
+
+
+# A: 坐姿（yaml 顶层小写键）
+@dataclass(frozen=True)
+class PostureThresholds:
+    SECTION: ClassVar[str] = ""
+    UPPER_KEYS: ClassVar[bool] = False
+
+    shoulder_tilt: float = _opt(10.0, lo=0.0)      # 肩膀倾斜角度阈值
+    head_forward: float = _opt(2.0)                # 头部前伸阈值
+    hunchback: float = _opt(0.25)                  # 驼背阈值（低于判驼背）
+    neck_tilt: float = _opt(15.0, lo=0.0)          # 颈部侧倾角度阈值
+    screen_distance: float = _opt(0.5, lo=0.0)     # 肩宽/画面宽 比例阈值
+    lean: float = _opt(0.15, lo=0.0)               # 躯干偏移比例阈值
+
+    short_window: float = _opt(2.0, lo=0.1)        # 短时统计窗口（秒）：稳定性、驼背/头前伸判定
+    long_window: float = _opt(60.0, lo=1.0)        # 长时统计窗口（秒）：长时稳定性、不良坐姿占比
+    hysteresis: float = _opt(0.1, lo=0.0, hi=1.0)  # 退出异常的相对回差
+
+
+# B: 专注度（yaml 顶层大写键）
+@dataclass(frozen=True)
+class AttentionThresholds:
+    SECTION: ClassVar[str] = ""
+    UPPER_KEYS: ClassVar[bool] = True
+
+    ear_closed_ratio: float = _opt(0.45, lo=0.0, hi=1.0)
+    ear_half_ratio: float = _opt(0.70, lo=0.0, hi=1.0)
+    sleepy_time: float = _opt(2.0, lo=0.0)
+
+    yaw_threshold: float = _opt(15.0, lo=0.0)
+    pitch_down_threshold: float = _opt(12.0, lo=0.0)
+    pitch_up_threshold: float = _opt(12.0, lo=0.0)
+    pitch_down_sign: float = _opt(1.0, lo=-1.0, hi=1.0)
+
+    window_time: float = _opt(1.2, lo=0.05)
+    pose_hold_time: float = _opt(0.4, lo=0.0)
+    attn_bad_threshold: float = _opt(60.0, lo=0.0, hi=100.0)
+
+    focal_scale: float = _opt(0.9, lo=0.01)
+    min_eye_dist: float = _opt(50.0, lo=0.0)
+    reproj_err_max: float = _opt(12.0, lo=0.0)
+    max_pose_jump: float = _opt(12.0, lo=0.0)
+    calib_reproj_err_max: float = _opt(8.0, lo=0.0)
+    noface_grace_sec: float = _opt(0.4, lo=0.0)
+
+    blink_min_sec: float = _opt(0.20, lo=0.0)
+    score_ema_alpha: float = _opt(0.25, lo=0.0, hi=1.0)
+
+    w_eye: float = _opt(0.55, lo=0.0)
+    w_away: float = _opt(0.20, lo=0.0)
+    w_down: float = _opt(0.15, lo=0.0)
+    w_up: float = _opt(0.05, lo=0.0)
+    w_noface: float = _opt(0.25, lo=0.0)
+    w_unstb: float = _opt(0.05, lo=0.0)
+
+    gaze_x_threshold: float = _opt(0.35, lo=0.0)
+    gaze_y_threshold: float = _opt(0.40, lo=0.0)
+    gaze_hold_time: float = _opt(0.35, lo=0.0)
+    w_gaze: float = _opt(0.15, lo=0.0)
+
+    yaw_std_norm: float = _opt(8.0, lo=1e-6)
+    pitch_std_norm: float = _opt(10.0, lo=1e-6)
+
+
+# C: 手部行为 (hand:)
+@dataclass(frozen=True)
+class HandThresholds:
+    SECTION: ClassVar[str] = "hand"
+    UPPER_KEYS: ClassVar[bool] = False
+
+    face_distance: float = _opt(0.15, lo=0.0)
+    head_distance: float = _opt(0.20, lo=0.0)
+    touch_time_threshold: float = _opt(2.0, lo=0.0)
+    head_time_threshold: float = _opt(3.0, lo=0.0)
+    smoothing_alpha: float = _opt(0.4, lo=0.0, hi=1.0)
+    contact_grace: float = _opt(0.25, lo=0.0)
+    forehead_offset_y: float = _opt(0.02)
+    mouth_offset_y: float = _opt(0.0)
+    cheek_offset_x: float = _opt(0.03, lo=0.0)
+    face_hysteresis_frames: int = _opt(7, lo=1, hi=20)
+    face_required_ratio: float = _opt(0.6, lo=0.0, hi=1.0)
+    gate: int = _opt(1, lo=0, hi=1)                    # 1 仅在手靠近头部时运行 Hands（头部裁剪图）
+    gate_reach: float = _opt(1.2, lo=0.0)              # 手腕-鼻尖距离小于 N 倍肩宽视为靠近头部
+    gate_hold_frames: int = _opt(15, lo=0)             # 触发后保持运行的帧数
+
+
+# C: 离席 (seat:)
+@dataclass(frozen=True)
+class SeatThresholds:
+    SECTION: ClassVar[str] = "seat"
+    UPPER_KEYS: ClassVar[bool] = False
+
+    offset_threshold: float = _opt(0.4, lo=0.0)
+    miss_frame_threshold: int = _opt(5, lo=0)
+
+
+# C: 手机 (phone:)
+@dataclass(frozen=True)
+class PhoneThresholds:
+    SECTION: ClassVar[str] = "phone"
+    UPPER_KEYS: ClassVar[bool] = False
+
+    yolo_confidence: float = _opt(0.4, lo=0.0, hi=1.0)
+    detection_interval: int = _opt(3, lo=1)
+    detection_window_size: int = _opt(10, lo=1)
+    confirm_threshold: float = _opt(0.6, lo=0.0, hi=1.0)
+    exit_threshold: float = _opt(0.2, lo=0.0, hi=1.0)
+    track: int = _opt(1, lo=0, hi=1)                  # 1 在两次 YOLO 之间跟踪手机框
+    tracked_interval: int = _opt(10, lo=1)            # 轨迹稳定时每 N 帧才复检一次
+    track_decay: float = _opt(0.97, lo=0.0, hi=1.0)   # 跟踪帧的置信度逐帧衰减系数
+    track_min_conf: float = _opt(0.15, lo=0.0, hi=1.0)  # 置信度低于此值删除轨迹
+    recheck_conf: float = _opt(0.3, lo=0.0, hi=1.0)   # 置信度低于此值立即复检
+    confirm_conf: float = _opt(0.7, lo=0.0, hi=1.0)   # 单次检测置信度达到此值即视为确认
+    track_iou: float = _opt(0.3, lo=0.0, hi=1.0)      # 检测框与轨迹关联的最小 IoU
+    track_match_min: float = _opt(0.5, lo=-1.0, hi=1.0)  # 模板匹配分数低于此值视为跟丢
+    track_max_misses: int = _opt(1, lo=0)             # 允许连续几次检测没关联上
+    batch_size: int = _opt(8, lo=1)                   # 多路部署时一批最多合并几帧做 YOLO 推理
+    batch_wait_ms: float = _opt(10.0, lo=0.0)         # 第一帧到达后最多等待多久凑批（毫秒）
+
+
+# 空座低功耗 (presence:)
+@dataclass(frozen=True)
+class PresenceThresholds:
+    SECTION: ClassVar[str] = "presence"
+    UPPER_KEYS: ClassVar[bool] = False
+
+    enabled: int = _opt(1, lo=0, hi=1)                # 1 开启空座低功耗模式
+    empty_after: float = _opt(5.0, lo=0.0)            # 持续离席多少秒后进入低功耗
+    probe_interval: int = _opt(3, lo=1)               # 低功耗时每 N 帧探测一次
+    motion_thresh: float = _opt(8.0, lo=0.0)          # 缩略图平均灰度差超过该值视为有运动
+    pose_every: int = _opt(10, lo=1)                  # 无运动时每 N 次探测也跑一次 Pose
+    return_hits: int = _opt(2, lo=1)                  # 连续 N 次确认有人才恢复完整管线
+    empty_fps: float = _opt(10.0, lo=0.5)             # 低功耗时的取帧/显示帧率
+
+
+# 自适应档位 (quality:)
+@dataclass(frozen=True)
+class QualityThresholds:
+    SECTION: ClassVar[str] = "quality"
+    UPPER_KEYS: ClassVar[bool] = False
+
+    adaptive: int = _opt(1, lo=0, hi=1)               # 1 开启自动升降档，0 固定档位
+    frame_budget_ms: float = _opt(66.0, lo=1.0)       # 单帧推理耗时预算（毫秒）
+    headroom: float = _opt(0.6, lo=0.0, hi=1.0)       # 耗时低于 预算*headroom 才考虑升档
+    cpu_high: float = _opt(0.90, lo=0.0, hi=1.0)      # CPU 占用高于此值视为过载
+    cpu_low: float = _opt(0.60, lo=0.0, hi=1.0)       # CPU 占用低于此值才允许升档
+    down_frames: int = _opt(10, lo=1)                 # 连续超预算多少帧后降档
+    up_frames: int = _opt(90, lo=1)                   # 连续有余量多少帧后升档
+    cooldown: float = _opt(3.0, lo=0.0)               # 换档后冷却时间（秒）
+    latency_ema_alpha: float = _opt(0.2, lo=0.0, hi=1.0)
+
+
+# 关键点滤波与隔帧运行 (filter:)
+@dataclass(frozen=True)
+class FilterThresholds:
+    SECTION: ClassVar[str] = "filter"
+    UPPER_KEYS: ClassVar[bool] = False
+
+    enabled: int = _opt(1, lo=0, hi=1)                # 1 开启关键点滤波（隔帧运行也依赖它）
+    pose_min_cutoff: float = _opt(1.0, lo=0.01)       # 静止时的截止频率（Hz），越小越平滑
+    face_min_cutoff: float = _opt(3.0, lo=0.01)
+    hand_min_cutoff: float = _opt(1.5, lo=0.01)
+    beta: float = _opt(50.0, lo=0.0)                  # 截止频率随速度（归一化坐标/秒）升高的系数
+    d_cutoff: float = _opt(1.0, lo=0.01)              # 速度估计的截止频率（Hz）
+    pose_stride: int = _opt(1, lo=1)                  # 每 N 帧运行一次模型，其余帧用预测值
+    face_stride: int = _opt(1, lo=1)
+    hand_stride: int = _opt(1, lo=1)
+    max_predict: float = _opt(0.15, lo=0.0)           # 预测最多外推多少秒
+
+
+# 事件通道：状态变化检测 + 周期摘要
+@dataclass(frozen=True)
+class EventThresholds:
+    SECTION: ClassVar[str] = "events"
+    UPPER_KEYS: ClassVar[bool] = False
+
+    summary_interval: float = _opt(1.0, lo=0.05, hi=10.0)  # 周期摘要间隔（秒），仪表盘按此刷新
+    log_interval: float = _opt(5.0, lo=0.5)           # 摘要写入日志的间隔（秒）
+    neck_tilt: float = _opt(25.0, lo=0.0)             # 颈部前伸提醒角度
+    shoulder_tilt: float = _opt(5.0, lo=0.0)          # 肩膀倾斜提醒角度（绝对值）
+    attention_low: float = _opt(60.0, lo=0.0, hi=100.0)  # 专注分低于该值进入“低专注”
+    perclos_high: float = _opt(0.15, lo=0.0, hi=1.0)  # 疲劳值高于该值进入“疲劳”
+    hysteresis: float = _opt(0.1, lo=0.0, hi=0.5)     # 越线后回到阈值 ±该比例以内才算退出
+    change_hold: float = _opt(0.5, lo=0.0)            # 类别状态需保持该时长（秒）才发送 change（滤掉眨眼）
+
+
+@dataclass(frozen=True)
+class Thresholds:
+    """一次完整的配置快照"""
+    posture: PostureThresholds = field(default_factory=PostureThresholds)
+    attention: AttentionThresholds = field(default_factory=AttentionThresholds)
+    hand: HandThresholds = field(default_factory=HandThresholds)
+    seat: SeatThresholds = field(default_factory=SeatThresholds)
+    phone: PhoneThresholds = field(default_factory=PhoneThresholds)
+    quality: QualityThresholds = field(default_factory=QualityThresholds)
+    presence: PresenceThresholds = field(default_factory=PresenceThresholds)
+    filter: FilterThresholds = field(default_factory=FilterThresholds)
+    events: EventThresholds = field(default_factory=EventThresholds)
+    version: int = 0  # 每次发布递增，检测器可据此判断是否需要更新
+
+
+_SECTIONS = (
+    ("posture", PostureThresholds),
+    ("attention", AttentionThresholds),
+    ("hand", HandThresholds),
+    ("seat", SeatThresholds),
+    ("phone", PhoneThresholds),
+    ("quality", QualityThresholds),
+    ("presence", PresenceThresholds),
+    ("filter", FilterThresholds),
+    ("events", EventThresholds),
+)
+
+
+def _coerce(value, kind, key, errors):
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        errors.append(f"{key}: 需要数值，实际为 {value!r}")
+        return None
+    if kind is int:
+        if float(value) != int(value):
+            errors.append(f"{key}: 需要整数，实际为 {value!r}")
+            return None
+        return int(value)
+    return float(value)
+
+
+def _build_section(cls, raw: dict, errors: list):
+    src = raw
+    prefix = ""
+    if cls.SECTION:
+        src = raw.get(cls.SECTION) or {}
+        prefix = cls.SECTION + "."
+        if not isinstance(src, dict):
+            errors.append(f"{cls.SECTION}: 需要是一个映射")
+            return cls()
+
+    values = {}
+    for f in fields(cls):
+        key = f.name.upper() if cls.UPPER_KEYS else f.name
+        if key not in src:
+            continue
+        v = _coerce(src[key], f.type, prefix + key, errors)
+        if v is None:
+            continue
+        lo, hi = f.metadata.get("lo"), f.metadata.get("hi")
+        if (lo is not None and v < lo) or (hi is not None and v > hi):
+            errors.append(f"{prefix}{key}: {v} 超出范围 [{lo}, {hi}]")
+            continue
+        values[f.name] = v
+    return cls(**values)
+
+
+def parse_thresholds(raw: dict, version: int = 0) -> Thresholds:
+    """
+    将 yaml 字典校验并转换为快照。
+    未知键忽略，缺失键使用默认值；任何类型或范围错误都会抛出 ConfigError。
+    """
+    if raw is None:
+        raw = {}
+    if not isinstance(raw, dict):
+        raise ConfigError("thresholds.yaml 顶层必须是映射")
+
+    errors = []
+    parts = {name: _build_section(cls, raw, errors) for name, cls in _SECTIONS}
+
+    # 跨字段约束
+    posture = parts["posture"]
+    if posture.long_window < posture.short_window:
+        errors.append("long_window 不能小于 short_window")
+    att = parts["attention"]
+    if att.ear_closed_ratio > att.ear_half_ratio:
+        errors.append("EAR_CLOSED_RATIO 不能大于 EAR_HALF_RATIO")
+    phone = parts["phone"]
+    if phone.exit_threshold > phone.confirm_threshold:
+        errors.append("phone.exit_threshold 不能大于 phone.confirm_threshold")
+    if phone.track_min_conf > phone.recheck_conf:
+        errors.append("phone.track_min_conf 不能大于 phone.recheck_conf")
+
+    quality = parts["quality"]
+    if quality.cpu_low > quality.cpu_high:
+        errors.append("quality.cpu_low 不能大于 quality.cpu_high")
+
+    if errors:
+        raise ConfigError("; ".join(errors))
+    return Thresholds(version=version, **parts)
+
+
+class ThresholdsStore:
+    """
+    配置服务（进程内单例）。
+    - current(): 返回当前快照（只是一次引用读取）
+    - load():    解析 yaml 并发布新快照
+    - subscribe(): 注册快照变更回调
+    """
+
+    def __init__(self, path=None):
+        self.path = Path(path) if path else _default_config_path()
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self._raw = {}
+        self._listeners = []
+
+    def current(self) -> Thresholds:
+        snap = self._snapshot
+        if snap is None:
+            snap = self.load()
+        return snap
+
+    def raw(self) -> dict:
+        """最近一次成功解析的原始字典（副本）"""
+        return dict(self._raw)
+
+    def _read(self, path: Path) -> dict:
+        if not path.exists():
+            print(f"Warning: Configuration file not found at {path}")
+            return {}
+        with open(path, "r", encoding="utf-8") as f:
+            return yaml.safe_load(f) or {}
+
+    def load(self, path=None, strict: bool = False):
+        """
+        读取并发布配置。
+        strict=False：解析失败时打印警告，首次加载回退到默认值，否则保留旧快照。
+        strict=True ：解析失败时抛出 ConfigError（或 IO/YAML 异常）。
+        """
+        with self._lock:
+            if path is not None:
+                self.path = Path(path)
+            version = self._snapshot.version + 1 if self._snapshot else 0
+            try:
+                raw = self._read(self.path)
+                if self._snapshot is not None and raw == self._raw:
+                    # 内容未变（例如保存后又触发了文件监听），不重复发布
+                    return self._snapshot
+                snap = parse_thresholds(raw, version=version)
+            except Exception as e:
+                if strict:
+                    raise
+                print(f"Warning: thresholds.yaml 无效 ({e})，{'保留当前配置' if self._snapshot else '使用默认配置'}")
+                if self._snapshot is not None:
+                    return self._snapshot
+                raw, snap = {}, Thresholds(version=version)
+
+            self._raw = raw
+            self._snapshot = snap
+            listeners = list(self._listeners)
+
+        for cb in listeners:
+            try:
+                cb(snap)
+            except Exception as e:
+                print(f"Warning: thresholds listener failed: {e}")
+        return snap
+
+    def ensure_loaded(self, path=None) -> Thresholds:
+        """已从同一路径加载过则直接返回快照，避免重复解析"""
+        if path is not None and Path(path).resolve() != self.path.resolve():
+            return self.load(path)
+        return self.current()
+
+    def subscribe(self, callback):
+        with self._lock:
+            if callback not in self._listeners:
+                self._listeners.append(callback)
+
+    def unsubscribe(self, callback):
+        with self._lock:
+            if callback in self._listeners:
+                self._listeners.remove(callback)
+
+
+_store = ThresholdsStore()
+
+
+def get_store() -> ThresholdsStore:
+    return _store
+
+
+def current_thresholds() -> Thresholds:
+    return _store.current()
+
+
+def as_thresholds(config=None) -> Thresholds:
+    """
+    兼容旧接口：检测器构造参数可以是快照、yaml 字典或 None（使用全局快照）。
+    """
+    if config is None:
+        return current_thresholds()
+    if isinstance(config, Thresholds):
+        return config
+    return parse_thresholds(config)
@@ -0,0 +1,135 @@
+"""
+thresholds.yaml 热更新
+监听配置目录，文件变化后重新解析、校验并发布新快照；
+校验失败时保留当前配置，不会打断正在运行的 AI 管线。
+优先使用 watchdog（若已安装），否则退化为定时轮询文件的 mtime/size。
+"""
+import threading
+import time
+from pathlib import Path
+
+from .thresholds import ConfigError, get_store
+
+# watchdog 为可选依赖
+try:
+    from watchdog.observers import Observer
+    from watchdog.events import FileSystemEventHandler
+except Exception:
+    Observer = None
+    FileSystemEventHandler = object
+
+
+class _ChangeHandler(FileSystemEventHandler):
+    def __init__(self, target: Path, on_change):
+        super().__init__()
+        self._target = target.resolve()
+        self._on_change = on_change
+
+    def on_any_event(self, event):
+        for attr in ("src_path", "dest_path"):
+            p = getattr(event, attr, None)
+            if p and Path(p).resolve() == self._target:
+                self._on_change()
+                return
+
+
+class ConfigWatcher:
+    """
+    配置文件监听器（后台守护线程）。
+
+    Args:
+        store: ThresholdsStore，默认使用全局配置服务。
+        poll_interval (float): 轮询模式下的检查间隔（秒）。
+        debounce (float): 检测到变化后等待文件写完的时间（秒），编辑器保存时常会连续写入多次。
+    """
+
+    def __init__(self, store=None, poll_interval: float = 1.0, debounce: float = 0.3):
+        self.store = store or get_store()
+        self.poll_interval = float(poll_interval)
+        self.debounce = float(debounce)
+
+        self._stop = threading.Event()
+        self._dirty = threading.Event()
+        self._thread = None
+        self._observer = None
+        self._last_sig = None
+
+    @property
+    def mode(self) -> str:
+        return "watchdog" if self._observer is not None else "polling"
+
+    def _signature(self):
+        try:
+            st = self.store.path.stat()
+            return st.st_mtime_ns, st.st_size
+        except OSError:
+            return None
+
+    def start(self):
+        if self._thread is not None:
+            return self
+        self._stop.clear()
+        self._last_sig = self._signature()
+
+        if Observer is not None:
+            try:
+                observer = Observer()
+                observer.schedule(_ChangeHandler(self.store.path, self._dirty.set),
+                                  str(self.store.path.parent), recursive=False)
+                observer.daemon = True
+                observer.start()
+                self._observer = observer
+            except Exception as e:
+                print(f"Warning: watchdog 启动失败 ({e})，改用轮询")
+                self._observer = None
+
+        self._thread = threading.Thread(target=self._loop, name="ConfigWatcher", daemon=True)
+        self._thread.start()
+        print(f"Info: ConfigWatcher started ({self.mode}): {self.store.path}")
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._dirty.set()
+        if self._observer is not None:
+            try:
+                self._observer.stop()
+                self._observer.join(timeout=1.0)
+            except Exception:
+                pass
+            self._observer = None
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+            self._thread = None
+
+    def _loop(self):
+        while not self._stop.is_set():
+            if self._observer is not None:
+                # 事件驱动：等通知；同时保留低频轮询兜底（网络盘等场景收不到事件）
+                self._dirty.wait(timeout=max(self.poll_interval, 5.0))
+            else:
+                self._stop.wait(self.poll_interval)
+            if self._stop.is_set():
+                break
+            self._dirty.clear()
+
+            sig = self._signature()
+            if sig is None or sig == self._last_sig:
+                continue
+
+            # 等文件写完再读
+            time.sleep(self.debounce)
+            self._last_sig = self._signature()
+            self.reload()
+
+    def reload(self):
+        """立即重新加载；校验失败返回 None 并保留当前配置"""
+        try:
+            snap = self.store.load(strict=True)
+        except ConfigError as e:
+            print(f"Warning: thresholds.yaml 校验失败，保留当前配置: {e}")
+            return None
+        except Exception as e:
+            print(f"Warning: thresholds.yaml 读取失败，保留当前配置: {e}")
+            return None
+        return snap